@@ -0,0 +1,62 @@
+"""
+In-process caches
+
+Thin thread-safe wrapper around cachetools.TTLCache. Every worker process
+has its own copy, so entries must be short-lived enough that a write handled
+by another worker becomes visible within the TTL; writes handled by this
+worker invalidate explicitly.
+"""
+
+import threading
+from typing import Any, Callable, Hashable
+
+from cachetools import TTLCache
+
+_MISSING = object()
+
+
+class LocalCache:
+    """TTL + LRU cache shared by the request threads of one worker"""
+
+    def __init__(self, maxsize: int = 1024, ttl: float = 60):
+        self._cache = TTLCache(maxsize=maxsize, ttl=ttl)
+        self._lock = threading.RLock()
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        with self._lock:
+            return self._cache.get(key, default)
+
+    def set(self, key: Hashable, value: Any) -> None:
+        with self._lock:
+            self._cache[key] = value
+
+    def get_or_set(self, key: Hashable, loader: Callable[[], Any]) -> Any:
+        """Return the cached value or compute it with `loader` and store it"""
+        value = self.get(key, _MISSING)
+        if value is _MISSING:
+            # Loader runs outside the lock: it usually queries the database
+            value = loader()
+            self.set(key, value)
+        return value
+
+    def invalidate(self, key: Hashable) -> None:
+        with self._lock:
+            self._cache.pop(key, None)
+
+    def invalidate_where(self, predicate: Callable[[Hashable], bool]) -> None:
+        """Drop every key for which `predicate(key)` is true"""
+        with self._lock:
+            for key in [k for k in list(self._cache.keys()) if predicate(k)]:
+                self._cache.pop(key, None)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._cache.clear()
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._cache)
+
+    def __contains__(self, key: Hashable) -> bool:
+        with self._lock:
+            return key in self._cache
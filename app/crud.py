@@ -5,6 +5,8 @@ from . import tech_task_models, tech_task_schemas
 from typing import List, Optional
 from datetime import datetime
 from fastapi import HTTPException, status
+from app.fuzzy_search import DEFAULT_SIMILARITY, apply_fuzzy_search
+from app.fast_json import ModelJSON
 from uuid import uuid4
 
 
@@ -25,7 +27,9 @@ def filter_experts(
         city: Optional[str] = None,
         search: Optional[str] = None,
         skip: int = 0,
-        limit: int = 100
+        limit: int = 100,
+        fuzzy: bool = False,
+        similarity: float = DEFAULT_SIMILARITY
 ):
     query = db.query(models.Expert)
 
@@ -35,7 +39,10 @@ def filter_experts(
     if city:
         query = query.filter(models.Expert.city.ilike(f"%{city}%"))
 
-    if search:
+    if search and fuzzy:
+        # Поиск по ФИО с опечатками (триграммный индекс)
+        query = apply_fuzzy_search(db, query, [models.Expert.full_name], search, similarity)
+    elif search:
         # Поиск по ФИО или специализации
         query = query.filter(
             or_(
@@ -1054,10 +1061,13 @@ def get_event_participants(db: Session, event_id: int, skip: int = 0, limit: int
     ).offset(skip).limit(limit).all()
 
 
-from sqlalchemy.orm import Session
-from sqlalchemy import and_, or_, func, desc
-from typing import List, Optional, Dict, Any
+from sqlalchemy.orm import Session, selectinload
+from sqlalchemy import and_, or_, func, desc, case, select
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from typing import List, Optional, Dict, Any, FrozenSet, NamedTuple
 from datetime import datetime
+from app.cache import LocalCache
+from app.view_counter import ViewCounter
 from app.models import (
     Course, CourseCategory, CourseChapter, CourseLesson, CourseTest, CourseTestAnswer,
     CourseEnrollment, CourseLessonProgress, CourseTestResult, course_category, User,
@@ -1314,6 +1324,60 @@ def increment_course_views(db: Session, course_id: int) -> Optional[Course]:
     return db_course
 
 
+# Дерево курса (главы -> уроки -> тесты -> ответы) для GET /courses/{course_id}
+
+# Готовый JSON CourseDetail: course_id -> (updated_at, bytes)
+course_detail_cache = LocalCache(maxsize=256, ttl=300)
+course_detail_json = ModelJSON(schemas.CourseDetail)
+course_view_counter = ViewCounter(Course)
+
+
+def get_course_tree(db: Session, course_id: int) -> Optional[Course]:
+    """Курс со всем содержимым, загруженным фиксированным числом запросов (selectinload)"""
+    lessons = selectinload(Course.chapters).selectinload(CourseChapter.lessons)
+    return db.query(Course).options(
+        selectinload(Course.categories),
+        selectinload(Course.chapters).selectinload(CourseChapter.homework),
+        lessons.selectinload(CourseLesson.homework),
+        lessons.selectinload(CourseLesson.tests).selectinload(CourseTest.answers),
+    ).filter(Course.id == course_id).first()
+
+
+def get_course_detail_json(db: Session, course_id: int) -> Optional[bytes]:
+    """
+    Сериализованный CourseDetail. Кэш проверяется по updated_at, поэтому
+    изменение курса в другом воркере тоже делает запись устаревшей.
+    """
+    row = db.query(Course.updated_at).filter(Course.id == course_id).first()
+    if row is None:
+        return None
+
+    cached = course_detail_cache.get(course_id)
+    if cached is not None and cached[0] == row.updated_at:
+        return cached[1]
+
+    course = get_course_tree(db, course_id)
+    if course is None:
+        return None
+
+    payload = course_detail_json.dump(course)
+    course_detail_cache.set(course_id, (course.updated_at, payload))
+    return payload
+
+
+def invalidate_course_detail(db: Session, course_id: int) -> None:
+    """
+    Сброс кэша дерева курса после изменения глав/уроков/тестов.
+    updated_at сдвигается, чтобы записи в кэше других воркеров тоже устарели.
+    """
+    db.query(Course).filter(Course.id == course_id).update(
+        {Course.updated_at: datetime.utcnow()}, synchronize_session=False
+    )
+    db.commit()
+    course_detail_cache.invalidate(course_id)
+    course_total_lessons_cache.invalidate(course_id)
+
+
 def delete_course(db: Session, course_id: int) -> bool:
     """Удаление курса"""
     db_course = db.query(Course).filter(Course.id == course_id).first()
@@ -1458,8 +1522,10 @@ def delete_chapter(db: Session, chapter_id: int) -> bool:
     db_chapter = db.query(CourseChapter).filter(CourseChapter.id == chapter_id).first()
     if not db_chapter:
         return False
+    course_id = db_chapter.course_id
     db.delete(db_chapter)
     db.commit()
+    recount_course_progress(db, course_id)
     return True
 
 
@@ -1483,8 +1549,10 @@ def delete_lesson(db: Session, lesson_id: int) -> bool:
     db_lesson = db.query(CourseLesson).filter(CourseLesson.id == lesson_id).first()
     if not db_lesson:
         return False
+    course_id = db_lesson.chapter.course_id
     db.delete(db_lesson)
     db.commit()
+    recount_course_progress(db, course_id)
     return True
 
 
@@ -1500,6 +1568,7 @@ def update_test(db: Session, test_id: int, test_update: CourseTestUpdate) -> Opt
         setattr(db_test, field, value)
     db.commit()
     db.refresh(db_test)
+    invalidate_test_answer_key(test_id)
     return db_test
 
 
@@ -1510,6 +1579,7 @@ def delete_test(db: Session, test_id: int) -> bool:
         return False
     db.delete(db_test)
     db.commit()
+    invalidate_test_answer_key(test_id)
     return True
 
 
@@ -1686,154 +1756,271 @@ def create_enrollment(db: Session, user_id: int, course_id: int) -> CourseEnroll
     return db_enrollment
 
 
-def complete_lesson(db: Session, enrollment_id: int, lesson_id: int) -> Dict[str, Any]:
-    """Отметка урока как завершенного и обновление общего прогресса"""
-    # Находим запись о прогрессе урока
-    lesson_progress = db.query(CourseLessonProgress).filter(
-        and_(
-            CourseLessonProgress.enrollment_id == enrollment_id,
-            CourseLessonProgress.lesson_id == lesson_id
-        )
-    ).first()
+# Количество уроков в курсе: course_id -> int (сбрасывается в invalidate_course_detail)
+course_total_lessons_cache = LocalCache(maxsize=1024, ttl=300)
 
-    if not lesson_progress:
-        # Если запись не найдена, создаем новую
-        lesson_progress = CourseLessonProgress(
-            enrollment_id=enrollment_id,
-            lesson_id=lesson_id,
-            is_completed=True,
-            last_viewed_at=datetime.utcnow()
-        )
-        db.add(lesson_progress)
-    else:
-        # Обновляем существующую запись
-        lesson_progress.is_completed = True
-        lesson_progress.last_viewed_at = datetime.utcnow()
 
-    db.commit()
+def get_course_total_lessons(db: Session, course_id: int) -> int:
+    """Общее количество уроков в курсе (кэшируется)"""
+    return course_total_lessons_cache.get_or_set(
+        course_id,
+        lambda: db.query(func.count(CourseLesson.id)).join(
+            CourseChapter, CourseLesson.chapter_id == CourseChapter.id
+        ).filter(
+            CourseChapter.course_id == course_id
+        ).scalar() or 0
+    )
 
-    # Обновляем общий прогресс по курсу
-    enrollment = db.query(CourseEnrollment).filter(CourseEnrollment.id == enrollment_id).first()
 
-    # Получаем общее количество уроков в курсе
-    total_lessons_count = db.query(CourseLesson).join(
+def recount_course_progress(db: Session, course_id: int) -> None:
+    """
+    Пересчет completed_lessons_count и progress всех записей на курс после
+    удаления уроков/глав (счетчик в complete_lesson только увеличивается).
+    Завершенный курс остается завершенным.
+    """
+    total_lessons_count = db.query(func.count(CourseLesson.id)).join(
         CourseChapter, CourseLesson.chapter_id == CourseChapter.id
-    ).filter(
-        CourseChapter.course_id == enrollment.course_id
-    ).count()
-
-    # Получаем все завершенные уроки
-    completed_lessons_progress = db.query(CourseLessonProgress).filter(
-        and_(
-            CourseLessonProgress.enrollment_id == enrollment_id,
-            CourseLessonProgress.is_completed == True
-        )
-    ).all()
+    ).filter(CourseChapter.course_id == course_id).scalar() or 0
 
-    completed_lessons_count = len(completed_lessons_progress)
-    completed_lesson_ids = [progress.lesson_id for progress in completed_lessons_progress]
+    completed = select(func.count(CourseLessonProgress.id)).join(
+        CourseLesson, CourseLessonProgress.lesson_id == CourseLesson.id
+    ).join(
+        CourseChapter, CourseLesson.chapter_id == CourseChapter.id
+    ).where(
+        CourseLessonProgress.enrollment_id == CourseEnrollment.id,
+        CourseLessonProgress.is_completed.is_(True),
+        CourseChapter.course_id == course_id
+    ).scalar_subquery()
 
-    # Рассчитываем процент выполнения
+    values = {CourseEnrollment.completed_lessons_count: completed}
     if total_lessons_count > 0:
-        progress = (completed_lessons_count / total_lessons_count) * 100
+        finished = completed >= total_lessons_count
+        values[CourseEnrollment.progress] = func.least(100.0, completed * 100.0 / total_lessons_count)
+        values[CourseEnrollment.completed] = or_(CourseEnrollment.completed.is_(True), finished)
+        values[CourseEnrollment.completion_date] = case(
+            (and_(finished, CourseEnrollment.completion_date.is_(None)), datetime.utcnow()),
+            else_=CourseEnrollment.completion_date
+        )
     else:
-        progress = 0
+        values[CourseEnrollment.progress] = 0
 
-    # Обновляем прогресс и проверяем, завершен ли курс
-    enrollment.progress = progress
-    if progress >= 100:
-        enrollment.completed = True
-        enrollment.completion_date = datetime.utcnow()
+    db.query(CourseEnrollment).filter(CourseEnrollment.course_id == course_id).update(
+        values, synchronize_session=False
+    )
+    db.commit()
+    course_total_lessons_cache.invalidate(course_id)
+
+
+def complete_lesson(db: Session, enrollment_id: int, lesson_id: int, course_id: Optional[int] = None) -> Dict[str, Any]:
+    """
+    Отметка урока как завершенного и обновление общего прогресса.
+
+    Идемпотентный upsert по (enrollment_id, lesson_id): счетчик завершенных уроков
+    увеличивается только если урок завершен впервые. Стоимость не зависит от размера курса.
+    """
+    now = datetime.utcnow()
+
+    if course_id is None:
+        course_id = db.query(CourseEnrollment.course_id).filter(CourseEnrollment.id == enrollment_id).scalar()
+
+    # Запись о прогрессе могла быть создана при записи на курс (is_completed = false),
+    # поэтому конфликт обновляет только незавершенную строку; для завершенной - ничего не делает
+    upsert = pg_insert(CourseLessonProgress).values(
+        enrollment_id=enrollment_id,
+        lesson_id=lesson_id,
+        is_completed=True,
+        last_viewed_at=now
+    )
+    upsert = upsert.on_conflict_do_update(
+        constraint="uq_lesson_progress_enrollment_lesson",
+        set_={"is_completed": True, "last_viewed_at": now},
+        where=CourseLessonProgress.is_completed.isnot(True)
+    ).returning(CourseLessonProgress.id)
+    newly_completed = db.execute(upsert).first() is not None
+
+    total_lessons_count = get_course_total_lessons(db, course_id)
+
+    if newly_completed:
+        new_count = CourseEnrollment.completed_lessons_count + 1
+        values = {CourseEnrollment.completed_lessons_count: new_count}
+        if total_lessons_count > 0:
+            finished = new_count >= total_lessons_count
+            values[CourseEnrollment.progress] = func.least(100.0, new_count * 100.0 / total_lessons_count)
+            values[CourseEnrollment.completed] = or_(CourseEnrollment.completed.is_(True), finished)
+            values[CourseEnrollment.completion_date] = case(
+                (and_(finished, CourseEnrollment.completion_date.is_(None)), now),
+                else_=CourseEnrollment.completion_date
+            )
+        db.query(CourseEnrollment).filter(CourseEnrollment.id == enrollment_id).update(
+            values, synchronize_session=False
+        )
 
     db.commit()
-    db.refresh(enrollment)
 
-    # Получаем завершенные тесты
-    completed_tests = get_completed_tests(db, enrollment.id)
+    enrollment = db.query(CourseEnrollment).filter(CourseEnrollment.id == enrollment_id).first()
+
+    completed_lesson_ids = [
+        row.lesson_id for row in db.query(CourseLessonProgress.lesson_id).filter(
+            CourseLessonProgress.enrollment_id == enrollment_id,
+            CourseLessonProgress.is_completed.is_(True)
+        )
+    ]
 
-    # Формируем полный ответ с прогрессом
     return {
         "enrollment": enrollment,
         "completed_lessons": completed_lesson_ids,
-        "completed_tests": completed_tests
+        "completed_tests": get_completed_tests(db, enrollment_id),
+        "lesson_id": lesson_id,
+        "newly_completed": newly_completed,
+        "completed_lessons_count": enrollment.completed_lessons_count,
+        "total_lessons": total_lessons_count
     }
 
 
-def submit_test_answers(db: Session, enrollment_id: int, test_id: int, answer_ids: List[int]) -> Dict[str, Any]:
-    """Отправка ответов на тест и проверка результатов"""
-    # Получаем правильные ответы для теста
-    correct_answers = db.query(CourseTestAnswer).filter(
-        and_(
-            CourseTestAnswer.test_id == test_id,
-            CourseTestAnswer.is_correct == True
-        )
-    ).all()
+# Ключи ответов к тестам: test_id -> TestAnswerKey (сбрасывается в update_test/delete_test)
+test_answer_key_cache = LocalCache(maxsize=4096, ttl=600)
 
-    # Получаем выбранные пользователем ответы
-    user_answers = db.query(CourseTestAnswer).filter(
-        and_(
-            CourseTestAnswer.test_id == test_id,
-            CourseTestAnswer.id.in_(answer_ids)
-        )
-    ).all()
+# Тест считается пройденным, если набрано не менее 70%
+TEST_PASS_SCORE = 70
+
+
+class TestAnswerKey(NamedTuple):
+    correct_ids: FrozenSet[int]
+    valid_ids: FrozenSet[int]
+
+
+def get_test_answer_keys(db: Session, test_ids: List[int]) -> Dict[int, TestAnswerKey]:
+    """Ключи ответов для набора тестов; отсутствующие в кэше загружаются одним запросом"""
+    keys = {}
+    missing = []
+    for test_id in set(test_ids):
+        key = test_answer_key_cache.get(test_id)
+        if key is None:
+            missing.append(test_id)
+        else:
+            keys[test_id] = key
+
+    if missing:
+        correct = {test_id: set() for test_id in missing}
+        valid = {test_id: set() for test_id in missing}
+        rows = db.query(CourseTestAnswer.test_id, CourseTestAnswer.id, CourseTestAnswer.is_correct).filter(
+            CourseTestAnswer.test_id.in_(missing)
+        ).all()
+        for test_id, answer_id, is_correct in rows:
+            valid[test_id].add(answer_id)
+            if is_correct:
+                correct[test_id].add(answer_id)
+
+        for test_id in missing:
+            key = TestAnswerKey(frozenset(correct[test_id]), frozenset(valid[test_id]))
+            test_answer_key_cache.set(test_id, key)
+            keys[test_id] = key
+
+    return keys
 
-    # Проверяем ответы
-    correct_answer_ids = {answer.id for answer in correct_answers}
-    user_answer_ids = {answer.id for answer in user_answers}
 
-    correct_count = len(correct_answer_ids.intersection(user_answer_ids))
-    incorrect_count = len(user_answer_ids - correct_answer_ids)
+def invalidate_test_answer_key(test_id: int) -> None:
+    test_answer_key_cache.invalidate(test_id)
+
+
+def grade_test(key: TestAnswerKey, answer_ids: List[int]) -> Dict[str, Any]:
+    """Проверка ответов по ключу без обращения к БД"""
+    user_answer_ids = set(answer_ids) & key.valid_ids
+
+    correct_count = len(key.correct_ids & user_answer_ids)
+    incorrect_count = len(user_answer_ids - key.correct_ids)
 
     # Вычисляем процент правильных ответов
-    total_correct_answers = len(correct_answers)
+    total_correct_answers = len(key.correct_ids)
     if total_correct_answers > 0:
         score = (correct_count / total_correct_answers) * 100
     else:
         score = 0
 
-    # Определяем, пройден ли тест
-    passed = score >= 70  # Считаем тест пройденным, если набрано не менее 70%
+    return {
+        "correct_count": correct_count,
+        "incorrect_count": incorrect_count,
+        "total_questions": total_correct_answers,
+        "score": score,
+        "passed": score >= TEST_PASS_SCORE
+    }
 
-    # Сохраняем результат
-    test_result = db.query(CourseTestResult).filter(
-        and_(
-            CourseTestResult.enrollment_id == enrollment_id,
-            CourseTestResult.test_id == test_id
-        )
-    ).first()
 
-    if test_result:
-        # Обновляем существующий результат
-        test_result.is_passed = passed
-        test_result.score = score
-        test_result.attempt_count += 1
-        test_result.last_attempt_at = datetime.utcnow()
-    else:
-        # Создаем новую запись о результате
-        test_result = CourseTestResult(
-            enrollment_id=enrollment_id,
-            test_id=test_id,
-            is_passed=passed,
-            score=score,
-            attempt_count=1,
-            last_attempt_at=datetime.utcnow()
-        )
-        db.add(test_result)
+def save_test_results(db: Session, enrollment_id: int, graded: Dict[int, Dict[str, Any]]) -> Dict[int, int]:
+    """
+    Атомарный upsert результатов (один INSERT ... ON CONFLICT на все тесты).
+    Возвращает test_id -> attempt_count.
+    """
+    now = datetime.utcnow()
+    upsert = pg_insert(CourseTestResult).values([
+        {
+            "enrollment_id": enrollment_id,
+            "test_id": test_id,
+            "is_passed": result["passed"],
+            "score": result["score"],
+            "attempt_count": 1,
+            "last_attempt_at": now
+        }
+        for test_id, result in graded.items()
+    ])
+    upsert = upsert.on_conflict_do_update(
+        constraint="uq_test_result_enrollment_test",
+        set_={
+            "is_passed": upsert.excluded.is_passed,
+            "score": upsert.excluded.score,
+            "attempt_count": func.coalesce(CourseTestResult.attempt_count, 0) + 1,
+            "last_attempt_at": upsert.excluded.last_attempt_at
+        }
+    ).returning(CourseTestResult.test_id, CourseTestResult.attempt_count)
 
+    return {test_id: attempt_count for test_id, attempt_count in db.execute(upsert)}
+
+
+def submit_test_answers(db: Session, enrollment_id: int, test_id: int, answer_ids: List[int]) -> Dict[str, Any]:
+    """Отправка ответов на тест и проверка результатов"""
+    key = get_test_answer_keys(db, [test_id])[test_id]
+    result = grade_test(key, answer_ids)
+
+    attempts = save_test_results(db, enrollment_id, {test_id: result})
     db.commit()
 
     # Формируем ответ
     return {
         "test_id": test_id,
-        "correct_count": correct_count,
-        "incorrect_count": incorrect_count,
-        "total_questions": total_correct_answers,
-        "score": score,
-        "passed": passed,
-        "attempts": test_result.attempt_count
+        **result,
+        "attempts": attempts[test_id]
     }
 
 
+def submit_quiz_answers(db: Session, enrollment_id: int, submissions: Dict[int, List[int]]) -> List[Dict[str, Any]]:
+    """
+    Проверка целой попытки (несколько тестов) за один вызов:
+    один запрос за недостающими ключами, один upsert результатов, один commit.
+    """
+    keys = get_test_answer_keys(db, list(submissions.keys()))
+    graded = {test_id: grade_test(keys[test_id], answer_ids) for test_id, answer_ids in submissions.items()}
+
+    attempts = save_test_results(db, enrollment_id, graded) if graded else {}
+    db.commit()
+
+    return [
+        {"test_id": test_id, **result, "attempts": attempts.get(test_id, 1)}
+        for test_id, result in graded.items()
+    ]
+
+
+def get_tests_course_ids(db: Session, test_ids: List[int]) -> Dict[int, int]:
+    """test_id -> course_id для существующих тестов (один запрос)"""
+    rows = db.query(CourseTest.id, CourseChapter.course_id).join(
+        CourseLesson, CourseTest.lesson_id == CourseLesson.id
+    ).join(
+        CourseChapter, CourseLesson.chapter_id == CourseChapter.id
+    ).filter(
+        CourseTest.id.in_(test_ids)
+    ).all()
+    return {test_id: course_id for test_id, course_id in rows}
+
+
 # Вспомогательные функции
 
 def get_user(db: Session, user_id: int) -> Optional[User]:
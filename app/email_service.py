@@ -5,15 +5,24 @@ Handles sending email notifications using Resend.
 Used for moderation notifications and other admin alerts.
 """
 
+import asyncio
 import logging
-from typing import List, Optional
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Optional
 import resend
 from config import get_settings
+from app.metrics import track_outbound
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# Resend batch API: up to 100 emails per call
+RESEND_BATCH_SIZE = 100
+
+# Batch calls in flight at once (Resend rate limit is per API key)
+BULK_EMAIL_CONCURRENCY = 4
+
 
 class EmailService:
     """Service for sending email notifications via Resend API"""
@@ -63,22 +72,17 @@ class EmailService:
             return False
 
         try:
-            params = {
-                "from": f"{self.from_name} <{self.from_email}>",
-                "to": [to_email],
-                "subject": subject,
-                "html": body_html,
-            }
-
-            # Add text version if provided
-            if body_text:
-                params["text"] = body_text
+            params = self._email_params(to_email, subject, body_html, body_text)
 
             # Send email via Resend API
             logger.info(f"Sending email to {to_email} via Resend API...")
-            response = resend.Emails.send(params)
+            with track_outbound("resend", "emails.send") as call:
+                response = resend.Emails.send(params)
+                sent = bool(response and isinstance(response, dict) and response.get('id'))
+                if not sent:
+                    call.fail()
 
-            if response and (isinstance(response, dict) and response.get('id')):
+            if sent:
                 logger.info(f"Email sent successfully to {to_email} (ID: {response.get('id')})")
                 return True
             else:
@@ -98,6 +102,72 @@ class EmailService:
             traceback.print_exc()
             return False
 
+    def _email_params(self, to_email: str, subject: str, body_html: str, body_text: Optional[str]) -> dict:
+        params = {
+            "from": f"{self.from_name} <{self.from_email}>",
+            "to": [to_email],
+            "subject": subject,
+            "html": body_html,
+        }
+        if body_text:
+            params["text"] = body_text
+        return params
+
+    def _batch_call(
+        self,
+        batch: List[str],
+        subject: str,
+        body_html: str,
+        body_text: Optional[str]
+    ) -> Optional[Dict[str, Optional[str]]]:
+        """
+        One batch API call; each recipient gets a separate email.
+        Returns recipient -> Resend email ID, or None if the call was rejected as a whole.
+        """
+        try:
+            with track_outbound("resend", "batch.send") as call:
+                response = resend.Batch.send([
+                    self._email_params(to_email, subject, body_html, body_text) for to_email in batch
+                ])
+                data = response.get("data") if isinstance(response, dict) else None
+                if not isinstance(data, list) or len(data) != len(batch):
+                    call.fail()
+            if call.failed:
+                logger.error(f"Unexpected Resend batch response for {len(batch)} recipients: {response}")
+                return None
+
+            # Ответ batch API идет в том же порядке, что и письма
+            return {to_email: (item or {}).get("id") for to_email, item in zip(batch, data)}
+
+        except resend.exceptions.ResendError as e:
+            logger.error(f"Resend batch API error for {len(batch)} recipients: {str(e)}")
+        except Exception as e:
+            logger.error(f"Failed to send email batch of {len(batch)} recipients: {str(e)}")
+        return None
+
+    def _send_batch(
+        self,
+        batch: List[str],
+        subject: str,
+        body_html: str,
+        body_text: Optional[str]
+    ) -> Dict[str, Optional[str]]:
+        """
+        Send a batch; returns recipient -> Resend email ID (None if not sent).
+        Resend rejects the whole call if one address is invalid, so a rejected
+        batch is split in halves and retried until only the bad addresses fail.
+        """
+        result = self._batch_call(batch, subject, body_html, body_text)
+        if result is not None:
+            return result
+        if len(batch) == 1:
+            return {batch[0]: None}
+
+        middle = len(batch) // 2
+        result = self._send_batch(batch[:middle], subject, body_html, body_text)
+        result.update(self._send_batch(batch[middle:], subject, body_html, body_text))
+        return result
+
     def send_bulk_emails(
         self,
         recipients: List[str],
@@ -108,8 +178,10 @@ class EmailService:
         """
         Send the same email to multiple recipients
 
-        Note: Resend allows up to 50 recipients per API call,
-        so we send individually to track success/failure per recipient.
+        Recipients are split into Resend batch API calls (up to 100 emails per
+        call, one email per recipient so addresses are not shared). Batches are
+        sent in parallel, at most BULK_EMAIL_CONCURRENCY at a time. A rejected
+        batch is retried in halves, so only the invalid addresses fail.
 
         Args:
             recipients: List of recipient email addresses
@@ -118,52 +190,75 @@ class EmailService:
             body_text: Plain text body content (optional)
 
         Returns:
-            dict: {"sent": count, "failed": count, "failed_emails": [emails]}
+            dict: {"sent": count, "failed": count, "failed_emails": [emails],
+                   "email_ids": {email: Resend email ID}}
         """
         if not self.api_key:
             logger.error("Resend API key not configured")
-            return {"sent": 0, "failed": len(recipients), "failed_emails": recipients}
+            return {"sent": 0, "failed": len(recipients), "failed_emails": recipients, "email_ids": {}}
 
-        if not recipients:
-            logger.warning("No recipients provided")
-            return {"sent": 0, "failed": 0, "failed_emails": []}
+        if not self.from_email:
+            logger.error("From email not configured. Please set RESEND_FROM_EMAIL in .env")
+            return {"sent": 0, "failed": len(recipients), "failed_emails": recipients, "email_ids": {}}
 
         # Filter out None/empty emails
-        valid_recipients = [email for email in recipients if email and email.strip()]
+        valid_recipients = [email.strip() for email in recipients if email and email.strip()]
 
         if not valid_recipients:
             logger.warning("No valid email addresses in recipients list")
-            return {"sent": 0, "failed": 0, "failed_emails": []}
+            return {"sent": 0, "failed": 0, "failed_emails": [], "email_ids": {}}
 
-        sent_count = 0
-        failed_count = 0
-        failed_emails = []
+        batches = [
+            valid_recipients[i:i + RESEND_BATCH_SIZE]
+            for i in range(0, len(valid_recipients), RESEND_BATCH_SIZE)
+        ]
 
-        logger.info(f"Sending bulk emails to {len(valid_recipients)} recipients...")
+        logger.info(f"Sending bulk emails to {len(valid_recipients)} recipients in {len(batches)} batch(es)...")
 
-        for to_email in valid_recipients:
-            try:
-                success = self.send_email(to_email, subject, body_html, body_text)
+        with ThreadPoolExecutor(max_workers=min(BULK_EMAIL_CONCURRENCY, len(batches))) as pool:
+            batch_results = list(pool.map(
+                lambda batch: self._send_batch(batch, subject, body_html, body_text),
+                batches
+            ))
 
-                if success:
-                    sent_count += 1
+        email_ids = {}
+        failed_emails = []
+        for batch, result in zip(batches, batch_results):
+            for to_email in batch:
+                if result.get(to_email):
+                    email_ids[to_email] = result[to_email]
                 else:
-                    failed_count += 1
                     failed_emails.append(to_email)
 
-            except Exception as e:
-                failed_count += 1
-                failed_emails.append(to_email)
-                logger.error(f"Failed to send email to {to_email}: {str(e)}")
-
-        logger.info(f"Bulk email send complete: {sent_count} sent, {failed_count} failed")
+        sent_count = len(valid_recipients) - len(failed_emails)
+        logger.info(f"Bulk email send complete: {sent_count} sent, {len(failed_emails)} failed")
 
         return {
             "sent": sent_count,
-            "failed": failed_count,
-            "failed_emails": failed_emails
+            "failed": len(failed_emails),
+            "failed_emails": failed_emails,
+            "email_ids": email_ids
         }
 
+    async def send_bulk_emails_async(
+        self,
+        recipients: List[str],
+        subject: str,
+        body_html: str,
+        body_text: Optional[str] = None
+    ) -> dict:
+        """send_bulk_emails for async code: runs in a worker thread, the event loop is not blocked"""
+        return await asyncio.to_thread(self.send_bulk_emails, recipients, subject, body_html, body_text)
+
+    async def send_email_async(
+        self,
+        to_email: str,
+        subject: str,
+        body_html: str,
+        body_text: Optional[str] = None
+    ) -> bool:
+        return await asyncio.to_thread(self.send_email, to_email, subject, body_html, body_text)
+
 
 def create_moderation_notification_email(pending_count: int, crm_url: str) -> tuple:
     """
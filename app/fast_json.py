@@ -0,0 +1,65 @@
+"""
+JSON responses
+
+AppJSONResponse is the application's default response class (orjson instead of
+the standard json module). Two fast paths skip FastAPI's per-request
+serialization pass for large payloads:
+
+- json_response(content): hand-built dicts/lists go straight to orjson, without
+  the recursive jsonable_encoder walk (datetime, date, UUID and Enum are
+  handled by orjson natively, Decimal by _default)
+- ModelJSON(tp).response(rows): rows are validated against the response model
+  once and dumped to bytes by pydantic-core, instead of validate -> Python
+  dicts -> encoder. Already validated model instances are not validated again.
+
+Handlers that return these keep `response_model` on the route for the OpenAPI
+schema; FastAPI does not touch a returned Response.
+"""
+
+from decimal import Decimal
+from typing import Any, Optional
+
+import orjson
+from fastapi.responses import ORJSONResponse
+from pydantic import BaseModel, TypeAdapter
+from starlette.responses import Response
+
+ORJSON_OPTIONS = orjson.OPT_NON_STR_KEYS | orjson.OPT_SERIALIZE_NUMPY
+
+
+def _default(value: Any) -> Any:
+    if isinstance(value, Decimal):
+        return float(value)
+    if isinstance(value, BaseModel):
+        return value.model_dump(mode="json")
+    if isinstance(value, (set, frozenset)):
+        return list(value)
+    raise TypeError(f"Type is not JSON serializable: {type(value).__name__}")
+
+
+class AppJSONResponse(ORJSONResponse):
+    """orjson response that also accepts Decimal, sets and pydantic models"""
+
+    def render(self, content: Any) -> bytes:
+        return orjson.dumps(content, default=_default, option=ORJSON_OPTIONS)
+
+
+def json_response(content: Any, status_code: int = 200, headers: Optional[dict] = None) -> Response:
+    """Serialize hand-built content with orjson, bypassing jsonable_encoder"""
+    return AppJSONResponse(content, status_code=status_code, headers=headers)
+
+
+class ModelJSON:
+    """Serializer for a response model type, built once per route"""
+
+    def __init__(self, tp: Any):
+        self.adapter = TypeAdapter(tp)
+
+    def dump(self, value: Any, validated: bool = False) -> bytes:
+        if not validated:
+            value = self.adapter.validate_python(value, from_attributes=True)
+        # by_alias как у FastAPI по умолчанию (response_model_by_alias=True)
+        return self.adapter.dump_json(value, by_alias=True)
+
+    def response(self, value: Any, validated: bool = False, status_code: int = 200) -> Response:
+        return Response(self.dump(value, validated), status_code=status_code, media_type="application/json")
@@ -0,0 +1,47 @@
+"""
+Fuzzy name search (pg_trgm)
+
+`fuzzy=true` on the search endpoints replaces `ILIKE '%q%'` — a sequential
+scan that finds nothing for a typo — with trigram word similarity:
+`column %> :q` is answered by the GIN trigram indexes from
+migrations/014_add_trigram_indexes.sql, and results are ordered by
+word_similarity. The threshold is set for the current transaction
+(pg_trgm.word_similarity_threshold) rather than compared in WHERE, otherwise
+the index could not be used.
+"""
+
+from typing import Sequence
+
+from sqlalchemy import func, or_, text
+from sqlalchemy.orm import Query, Session
+
+# 0 — совпадает все, 1 — только точное вхождение слова
+DEFAULT_SIMILARITY = 0.4
+MIN_SIMILARITY = 0.1
+
+
+def set_similarity_threshold(db: Session, threshold: float) -> None:
+    """Threshold for `%>` in the current transaction"""
+    db.execute(
+        text("SELECT set_config('pg_trgm.word_similarity_threshold', :threshold, true)"),
+        {"threshold": str(threshold)}
+    )
+
+
+def apply_fuzzy_search(
+        db: Session,
+        query: Query,
+        columns: Sequence,
+        term: str,
+        threshold: float = DEFAULT_SIMILARITY
+) -> Query:
+    """Keep rows where any of `columns` is similar to `term`, best matches first"""
+    set_similarity_threshold(db, threshold)
+
+    term = term.strip()
+    scores = [func.word_similarity(term, column) for column in columns]
+    score = scores[0] if len(scores) == 1 else func.greatest(*scores)
+
+    return query.filter(
+        or_(*(column.op("%>")(term) for column in columns))
+    ).order_by(score.desc())
@@ -0,0 +1,122 @@
+"""
+Volunteer leaderboard snapshots
+
+V-coins earned this week / this month are aggregated from the ledger
+(`vcoin_transactions`) together with the lifetime `total_earned` in one
+query. Each window is kept as a ranked snapshot: pages are list slices and
+"my rank" is a dict lookup. Snapshots are rebuilt at most once per
+LEADERBOARD_TTL seconds per worker.
+"""
+
+import logging
+import time
+from datetime import datetime
+from typing import Any, Dict, List, NamedTuple, Optional
+
+from sqlalchemy import func
+from sqlalchemy.orm import Session
+
+from app.cache import LocalCache
+from app.v_models import VCoinTransaction, Volunteer, VolunteerBalance
+
+logger = logging.getLogger(__name__)
+
+LEADERBOARD_TTL = 300
+
+PERIODS = ("week", "month", "all")
+
+# Что считается заработком за период (списания, возвраты и корректировки не входят)
+EARNING_TYPES = ("earned", "bonus")
+
+
+class LeaderboardSnapshot(NamedTuple):
+    period: str
+    entries: List[Dict[str, Any]]
+    positions: Dict[int, int]
+    built_at: datetime
+
+    def page(self, skip: int = 0, limit: int = 50) -> List[Dict[str, Any]]:
+        return self.entries[skip:skip + limit]
+
+    def entry_for(self, volunteer_id: int) -> Optional[Dict[str, Any]]:
+        position = self.positions.get(volunteer_id)
+        return self.entries[position - 1] if position else None
+
+
+def build_snapshots(db: Session) -> Dict[str, LeaderboardSnapshot]:
+    """All windows from one aggregate query over the ledger"""
+    started = time.perf_counter()
+    week_start = func.date_trunc("week", func.now())
+    month_start = func.date_trunc("month", func.now())
+
+    windows = db.query(
+        VCoinTransaction.volunteer_id.label("volunteer_id"),
+        func.sum(VCoinTransaction.amount).filter(VCoinTransaction.created_at >= week_start).label("week"),
+        func.sum(VCoinTransaction.amount).filter(VCoinTransaction.created_at >= month_start).label("month")
+    ).filter(
+        VCoinTransaction.amount > 0,
+        VCoinTransaction.transaction_type.in_(EARNING_TYPES),
+        VCoinTransaction.created_at >= func.least(week_start, month_start)
+    ).group_by(VCoinTransaction.volunteer_id).subquery()
+
+    rows = db.query(
+        Volunteer.id,
+        Volunteer.full_name,
+        Volunteer.volunteer_status,
+        VolunteerBalance.current_balance,
+        VolunteerBalance.total_earned,
+        VolunteerBalance.events_participated,
+        windows.c.week,
+        windows.c.month
+    ).join(
+        VolunteerBalance,
+        Volunteer.id == VolunteerBalance.volunteer_id
+    ).outerjoin(
+        windows,
+        windows.c.volunteer_id == Volunteer.id
+    ).all()
+
+    built_at = datetime.utcnow()
+    snapshots = {}
+    for period in PERIODS:
+        scored = []
+        for row in rows:
+            if period == "all":
+                earned = row.total_earned or 0
+            else:
+                earned = getattr(row, period) or 0
+                if earned <= 0:
+                    continue
+            scored.append((earned, row))
+
+        scored.sort(key=lambda item: (-item[0], item[1].id))
+
+        entries = []
+        positions = {}
+        for position, (earned, row) in enumerate(scored, 1):
+            entries.append({
+                "position": position,
+                "volunteer_id": row.id,
+                "full_name": row.full_name,
+                "status": row.volunteer_status,
+                "current_balance": row.current_balance,
+                "total_earned": row.total_earned,
+                "period_earned": earned,
+                "events_count": row.events_participated
+            })
+            positions[row.id] = position
+
+        snapshots[period] = LeaderboardSnapshot(period, entries, positions, built_at)
+
+    logger.info(f"Leaderboard snapshots rebuilt for {len(rows)} volunteers in {(time.perf_counter() - started) * 1000:.1f} ms")
+    return snapshots
+
+
+leaderboard_cache = LocalCache(maxsize=1, ttl=LEADERBOARD_TTL)
+
+
+def get_snapshot(db: Session, period: str) -> LeaderboardSnapshot:
+    if period not in PERIODS:
+        period = "all"
+    snapshots = leaderboard_cache.get_or_set("snapshots", lambda: build_snapshots(db))
+    return snapshots[period]
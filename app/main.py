@@ -2,14 +2,16 @@ from contextlib import asynccontextmanager
 from fastapi import FastAPI, Depends, Request, Response
 from fastapi.middleware.cors import CORSMiddleware
 from app.routers import experts, auth,volunteer_auth,volunteer_admin_routes,volunteer_routes, vacancies, admin_auth_router,resume_routes,leisure_routes, events, certificates, projects, news, analytics, telegram_auth, broadcasts, moderation, email_sender, notifications, user_telegram, user_interests
+from app.routers import search
 from app.routers import courses_router
 from app.routers import tech_tasks
-from app.database import engine, Base
-from sqlalchemy import inspect, text
+from config import get_settings
 
-# Импортируем модели проектов для создания таблиц
+# Регистрируем модели до первого обращения к мапперам (таблицы создаются в migrations/migrate.py)
 from app import project_models, news_models, analytics_models, telegram_otp_models, broadcast_models, moderation_notification_models, notification_models, user_telegram_models, user_interest_models, tech_task_models
 
+from app.crud import course_view_counter
+
 # Импортируем планировщик новостей
 from app.news_scheduler import start_scheduler, stop_scheduler
 
@@ -19,37 +21,49 @@ from app.moderation_notification_scheduler import (
     stop_scheduler as stop_moderation_scheduler
 )
 
+# Сверка балансов V-coin с журналом транзакций
+from app.vcoin_reconciliation_scheduler import (
+    start_scheduler as start_vcoin_reconciliation,
+    stop_scheduler as stop_vcoin_reconciliation
+)
+from app.sms_queue import start_worker as start_sms_worker, stop_worker as stop_sms_worker
+from app.services.profession_autocomplete import profession_autocomplete
+from app.otp_maintenance_scheduler import (
+    start_scheduler as start_otp_maintenance,
+    stop_scheduler as stop_otp_maintenance
+)
+
+import asyncio
 import uvicorn
 import os
 import logging
-from fastapi.staticfiles import StaticFiles
+from app.static_files import CachedStaticFiles
+from app.response_cache import ResponseCacheMiddleware
+from app.fast_json import AppJSONResponse
+from app.query_stats import QueryStatsMiddleware
+from app.metrics import capture_threadpool_limiter, setup_metrics
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
-# Создание таблиц в базе данных (включая новые таблицы проектов)
-Base.metadata.create_all(bind=engine)
-
-
-def ensure_course_invite_code_column():
-    inspector = inspect(engine)
-    if not inspector.has_table("courses"):
-        return
+settings = get_settings()
 
-    existing_columns = {column["name"] for column in inspector.get_columns("courses")}
-    if "invite_code" in existing_columns:
-        return
-
-    with engine.begin() as connection:
-        connection.execute(text("ALTER TABLE courses ADD COLUMN invite_code VARCHAR(100)"))
-
-
-ensure_course_invite_code_column()
+# Схема БД больше не создается при импорте: воркер стартует без DDL и рефлексии.
+# Таблицы и SQL-миграции: python migrations/migrate.py migrate
+# Для локальной разработки можно включить SCHEMA_SYNC_ON_STARTUP=true.
 
 # Lifespan context manager for startup/shutdown events
 @asynccontextmanager
 async def lifespan(app: FastAPI):
+    if settings.SCHEMA_SYNC_ON_STARTUP:
+        from migrations.migrate import sync_schema
+        logger.info("Synchronizing database schema (SCHEMA_SYNC_ON_STARTUP)...")
+        sync_schema()
+
+    # Лимит потоков AnyIO привязан к циклу событий — запоминаем его для /metrics
+    capture_threadpool_limiter()
+
     # Startup: Start the news publication scheduler
     logger.info("Starting news publication scheduler...")
     start_scheduler()
@@ -58,6 +72,18 @@ async def lifespan(app: FastAPI):
     logger.info("Starting moderation notification scheduler...")
     start_moderation_scheduler()
 
+    logger.info("Starting V-coin reconciliation scheduler...")
+    start_vcoin_reconciliation()
+
+    logger.info("Starting SMS queue worker...")
+    start_sms_worker()
+
+    logger.info("Starting OTP maintenance scheduler...")
+    start_otp_maintenance()
+
+    # Индекс автодополнения профессий строится до первого запроса
+    await asyncio.to_thread(profession_autocomplete.warm_up)
+
     yield
 
     # Shutdown: Stop the schedulers
@@ -67,14 +93,34 @@ async def lifespan(app: FastAPI):
     logger.info("Stopping moderation notification scheduler...")
     stop_moderation_scheduler()
 
+    stop_vcoin_reconciliation()
+
+    stop_sms_worker()
+
+    stop_otp_maintenance()
+
+    # Записываем накопленные просмотры курсов
+    course_view_counter.flush()
+
 # Инициализация FastAPI приложения
 app = FastAPI(
     title="Experts Platform API",
     description="API для работы с экспертами на платформе",
     version="2.0.0",
-    lifespan=lifespan
+    lifespan=lifespan,
+    default_response_class=AppJSONResponse
 )
 
+# Кеш публичных списков с ETag/304 (app/response_cache.py).
+# Добавляется до CORS, чтобы CORS-заголовки получали и ответы из кеша
+app.add_middleware(ResponseCacheMiddleware)
+
+# Число SQL-запросов и время БД на запрос: Server-Timing, метрики, предупреждения об N+1
+app.add_middleware(QueryStatsMiddleware)
+
+# Prometheus: латентность и запросы в работе по маршрутам, пулы, планировщики, внешние API — GET /metrics
+setup_metrics(app)
+
 # Настройка CORS - ВАЖНО: делается ДО подключения роутеров
 origins = [
     "http://localhost:3000",
@@ -124,10 +170,12 @@ async def options_handler(request: Request, response: Response):
 
 
 # Настройка статических файлов
-app.mount("/static", StaticFiles(directory="static"), name="static")
-app.mount("/uploads", StaticFiles(directory="uploads"), name="uploads")
-app.mount("/certificates", StaticFiles(directory="uploads"), name="certificates")
-app.mount("/courses", StaticFiles(directory="uploads"), name="courses")
+# /uploads, /certificates и /courses раздают одну директорию - один экземпляр на все три
+uploads_files = CachedStaticFiles(directory="uploads")
+app.mount("/static", CachedStaticFiles(directory="static"), name="static")
+app.mount("/uploads", uploads_files, name="uploads")
+app.mount("/certificates", uploads_files, name="certificates")
+app.mount("/courses", uploads_files, name="courses")
 
 # Включение маршрутов - ПОСЛЕ настройки CORS
 app.include_router(experts.router)
@@ -155,6 +203,7 @@ app.include_router(notifications.router)  # User Notifications
 app.include_router(user_telegram.router)  # User Telegram Linking
 app.include_router(user_interests.router)  # User Interest Subscriptions
 app.include_router(tech_tasks.router)  # Tech Tasks
+app.include_router(search.router)  # Unified Search
 
 
 # Корневой маршрут
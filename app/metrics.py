@@ -0,0 +1,162 @@
+"""
+Prometheus metrics
+
+GET /metrics exposes the default registry:
+- http_request_duration_seconds / http_requests_inprogress per route template
+  (prometheus-fastapi-instrumentator)
+- http_request_db_queries / http_request_db_seconds (app/query_stats.py)
+- threadpool_* — AnyIO worker threads used by sync routes and dependencies
+  (in use vs. limit, tasks waiting for a thread)
+- db_pool_* — SQLAlchemy connection pool of the app engine
+- scheduler_run_seconds / scheduler_runs_total — one background job iteration
+- outbound_request_seconds / outbound_requests_total — Telegram, Mobizon, Resend
+
+The app runs as a single uvicorn process, so the default (in-process) registry
+is used. /metrics requires `Authorization: Bearer <METRICS_TOKEN>`; without a
+token the endpoint is not registered at all unless METRICS_PUBLIC=true.
+"""
+
+import logging
+import secrets
+import time
+from contextlib import contextmanager
+from typing import Iterator, Optional
+
+from fastapi import FastAPI, HTTPException, Request, status
+from prometheus_client import CONTENT_TYPE_LATEST, REGISTRY, Counter, Histogram, generate_latest
+from prometheus_client.core import GaugeMetricFamily
+from prometheus_fastapi_instrumentator import Instrumentator
+from starlette.responses import Response
+
+from app.database import engine
+from config import get_settings
+
+logger = logging.getLogger(__name__)
+
+SCHEDULER_RUN_SECONDS = Histogram(
+    "scheduler_run_seconds",
+    "Duration of one background scheduler iteration",
+    ["scheduler"],
+    buckets=(0.01, 0.05, 0.1, 0.5, 1, 2.5, 5, 10, 30, 60, 300),
+)
+SCHEDULER_RUNS = Counter(
+    "scheduler_runs_total",
+    "Background scheduler iterations",
+    ["scheduler", "outcome"],
+)
+
+OUTBOUND_REQUEST_SECONDS = Histogram(
+    "outbound_request_seconds",
+    "Latency of calls to external services",
+    ["service", "operation"],
+    buckets=(0.05, 0.1, 0.25, 0.5, 1, 2, 5, 10, 30),
+)
+OUTBOUND_REQUESTS = Counter(
+    "outbound_requests_total",
+    "Calls to external services",
+    ["service", "operation", "outcome"],
+)
+
+
+@contextmanager
+def track_scheduler_run(scheduler: str) -> Iterator[None]:
+    """Time one scheduler iteration; an exception counts as an error (and is re-raised)"""
+    started = time.perf_counter()
+    outcome = "error"
+    try:
+        yield
+        outcome = "ok"
+    finally:
+        SCHEDULER_RUN_SECONDS.labels(scheduler).observe(time.perf_counter() - started)
+        SCHEDULER_RUNS.labels(scheduler, outcome).inc()
+
+
+class OutboundCall:
+    """Handle for track_outbound(): call fail() when the service answered with an error"""
+
+    def __init__(self):
+        self.failed = False
+
+    def fail(self) -> None:
+        self.failed = True
+
+
+@contextmanager
+def track_outbound(service: str, operation: str) -> Iterator[OutboundCall]:
+    """Time a call to an external service; exceptions and fail() count as errors"""
+    call = OutboundCall()
+    started = time.perf_counter()
+    try:
+        yield call
+    except BaseException:
+        call.fail()
+        raise
+    finally:
+        OUTBOUND_REQUEST_SECONDS.labels(service, operation).observe(time.perf_counter() - started)
+        OUTBOUND_REQUESTS.labels(service, operation, "error" if call.failed else "ok").inc()
+
+
+class RuntimeCollector:
+    """Threadpool and DB pool gauges, read at scrape time"""
+
+    def __init__(self):
+        self.thread_limiter = None
+
+    def collect(self):
+        limiter = self.thread_limiter
+        if limiter is not None:
+            statistics = limiter.statistics()
+            yield GaugeMetricFamily("threadpool_threads_limit", "AnyIO worker thread limit", value=limiter.total_tokens)
+            yield GaugeMetricFamily("threadpool_threads_in_use", "AnyIO worker threads in use", value=statistics.borrowed_tokens)
+            yield GaugeMetricFamily(
+                "threadpool_tasks_waiting", "Sync calls waiting for a free worker thread", value=statistics.tasks_waiting
+            )
+
+        pool = engine.pool
+        if hasattr(pool, "checkedout"):
+            yield GaugeMetricFamily("db_pool_size", "Connection pool size", value=pool.size())
+            yield GaugeMetricFamily("db_pool_checked_out", "Connections in use", value=pool.checkedout())
+            yield GaugeMetricFamily("db_pool_checked_in", "Idle connections in the pool", value=pool.checkedin())
+            yield GaugeMetricFamily("db_pool_overflow", "Connections above pool_size", value=max(pool.overflow(), 0))
+
+
+runtime_collector = RuntimeCollector()
+REGISTRY.register(runtime_collector)
+
+
+def capture_threadpool_limiter() -> None:
+    """
+    Remember the AnyIO default thread limiter.
+    Must be called inside the event loop (app lifespan): the limiter is per loop.
+    """
+    from anyio import to_thread
+
+    runtime_collector.thread_limiter = to_thread.current_default_thread_limiter()
+
+
+def _check_metrics_token(request: Request, token: str) -> None:
+    authorization = request.headers.get("Authorization", "")
+    if not secrets.compare_digest(authorization, f"Bearer {token}"):
+        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid metrics token")
+
+
+def setup_metrics(app: FastAPI) -> None:
+    """Instrument routes and add GET /metrics (only with a token or METRICS_PUBLIC)"""
+    settings = get_settings()
+    token: Optional[str] = settings.METRICS_TOKEN or None
+    if token is None and not settings.METRICS_PUBLIC:
+        logger.info("METRICS_TOKEN is not set: /metrics is disabled")
+        return
+
+    Instrumentator(
+        should_ignore_untemplated=True,
+        should_instrument_requests_inprogress=True,
+        inprogress_labels=True,
+        excluded_handlers=["/metrics"],
+    ).instrument(app)
+
+    @app.get("/metrics", include_in_schema=False)
+    def metrics(request: Request):
+        if token:
+            _check_metrics_token(request, token)
+        return Response(generate_latest(REGISTRY), media_type=CONTENT_TYPE_LATEST)
@@ -1,4 +1,5 @@
-from sqlalchemy import Column, Integer, String, Boolean, ForeignKey, Float,Text
+from sqlalchemy import Column, Integer, BigInteger, String, Boolean, ForeignKey, Float,Text, Index
+from sqlalchemy.dialects.postgresql import TSVECTOR
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql.expression import text
 from sqlalchemy.sql.sqltypes import TIMESTAMP
@@ -230,7 +231,7 @@ class EventParticipant(Base):
     event = relationship("Event", back_populates="participants")
 
 
-from sqlalchemy import Column, Integer, String, Text, Boolean, DateTime, ForeignKey, Float, Table, Enum
+from sqlalchemy import Column, Integer, String, Text, Boolean, DateTime, ForeignKey, Float, Table, Enum, UniqueConstraint
 from sqlalchemy.orm import relationship
 from datetime import datetime
 from app.database import Base
@@ -382,6 +383,8 @@ class CourseEnrollment(Base):
     completed = Column(Boolean, default=False)
     completion_date = Column(DateTime, nullable=True)
     progress = Column(Float, default=0.0)  # Процент выполнения от 0 до 100
+    # Денормализованный счетчик завершенных уроков (обновляется в crud.complete_lesson)
+    completed_lessons_count = Column(Integer, default=0, nullable=False, server_default="0")
 
     # Связи
     # Удаляем проблемную связь с User
@@ -401,6 +404,11 @@ class CourseLessonProgress(Base):
     is_completed = Column(Boolean, default=False)
     last_viewed_at = Column(DateTime, default=datetime.utcnow)
 
+    __table_args__ = (
+        # Цель для INSERT ... ON CONFLICT в crud.complete_lesson
+        UniqueConstraint("enrollment_id", "lesson_id", name="uq_lesson_progress_enrollment_lesson"),
+    )
+
     # Связи
     enrollment = relationship("CourseEnrollment", back_populates="lesson_progress")
     lesson = relationship("CourseLesson")
@@ -422,6 +430,10 @@ class CourseTestResult(Base):
     enrollment = relationship("CourseEnrollment", back_populates="test_results")
     test = relationship("CourseTest")
 
+    __table_args__ = (
+        UniqueConstraint("enrollment_id", "test_id", name="uq_test_result_enrollment_test"),
+    )
+
 
 class Homework(Base):
     __tablename__ = "course_homeworks"
@@ -523,9 +535,74 @@ class OtpCode(Base):
     phone_number = Column(String, nullable=False)
     code = Column(String, nullable=False)
     is_used = Column(Boolean, default=False)
+    # Неверные попытки ввода; после OTP_MAX_FAILED_ATTEMPTS код гасится (app/otp_store.py)
+    failed_attempts = Column(Integer, nullable=False, default=0, server_default=text('0'))
     expires_at = Column(TIMESTAMP(timezone=True), nullable=False)
     created_at = Column(TIMESTAMP(timezone=True), nullable=False, server_default=text('now()'))
 
+    __table_args__ = (
+        # Активные коды ищутся только по телефону; использованные в индекс не попадают
+        Index("idx_otp_codes_active_phone", "phone_number", "id", postgresql_where=text("is_used = false")),
+        Index("idx_otp_codes_expires_at", "expires_at"),
+    )
+
+
+# Окна rate limit для OTP (сохраняются из памяти воркеров, см. app/otp_store.py)
+class OtpRateLimit(Base):
+    __tablename__ = "otp_rate_limits"
+
+    key = Column(String, primary_key=True)
+    hits = Column(JSON, nullable=False)
+    updated_at = Column(TIMESTAMP(timezone=True), nullable=False, server_default=text('now()'))
+
+
+# Исходящие SMS (очередь): запрос только ставит сообщение в очередь,
+# отправку, повторы и статус доставки ведет app/sms_queue.py
+class SmsMessage(Base):
+    __tablename__ = "sms_messages"
+
+    id = Column(Integer, primary_key=True, nullable=False)
+    phone_number = Column(String, nullable=False)
+    message = Column(Text, nullable=False)
+    purpose = Column(String(30), nullable=False, server_default=text("'otp'"))
+    status = Column(String(20), nullable=False, server_default=text("'queued'"))  # queued, sending, sent, failed
+    attempts = Column(Integer, nullable=False, server_default=text('0'))
+    next_attempt_at = Column(TIMESTAMP(timezone=True), nullable=False, server_default=text('now()'))
+    provider_message_id = Column(String, nullable=True)
+    last_error = Column(Text, nullable=True)
+    created_at = Column(TIMESTAMP(timezone=True), nullable=False, server_default=text('now()'))
+    sent_at = Column(TIMESTAMP(timezone=True), nullable=True)
+
+    __table_args__ = (
+        Index(
+            "idx_sms_messages_pending",
+            "next_attempt_at",
+            postgresql_where=text("status IN ('queued', 'sending')")
+        ),
+    )
+
+
+# Общий поисковый индекс (/api/v2/search). Строки пишут триггеры из
+# migrations/013_add_search_documents.sql, приложение только читает
+class SearchDocument(Base):
+    __tablename__ = "search_documents"
+
+    id = Column(BigInteger, primary_key=True)
+    entity_type = Column(String(20), nullable=False)  # event, expert, course, resume, vacancy, ticket, place, project
+    entity_id = Column(Integer, nullable=False)
+    language = Column(String(5), nullable=False)  # kz, ru
+    title = Column(Text, nullable=False)
+    snippet = Column(Text, nullable=True)
+    image_url = Column(Text, nullable=True)
+    published_at = Column(DateTime, nullable=True)
+    document = Column(TSVECTOR, nullable=False)
+    updated_at = Column(TIMESTAMP(timezone=True), nullable=False, server_default=text('now()'))
+
+    __table_args__ = (
+        UniqueConstraint("entity_type", "entity_id", "language", name="uq_search_documents_entity_language"),
+        Index("idx_search_documents_document", "document", postgresql_using="gin"),
+    )
+
 
 # Таблица для сессий/токенов
 class UserSession(Base):
@@ -27,6 +27,7 @@ from app.moderation_notification_config import (
 )
 from config import get_settings
 from app.email_service import email_service, create_moderation_notification_email
+from app.metrics import track_scheduler_run
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
@@ -132,7 +133,7 @@ async def send_email_notifications(pending_count: int, db: Session) -> bool:
         )
 
         # Send emails
-        result = email_service.send_bulk_emails(
+        result = await email_service.send_bulk_emails_async(
             recipients=admin_emails,
             subject=BROADCAST_TITLE,
             body_html=html_body,
@@ -339,11 +340,12 @@ async def scheduler_loop():
 
     while _scheduler_running:
         try:
-            db = get_db_session()
-            try:
-                await check_and_notify_moderation(db)
-            finally:
-                db.close()
+            with track_scheduler_run("moderation_notification"):
+                db = get_db_session()
+                try:
+                    await check_and_notify_moderation(db)
+                finally:
+                    db.close()
         except Exception as e:
             logger.error(f"Moderation notification scheduler error (will retry): {str(e)}")
 
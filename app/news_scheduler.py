@@ -16,6 +16,8 @@ from app.database import SessionLocal
 from app import news_models
 from app.publication_config import SCHEDULER_INTERVAL_MINUTES
 from app.notification_service import notify_interested_users_for_content
+from app.response_cache import bump_content_version
+from app.metrics import track_scheduler_run
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
@@ -86,6 +88,10 @@ def publish_scheduled_news(db: Session) -> int:
             db.rollback()
             logger.error(f"Failed to publish news ID={news.id}: {str(e)}")
 
+    if published_count:
+        # Публикация идет не через HTTP — кеш ленты новостей сбрасываем сами
+        bump_content_version("news")
+
     return published_count
 
 
@@ -121,13 +127,14 @@ async def scheduler_loop():
 
     while _scheduler_running:
         try:
-            db = get_db_session()
-            try:
-                count = publish_scheduled_news(db)
-                if count > 0:
-                    logger.info(f"Scheduler published {count} news article(s)")
-            finally:
-                db.close()
+            with track_scheduler_run("news_publication"):
+                db = get_db_session()
+                try:
+                    count = publish_scheduled_news(db)
+                    if count > 0:
+                        logger.info(f"Scheduler published {count} news article(s)")
+                finally:
+                    db.close()
         except Exception as e:
             # Log error but continue running - might be temporary DB issue or missing migration
             logger.error(f"Scheduler error (will retry): {str(e)}")
@@ -1,13 +1,15 @@
 import logging
-from typing import Optional
+from typing import Any, Dict, List, Optional
 
 import httpx
+from sqlalchemy import insert
 from sqlalchemy.orm import Session
 
 from app.notification_models import UserNotification
 from app.user_interest_models import UserInterest
 from app.user_telegram_models import UserTelegramLink
 from app.database import SessionLocal
+from app.metrics import track_outbound
 
 logger = logging.getLogger(__name__)
 
@@ -43,6 +45,18 @@ def create_notification(
     return notification
 
 
+def create_notifications(db: Session, notifications: List[Dict[str, Any]]) -> int:
+    """
+    Multi-row variant of create_notification: one INSERT for all rows.
+    Each dict takes the same keys as create_notification's arguments.
+    Joins the calling route's transaction (no commit).
+    """
+    if not notifications:
+        return 0
+    db.execute(insert(UserNotification), notifications)
+    return len(notifications)
+
+
 def notify_interested_users_for_content(
     db: Session,  # kept for API compat but a fresh session is created internally
     content_type: str,
@@ -130,8 +144,8 @@ def notify_interested_users_for_content(
                 )
                 if tg_link and tg_link.telegram_chat_id:
                     try:
-                        with httpx.Client(timeout=5.0) as client:
-                            client.post(
+                        with track_outbound("telegram", "sendMessage") as call, httpx.Client(timeout=5.0) as client:
+                            response = client.post(
                                 f"https://api.telegram.org/bot{telegram_bot_token}/sendMessage",
                                 json={
                                     "chat_id": tg_link.telegram_chat_id,
@@ -139,6 +153,8 @@ def notify_interested_users_for_content(
                                     "parse_mode": "HTML",
                                 },
                             )
+                            if response.is_error:
+                                call.fail()
                     except Exception as tg_err:
                         logger.warning(
                             f"Telegram send failed for user {user_id}: {tg_err}"
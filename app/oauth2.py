@@ -2,9 +2,11 @@ from fastapi import Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordBearer, HTTPBearer, HTTPAuthorizationCredentials
 from jose import JWTError, jwt
 from datetime import datetime, timedelta
-from sqlalchemy.orm import Session
-from typing import Optional
+from sqlalchemy import inspect as sa_inspect
+from sqlalchemy.orm import Session, make_transient_to_detached
+from typing import Any, Dict, NamedTuple, Optional
 from fastapi import Depends, Header
+from app.cache import LocalCache
 from app.database import get_db
 from app import models, schemas
 import os
@@ -17,6 +19,82 @@ ACCESS_TOKEN_EXPIRE_MINUTES = 3000000
 # Создание схемы OAuth2
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="api/v2/auth/login")
 
+# Кэш принципалов: строки users/admins по id, чтобы не делать SELECT на каждый запрос.
+# Кэш на воркер; изменения в этом воркере сбрасывают запись явно, в остальных
+# устаревание ограничено PRINCIPAL_CACHE_TTL.
+PRINCIPAL_CACHE_TTL = 60
+PRINCIPAL_CACHE_SIZE = 10000
+
+# Хэш пароля в памяти не держим: при обращении он догружается из БД
+PRINCIPAL_EXCLUDED_COLUMNS = frozenset({"password"})
+
+principal_cache = LocalCache(maxsize=PRINCIPAL_CACHE_SIZE, ttl=PRINCIPAL_CACHE_TTL)
+
+
+class Principal(NamedTuple):
+    """Lightweight identity for routes that need only id and role"""
+    id: int
+    kind: str  # "user" | "admin"
+    role: Optional[str]  # user_type для пользователей, role для администраторов
+
+
+def _principal_key(kind: str, principal_id: Any):
+    try:
+        return kind, int(principal_id)
+    except (TypeError, ValueError):
+        return kind, principal_id
+
+
+def _column_values(obj) -> Dict[str, Any]:
+    return {
+        attr.key: getattr(obj, attr.key)
+        for attr in sa_inspect(obj).mapper.column_attrs
+        if attr.key not in PRINCIPAL_EXCLUDED_COLUMNS
+    }
+
+
+def _cached_values(db: Session, model, kind: str, principal_id: Any) -> Optional[Dict[str, Any]]:
+    key = _principal_key(kind, principal_id)
+    values = principal_cache.get(key)
+    if values is None:
+        obj = db.query(model).filter(model.id == key[1]).first()
+        if obj is None:
+            return None
+        values = _column_values(obj)
+        principal_cache.set(key, values)
+    return values
+
+
+def _load_principal(db: Session, model, kind: str, principal_id: Any):
+    """
+    ORM-объект пользователя/администратора. При попадании в кэш объект
+    собирается из сохраненных значений и присоединяется к сессии без SELECT
+    (merge(load=False)), поэтому роуты могут менять и коммитить его как обычно.
+    """
+    key = _principal_key(kind, principal_id)
+    existing = db.identity_map.get(db.identity_key(model, key[1])) if isinstance(key[1], int) else None
+    if existing is not None:
+        return existing
+
+    values = principal_cache.get(key)
+    if values is None:
+        obj = db.query(model).filter(model.id == key[1]).first()
+        if obj is not None:
+            principal_cache.set(key, _column_values(obj))
+        return obj
+
+    obj = model(**values)
+    make_transient_to_detached(obj)
+    return db.merge(obj, load=False)
+
+
+def invalidate_user_principal(user_id: Any) -> None:
+    principal_cache.invalidate(_principal_key("user", user_id))
+
+
+def invalidate_admin_principal(admin_id: Any) -> None:
+    principal_cache.invalidate(_principal_key("admin", admin_id))
+
 
 def create_access_token(data: dict, expires_delta: Optional[timedelta] = None):
     """
@@ -64,7 +142,7 @@ def get_current_user(token: str = Depends(oauth2_scheme), db: Session = Depends(
     )
 
     token_data = verify_token(token, credentials_exception)
-    user = db.query(models.User).filter(models.User.id == token_data.id).first()
+    user = _load_principal(db, models.User, "user", token_data.id)
 
     if user is None:
         raise credentials_exception
@@ -72,6 +150,26 @@ def get_current_user(token: str = Depends(oauth2_scheme), db: Session = Depends(
     return user
 
 
+def get_current_user_principal(token: str = Depends(oauth2_scheme), db: Session = Depends(get_db)) -> Principal:
+    """
+    Текущий пользователь как Principal (id, user_type) — без ORM-объекта;
+    при попадании в кэш к БД не обращается
+    """
+    credentials_exception = HTTPException(
+        status_code=status.HTTP_401_UNAUTHORIZED,
+        detail="Невозможно проверить учетные данные",
+        headers={"WWW-Authenticate": "Bearer"},
+    )
+
+    token_data = verify_token(token, credentials_exception)
+    values = _cached_values(db, models.User, "user", token_data.id)
+
+    if values is None:
+        raise credentials_exception
+
+    return Principal(id=values["id"], kind="user", role=values["user_type"])
+
+
 def optional_get_current_user(
     authorization: Optional[str] = Header(None),
     db: Session = Depends(get_db)
@@ -96,7 +194,7 @@ def optional_get_current_user(
         if id is None:
             return None
 
-        user = db.query(models.User).filter(models.User.id == id).first()
+        user = _load_principal(db, models.User, "user", id)
         return user
 
     except (JWTError, Exception):
@@ -144,13 +242,7 @@ from datetime import datetime, timedelta
 security = HTTPBearer()
 
 
-def get_current_admin(
-        credentials: HTTPAuthorizationCredentials = Depends(security),
-        db: Session = Depends(get_db)
-):
-    """
-    Получение текущего администратора из токена
-    """
+def _admin_id_from_token(credentials: HTTPAuthorizationCredentials) -> int:
     try:
         # Декодируем токен (используйте ваши настройки JWT)
         payload = jwt.decode(
@@ -168,16 +260,7 @@ def get_current_admin(
                 detail="Недействительный токен"
             )
 
-        # Ищем администратора в базе данных
-        admin = db.query(models.Admin).filter(models.Admin.id == int(admin_id)).first()
-
-        if admin is None:
-            raise HTTPException(
-                status_code=status.HTTP_401_UNAUTHORIZED,
-                detail="Администратор не найден"
-            )
-
-        return admin
+        return int(admin_id)
 
     except jwt.ExpiredSignatureError:
         raise HTTPException(
@@ -191,6 +274,43 @@ def get_current_admin(
         )
 
 
+def get_current_admin(
+        credentials: HTTPAuthorizationCredentials = Depends(security),
+        db: Session = Depends(get_db)
+):
+    """
+    Получение текущего администратора из токена
+    """
+    admin = _load_principal(db, models.Admin, "admin", _admin_id_from_token(credentials))
+
+    if admin is None:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Администратор не найден"
+        )
+
+    return admin
+
+
+def get_current_admin_principal(
+        credentials: HTTPAuthorizationCredentials = Depends(security),
+        db: Session = Depends(get_db)
+) -> Principal:
+    """
+    Текущий администратор как Principal (id, role) — для проверок, которым
+    нужна только роль
+    """
+    values = _cached_values(db, models.Admin, "admin", _admin_id_from_token(credentials))
+
+    if values is None:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Администратор не найден"
+        )
+
+    return Principal(id=values["id"], kind="admin", role=values["role"])
+
+
 def create_admin_access_token(data: dict, expires_delta: timedelta = None):
     """
     Создание токена доступа для администратора
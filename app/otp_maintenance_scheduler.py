@@ -0,0 +1,103 @@
+"""
+OTP maintenance scheduler.
+
+Periodically deletes expired OTP codes in batches and syncs the in-memory
+OTP rate-limit windows with the otp_rate_limits table (see app/otp_store.py).
+"""
+
+import asyncio
+import logging
+from typing import Optional
+
+from app.database import SessionLocal
+from app.otp_store import load_rate_limits, persist_rate_limits, sweep_expired_otps
+from config import get_settings
+
+logger = logging.getLogger(__name__)
+
+_scheduler_running = False
+_scheduler_task: Optional[asyncio.Task] = None
+
+
+def sync_rate_limits() -> int:
+    """Merge other workers' windows into memory, then persist our changes"""
+    db = SessionLocal()
+    try:
+        load_rate_limits(db)
+        return persist_rate_limits(db)
+    except Exception:
+        db.rollback()
+        raise
+    finally:
+        db.close()
+
+
+def run_sweep() -> int:
+    db = SessionLocal()
+    try:
+        return sweep_expired_otps(db)
+    except Exception:
+        db.rollback()
+        raise
+    finally:
+        db.close()
+
+
+async def scheduler_loop(interval_minutes: int):
+    logger.info(f"OTP maintenance scheduler started (interval: {interval_minutes} minute(s))")
+
+    # Окна лимитов восстанавливаем сразу, чтобы рестарт не обнулял их
+    try:
+        await asyncio.to_thread(sync_rate_limits)
+    except Exception as e:
+        logger.warning(f"Could not load OTP rate limits: {str(e)}")
+
+    while _scheduler_running:
+        await asyncio.sleep(interval_minutes * 60)
+        try:
+            # Запросы к БД синхронные — выполняем в потоке
+            await asyncio.to_thread(sync_rate_limits)
+            deleted = await asyncio.to_thread(run_sweep)
+            if deleted > 0:
+                logger.info(f"Deleted {deleted} expired OTP code(s)")
+        except Exception as e:
+            logger.error(f"OTP maintenance error (will retry): {str(e)}")
+
+
+def start_scheduler():
+    """
+    Start the OTP maintenance job.
+    Should be called when the application starts.
+    """
+    global _scheduler_running, _scheduler_task
+
+    interval = get_settings().OTP_MAINTENANCE_INTERVAL_MINUTES
+    if interval <= 0:
+        logger.info("OTP maintenance scheduler disabled")
+        return
+
+    if _scheduler_running:
+        logger.warning("OTP maintenance scheduler is already running")
+        return
+
+    _scheduler_running = True
+    try:
+        _scheduler_task = asyncio.create_task(scheduler_loop(interval))
+    except Exception as e:
+        logger.error(f"Failed to create OTP maintenance task: {str(e)}")
+        _scheduler_running = False
+
+
+def stop_scheduler():
+    """
+    Stop the OTP maintenance job.
+    Should be called when the application shuts down.
+    """
+    global _scheduler_running, _scheduler_task
+
+    _scheduler_running = False
+
+    if _scheduler_task:
+        _scheduler_task.cancel()
+        _scheduler_task = None
+        logger.info("OTP maintenance scheduler stopped")
@@ -0,0 +1,250 @@
+"""
+OTP store
+
+One place for issuing, looking up and expiring OTP codes:
+- active codes are looked up through the partial index on (phone_number, id)
+  WHERE is_used = false; issuing a code retires the previous ones through the
+  same index
+- a code is retired after OTP_MAX_FAILED_ATTEMPTS wrong attempts, and wrong
+  codes are limited per client IP, so guessing is capped without letting
+  anyone lock a phone out of login
+- sending is rate limited per phone and per IP with in-memory sliding windows
+  (limits in Settings; the IP is the client address uvicorn resolves from
+  X-Forwarded-For of trusted proxies, see FORWARDED_ALLOW_IPS in the Dockerfile);
+  windows are persisted periodically (otp_rate_limits) and loaded at startup,
+  so a restart does not reset them
+- expired codes are deleted in batches by app/otp_maintenance_scheduler.py
+"""
+
+import logging
+import threading
+import time
+from collections import deque
+from datetime import datetime, timedelta
+from typing import Deque, Dict, List, Optional, Set
+
+from fastapi import HTTPException, status
+from sqlalchemy import text
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.orm import Session
+
+from app import models
+from config import get_settings
+
+logger = logging.getLogger(__name__)
+
+OTP_TTL = timedelta(minutes=5)
+
+SWEEP_BATCH_SIZE = 5000
+
+
+class SlidingWindowLimiter:
+    """At most `limit` hits per key within the last `window` seconds (limit 0: no limit)"""
+
+    def __init__(self, name: str, limit: int, window: int):
+        self.name = name
+        self.limit = limit
+        self.window = window
+        self._hits: Dict[str, Deque[float]] = {}
+        self._dirty: Set[str] = set()
+        self._lock = threading.Lock()
+
+    def _trim(self, hits: Deque[float], now: float) -> None:
+        cutoff = now - self.window
+        while hits and hits[0] <= cutoff:
+            hits.popleft()
+
+    def retry_after(self, key: str, now: Optional[float] = None) -> int:
+        """Seconds until the next hit is allowed (0 if allowed now)"""
+        if not self.limit:
+            return 0
+        now = now if now is not None else time.time()
+        with self._lock:
+            hits = self._hits.get(key)
+            if not hits:
+                return 0
+            self._trim(hits, now)
+            if len(hits) < self.limit:
+                return 0
+            return max(1, int(hits[0] + self.window - now) + 1)
+
+    def record(self, key: str, now: Optional[float] = None) -> None:
+        if not self.limit:
+            return
+        now = now if now is not None else time.time()
+        with self._lock:
+            self._hits.setdefault(key, deque()).append(now)
+            self._dirty.add(key)
+
+    def prune(self, now: Optional[float] = None) -> None:
+        """Drop keys whose window is empty"""
+        now = now if now is not None else time.time()
+        with self._lock:
+            for key in list(self._hits):
+                self._trim(self._hits[key], now)
+                if not self._hits[key]:
+                    del self._hits[key]
+
+    def take_dirty(self) -> Dict[str, List[float]]:
+        """Windows changed since the last call (for persistence)"""
+        with self._lock:
+            changed = {key: list(self._hits.get(key, ())) for key in self._dirty}
+            self._dirty.clear()
+        return changed
+
+    def load(self, key: str, hits: List[float], now: Optional[float] = None) -> None:
+        now = now if now is not None else time.time()
+        with self._lock:
+            merged = deque(sorted(set(hits) | set(self._hits.get(key, ()))))
+            self._trim(merged, now)
+            if merged:
+                self._hits[key] = merged
+
+
+_settings = get_settings()
+
+# Лимиты на отправку: SMS стоят денег (настраиваются в Settings)
+phone_send_limiter = SlidingWindowLimiter(
+    "phone", limit=_settings.OTP_PHONE_SEND_LIMIT, window=_settings.OTP_PHONE_SEND_WINDOW_SECONDS
+)
+ip_send_limiter = SlidingWindowLimiter(
+    "ip", limit=_settings.OTP_IP_SEND_LIMIT, window=_settings.OTP_IP_SEND_WINDOW_SECONDS
+)
+# Подбор кода: неверные коды с одного IP (попытки на код ограничены в record_failed_otp)
+ip_verify_limiter = SlidingWindowLimiter(
+    "verify_ip", limit=_settings.OTP_IP_VERIFY_LIMIT, window=_settings.OTP_IP_VERIFY_WINDOW_SECONDS
+)
+
+LIMITERS = {limiter.name: limiter for limiter in (phone_send_limiter, ip_send_limiter, ip_verify_limiter)}
+
+
+def _too_many(detail: str, retry_after: int) -> HTTPException:
+    return HTTPException(
+        status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+        detail=f"{detail}. Повторите через {retry_after} сек.",
+        headers={"Retry-After": str(retry_after)}
+    )
+
+
+def check_send_rate_limit(phone_number: str, ip_address: Optional[str]) -> None:
+    """Raise 429 if this phone or IP asked for too many codes; otherwise count the request"""
+    retry_after = phone_send_limiter.retry_after(phone_number)
+    if ip_address:
+        retry_after = max(retry_after, ip_send_limiter.retry_after(ip_address))
+    if retry_after:
+        logger.warning(f"OTP send rate limit hit for {phone_number[:4]}**** / {ip_address}")
+        raise _too_many("Слишком много запросов кода", retry_after)
+
+    phone_send_limiter.record(phone_number)
+    if ip_address:
+        ip_send_limiter.record(ip_address)
+
+
+def check_verify_rate_limit(ip_address: Optional[str]) -> None:
+    """Raise 429 if this IP entered too many wrong codes (only failures are counted)"""
+    if not ip_address:
+        return
+    retry_after = ip_verify_limiter.retry_after(ip_address)
+    if retry_after:
+        raise _too_many("Слишком много попыток ввода кода", retry_after)
+
+
+def record_failed_otp(db: Session, otp: models.OtpCode, ip_address: Optional[str]) -> None:
+    """
+    Count a wrong code against the issued code and the client IP (commits).
+    The code is retired after OTP_MAX_FAILED_ATTEMPTS wrong attempts; the
+    user then requests a new one.
+    """
+    max_attempts = get_settings().OTP_MAX_FAILED_ATTEMPTS
+    attempts = models.OtpCode.failed_attempts + 1
+    values = {models.OtpCode.failed_attempts: attempts}
+    if max_attempts:
+        values[models.OtpCode.is_used] = attempts >= max_attempts
+    db.query(models.OtpCode).filter(models.OtpCode.id == otp.id).update(values, synchronize_session=False)
+    db.commit()
+
+    if ip_address:
+        ip_verify_limiter.record(ip_address)
+
+
+def issue_otp(db: Session, phone_number: str, code: str) -> models.OtpCode:
+    """Retire the phone's active codes and add a new one (caller commits)"""
+    db.query(models.OtpCode).filter(
+        models.OtpCode.phone_number == phone_number,
+        models.OtpCode.is_used == False
+    ).update({"is_used": True}, synchronize_session=False)
+
+    otp = models.OtpCode(
+        phone_number=phone_number,
+        code=code.strip(),
+        expires_at=datetime.utcnow() + OTP_TTL
+    )
+    db.add(otp)
+    return otp
+
+
+def find_active_otp(db: Session, phone_number: str) -> Optional[models.OtpCode]:
+    """Latest unused, unexpired code for the phone (partial index lookup)"""
+    return db.query(models.OtpCode).filter(
+        models.OtpCode.phone_number == phone_number,
+        models.OtpCode.is_used == False,
+        models.OtpCode.expires_at > datetime.utcnow()
+    ).order_by(models.OtpCode.id.desc()).first()
+
+
+def sweep_expired_otps(db: Session, batch_size: int = SWEEP_BATCH_SIZE) -> int:
+    """Delete expired codes in batches (short transactions, no long locks)"""
+    deleted = 0
+    while True:
+        result = db.execute(text("""
+            DELETE FROM otp_codes
+            WHERE id IN (
+                SELECT id FROM otp_codes
+                WHERE expires_at < now()
+                LIMIT :batch
+            )
+        """), {"batch": batch_size})
+        db.commit()
+        deleted += result.rowcount
+        if result.rowcount < batch_size:
+            return deleted
+
+
+def persist_rate_limits(db: Session) -> int:
+    """Upsert the windows changed since the last call; drop stale rows"""
+    rows = []
+    for name, limiter in LIMITERS.items():
+        limiter.prune()
+        for key, hits in limiter.take_dirty().items():
+            rows.append({"key": f"{name}:{key}", "hits": hits, "updated_at": datetime.utcnow()})
+
+    if rows:
+        stmt = pg_insert(models.OtpRateLimit).values(rows)
+        db.execute(stmt.on_conflict_do_update(
+            index_elements=[models.OtpRateLimit.key],
+            set_={"hits": stmt.excluded.hits, "updated_at": stmt.excluded.updated_at}
+        ))
+
+    max_window = max(limiter.window for limiter in LIMITERS.values())
+    db.query(models.OtpRateLimit).filter(
+        models.OtpRateLimit.updated_at < datetime.utcnow() - timedelta(seconds=max_window)
+    ).delete(synchronize_session=False)
+    db.commit()
+    return len(rows)
+
+
+def load_rate_limits(db: Session) -> int:
+    """Merge windows persisted by other workers (and before a restart) into memory"""
+    max_window = max(limiter.window for limiter in LIMITERS.values())
+    rows = db.query(models.OtpRateLimit.key, models.OtpRateLimit.hits).filter(
+        models.OtpRateLimit.updated_at >= datetime.utcnow() - timedelta(seconds=max_window)
+    ).all()
+
+    loaded = 0
+    for key, hits in rows:
+        name, _, limiter_key = key.partition(":")
+        limiter = LIMITERS.get(name)
+        if limiter and hits:
+            limiter.load(limiter_key, hits)
+            loaded += 1
+    return loaded
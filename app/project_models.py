@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, Text, Boolean, DateTime, Date, ForeignKey, Enum
+from sqlalchemy import Column, Integer, String, Text, Boolean, DateTime, Date, ForeignKey, Enum, Index
 from sqlalchemy.sql import func
 from sqlalchemy.dialects.postgresql import JSONB
 from datetime import datetime
@@ -190,9 +190,10 @@ class ProjectFormSubmission(Base):
     
     # Timestamps
     submitted_at = Column(DateTime, default=func.now(), nullable=False, index=True)
-    
-    class Config:
-        indexes = [
-            {'fields': ['project_id', 'status']},
-            {'fields': ['project_id', 'submitted_at']},
-        ]
\ No newline at end of file
+
+    __table_args__ = (
+        Index('idx_form_submissions_project_status', 'project_id', 'status'),
+        Index('idx_form_submissions_project_submitted', 'project_id', 'submitted_at'),
+        # GIN index for key-existence lookups (responses ? field_id) in form analytics
+        Index('idx_form_submissions_responses_gin', 'responses', postgresql_using='gin'),
+    )
\ No newline at end of file
@@ -0,0 +1,203 @@
+"""
+Per-request SQL statistics
+
+SQLAlchemy cursor events on the application engine count the statements of
+the current request and their total time. QueryStatsMiddleware:
+- adds `Server-Timing: db;dur=<ms>;desc="<n> queries"` to every response
+- records the counts and time in Prometheus histograms per route template
+- logs a warning when one request runs the same statement (same SQL text,
+  i.e. same shape with different parameters) more than
+  QUERY_REPEAT_WARNING_THRESHOLD times — the N+1 pattern
+
+The request's stats object is kept in a ContextVar; Starlette copies the
+context into the threadpool, so sync routes and dependencies are counted too.
+
+count_queries() / assert_query_budget() record every statement on the engine
+while active, for query budgets in tests and benchmarks:
+
+    with assert_query_budget(3):
+        client.get("/api/v2/vacancies/")
+"""
+
+import logging
+import threading
+import time
+from collections import Counter
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Iterator, List, Optional, Set
+
+from prometheus_client import Histogram
+from sqlalchemy import event
+from starlette.routing import Match
+
+from app.database import engine
+from config import get_settings
+
+logger = logging.getLogger(__name__)
+
+DB_QUERIES_PER_REQUEST = Histogram(
+    "http_request_db_queries",
+    "SQL statements executed per HTTP request",
+    ["method", "route"],
+    buckets=(0, 1, 2, 3, 5, 10, 20, 50, 100, 250),
+)
+DB_SECONDS_PER_REQUEST = Histogram(
+    "http_request_db_seconds",
+    "Total SQL execution time per HTTP request",
+    ["method", "route"],
+    buckets=(0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5),
+)
+
+
+class QueryStats:
+    """Statements of one request (or of one count_queries() block)"""
+
+    def __init__(self):
+        self.count = 0
+        self.duration = 0.0
+        self.statements: Counter = Counter()
+        self._lock = threading.Lock()
+
+    def record(self, statement: str, duration: float) -> None:
+        with self._lock:
+            self.count += 1
+            self.duration += duration
+            self.statements[statement] += 1
+
+    def most_repeated(self):
+        """(statement, times) of the most repeated statement, or None"""
+        with self._lock:
+            common = self.statements.most_common(1)
+        return common[0] if common else None
+
+
+_current: ContextVar[Optional[QueryStats]] = ContextVar("query_stats", default=None)
+_recorders: Set[QueryStats] = set()
+_recorders_lock = threading.Lock()
+
+
+@event.listens_for(engine, "before_cursor_execute")
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault("query_started", []).append(time.perf_counter())
+
+
+@event.listens_for(engine, "after_cursor_execute")
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    started = conn.info["query_started"].pop()
+    duration = time.perf_counter() - started
+
+    stats = _current.get()
+    if stats is not None:
+        stats.record(statement, duration)
+    if _recorders:
+        with _recorders_lock:
+            recorders = list(_recorders)
+        for recorder in recorders:
+            recorder.record(statement, duration)
+
+
+@event.listens_for(engine, "handle_error")
+def _handle_error(exception_context):
+    # Запрос упал — after_cursor_execute не будет, снимаем отметку времени
+    connection = exception_context.connection
+    if connection is not None and connection.info.get("query_started"):
+        connection.info["query_started"].pop()
+
+
+@contextmanager
+def count_queries() -> Iterator[QueryStats]:
+    """Record every statement executed on the engine (any thread) inside the block"""
+    stats = QueryStats()
+    with _recorders_lock:
+        _recorders.add(stats)
+    try:
+        yield stats
+    finally:
+        with _recorders_lock:
+            _recorders.discard(stats)
+
+
+@contextmanager
+def assert_query_budget(max_queries: int) -> Iterator[QueryStats]:
+    """Fail with the executed statements if the block runs more than `max_queries`"""
+    with count_queries() as stats:
+        yield stats
+    if stats.count > max_queries:
+        statements: List[str] = [
+            f"{times}x {statement}" for statement, times in stats.statements.most_common()
+        ]
+        raise AssertionError(
+            f"Query budget exceeded: {stats.count} > {max_queries}\n" + "\n".join(statements)
+        )
+
+
+def _route_template(scope) -> str:
+    """
+    Route template of the request. Responses served before routing (response
+    cache hits) have no scope["route"], so the path is matched against the
+    app's routes, as prometheus-fastapi-instrumentator does.
+    """
+    route = scope.get("route")
+    if route is not None:
+        return getattr(route, "path", None) or "unmatched"
+
+    app = scope.get("app")
+    partial = None
+    for candidate in getattr(app, "routes", ()):
+        match, _ = candidate.matches(scope)
+        if match == Match.FULL:
+            return getattr(candidate, "path", None) or "unmatched"
+        if match == Match.PARTIAL and partial is None:
+            partial = candidate
+    return getattr(partial, "path", None) or "unmatched"
+
+
+class QueryStatsMiddleware:
+    """ASGI middleware: per-request SQL counters (see module docstring)"""
+
+    def __init__(self, app, repeat_threshold: Optional[int] = None):
+        self.app = app
+        self.repeat_threshold = (
+            repeat_threshold if repeat_threshold is not None
+            else get_settings().QUERY_REPEAT_WARNING_THRESHOLD
+        )
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        stats = QueryStats()
+        token = _current.set(stats)
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start":
+                # Фоновые задачи выполняются после ответа и в заголовок не попадают
+                server_timing = f'db;dur={stats.duration * 1000:.1f};desc="{stats.count} queries"'
+                message["headers"] = list(message.get("headers", [])) + [
+                    (b"server-timing", server_timing.encode())
+                ]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            _current.reset(token)
+            self._report(scope, stats)
+
+    def _report(self, scope, stats: QueryStats) -> None:
+        method, route = scope["method"], _route_template(scope)
+        DB_QUERIES_PER_REQUEST.labels(method, route).observe(stats.count)
+        DB_SECONDS_PER_REQUEST.labels(method, route).observe(stats.duration)
+
+        if not self.repeat_threshold:
+            return
+        repeated = stats.most_repeated()
+        if repeated and repeated[1] > self.repeat_threshold:
+            statement, times = repeated
+            logger.warning(
+                f"Possible N+1 on {method} {route}: same statement executed {times} times "
+                f"({stats.count} queries, {stats.duration * 1000:.1f} ms total): "
+                f"{' '.join(statement.split())[:300]}"
+            )
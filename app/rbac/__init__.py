@@ -3,6 +3,8 @@ from .permissions import (
     Module,
     Permission,
     ROLE_PERMISSIONS,
+    PERMISSION_TABLE,
+    role_name,
     has_permission,
     get_accessible_modules,
     is_read_only
@@ -28,6 +30,8 @@ __all__ = [
     "Module",
     "Permission",
     "ROLE_PERMISSIONS",
+    "PERMISSION_TABLE",
+    "role_name",
     "has_permission",
     "get_accessible_modules",
     "is_read_only",
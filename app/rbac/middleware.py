@@ -1,11 +1,20 @@
 from fastapi import Depends, HTTPException, status
+from functools import lru_cache
 from typing import List, Optional
 from app.oauth2 import get_current_admin
 from app import models
-from .permissions import has_permission, is_read_only, Module, Permission
+from .permissions import (
+    has_permission, role_name, Module, Permission,
+    PERMISSION_BITS, PERMISSION_TABLE, WRITE_MASK
+)
 from .roles import Role
 
+# Фабрики ниже кэшируются: одинаковые требования получают один и тот же
+# callable, поэтому FastAPI выполняет проверку один раз за запрос, а маски
+# и множества ролей вычисляются один раз при объявлении роута.
 
+
+@lru_cache(maxsize=None)
 def require_role(*allowed_roles: str):
     """
     Decorator to require specific roles
@@ -15,19 +24,21 @@ def require_role(*allowed_roles: str):
         def get_volunteers(admin = Depends(require_role(Role.VOLUNTEER_ADMIN, Role.SUPER_ADMIN))):
             ...
     """
-    def role_checker(current_admin: models.Admin = Depends(get_current_admin)):
-        admin_role = current_admin.role.value if hasattr(current_admin.role, 'value') else current_admin.role
+    allowed = frozenset(role_name(role) for role in allowed_roles)
+    detail = f"Доступ запрещен. Требуется одна из ролей: {', '.join(role_name(role) for role in allowed_roles)}"
 
-        if admin_role not in allowed_roles:
+    def role_checker(current_admin: models.Admin = Depends(get_current_admin)):
+        if role_name(current_admin.role) not in allowed:
             raise HTTPException(
                 status_code=status.HTTP_403_FORBIDDEN,
-                detail=f"Доступ запрещен. Требуется одна из ролей: {', '.join(allowed_roles)}"
+                detail=detail
             )
         return current_admin
 
     return role_checker
 
 
+@lru_cache(maxsize=None)
 def require_permission(module: str, permission: str):
     """
     Decorator to require specific permission for a module
@@ -39,19 +50,21 @@ def require_permission(module: str, permission: str):
         ):
             ...
     """
-    def permission_checker(current_admin: models.Admin = Depends(get_current_admin)):
-        admin_role = current_admin.role.value if hasattr(current_admin.role, 'value') else current_admin.role
+    required = PERMISSION_BITS.get(permission, 0)
+    detail = f"У вас нет прав для выполнения действия '{permission}' в модуле '{module}'"
 
-        if not has_permission(admin_role, module, permission):
+    def permission_checker(current_admin: models.Admin = Depends(get_current_admin)):
+        if not PERMISSION_TABLE.get((role_name(current_admin.role), module), 0) & required:
             raise HTTPException(
                 status_code=status.HTTP_403_FORBIDDEN,
-                detail=f"У вас нет прав для выполнения действия '{permission}' в модуле '{module}'"
+                detail=detail
             )
         return current_admin
 
     return permission_checker
 
 
+@lru_cache(maxsize=None)
 def require_module_access(module: str, allow_read_only: bool = False):
     """
     Decorator to require access to a specific module
@@ -65,18 +78,20 @@ def require_module_access(module: str, allow_read_only: bool = False):
         def get_volunteers(admin = Depends(require_module_access(Module.VOLUNTEERS, allow_read_only=True))):
             ...
     """
+    read_bit = PERMISSION_BITS[Permission.READ]
+
     def module_checker(current_admin: models.Admin = Depends(get_current_admin)):
-        admin_role = current_admin.role.value if hasattr(current_admin.role, 'value') else current_admin.role
+        mask = PERMISSION_TABLE.get((role_name(current_admin.role), module), 0)
 
         # Check if has at least read permission
-        if not has_permission(admin_role, module, Permission.READ):
+        if not mask & read_bit:
             raise HTTPException(
                 status_code=status.HTTP_403_FORBIDDEN,
                 detail=f"У вас нет доступа к модулю '{module}'"
             )
 
         # If we don't allow read-only and user is read-only, block
-        if not allow_read_only and is_read_only(admin_role, module):
+        if not allow_read_only and not mask & WRITE_MASK:
             raise HTTPException(
                 status_code=status.HTTP_403_FORBIDDEN,
                 detail=f"У вас только права на просмотр модуля '{module}'"
@@ -87,6 +102,7 @@ def require_module_access(module: str, allow_read_only: bool = False):
     return module_checker
 
 
+@lru_cache(maxsize=None)
 def block_read_only():
     """
     Decorator to block read-only users (specifically for Government role)
@@ -97,9 +113,7 @@ def block_read_only():
             ...
     """
     def read_only_blocker(current_admin: models.Admin = Depends(get_current_admin)):
-        admin_role = current_admin.role.value if hasattr(current_admin.role, 'value') else current_admin.role
-
-        if admin_role == Role.GOVERNMENT:
+        if role_name(current_admin.role) == Role.GOVERNMENT:
             raise HTTPException(
                 status_code=status.HTTP_403_FORBIDDEN,
                 detail="У вас только права на просмотр. Редактирование запрещено."
@@ -132,8 +146,10 @@ def check_admin_permission(admin: models.Admin, module: str, permission: str) ->
     Returns:
         bool: True if admin has permission
     """
-    admin_role = admin.role.value if hasattr(admin.role, 'value') else admin.role
-    return has_permission(admin_role, module, permission)
+    return has_permission(role_name(admin.role), module, permission)
+
+
+OWNER_FILTERED_ROLES = frozenset({Role.MSB.value, Role.NPO.value})
 
 
 def should_filter_by_owner(admin: models.Admin) -> bool:
@@ -146,8 +162,7 @@ def should_filter_by_owner(admin: models.Admin) -> bool:
     Returns:
         bool: True if content should be filtered by admin_id
     """
-    admin_role = admin.role.value if hasattr(admin.role, 'value') else admin.role
-    return admin_role in [Role.MSB, Role.NPO]
+    return role_name(admin.role) in OWNER_FILTERED_ROLES
 
 
 def apply_owner_filter(query, model_class, admin: models.Admin):
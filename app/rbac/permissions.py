@@ -1,4 +1,5 @@
-from typing import Dict, List, Set
+from enum import Enum
+from typing import Dict, List, Set, Tuple
 from .roles import Role
 
 # Module names
@@ -25,6 +26,17 @@ class Permission:
     DELETE = "delete"
 
 
+# Bit of each permission in the compiled table
+PERMISSION_BITS: Dict[str, int] = {
+    Permission.READ: 1,
+    Permission.CREATE: 2,
+    Permission.UPDATE: 4,
+    Permission.DELETE: 8,
+}
+
+WRITE_MASK = PERMISSION_BITS[Permission.CREATE] | PERMISSION_BITS[Permission.UPDATE] | PERMISSION_BITS[Permission.DELETE]
+
+
 # Role → Module permissions mapping
 ROLE_PERMISSIONS: Dict[str, Dict[str, Set[str]]] = {
     Role.CLIENT: {
@@ -94,6 +106,36 @@ ROLE_PERMISSIONS: Dict[str, Dict[str, Set[str]]] = {
 }
 
 
+def role_name(role) -> str:
+    """Plain role string for a Role member or a raw DB value"""
+    return role.value if isinstance(role, Enum) else role
+
+
+def compile_permission_table(role_permissions: Dict[str, Dict[str, Set[str]]]) -> Dict[Tuple[str, str], int]:
+    """(role, module) -> bitmask of PERMISSION_BITS"""
+    table = {}
+    for role, modules in role_permissions.items():
+        for module, permissions in modules.items():
+            mask = 0
+            for permission in permissions:
+                mask |= PERMISSION_BITS[permission]
+            if mask:
+                table[(role_name(role), module)] = mask
+    return table
+
+
+# Compiled once at import; checks below are a single dict lookup and a bitwise AND
+PERMISSION_TABLE = compile_permission_table(ROLE_PERMISSIONS)
+
+ROLE_MODULES: Dict[str, Tuple[str, ...]] = {
+    role_name(role): tuple(modules.keys()) for role, modules in ROLE_PERMISSIONS.items()
+}
+
+
+def permission_mask(role: str, module: str) -> int:
+    return PERMISSION_TABLE.get((role_name(role), module), 0)
+
+
 def has_permission(role: str, module: str, permission: str) -> bool:
     """
     Check if a role has a specific permission for a module
@@ -106,11 +148,7 @@ def has_permission(role: str, module: str, permission: str) -> bool:
     Returns:
         bool: True if role has permission, False otherwise
     """
-    if role not in ROLE_PERMISSIONS:
-        return False
-
-    module_permissions = ROLE_PERMISSIONS[role].get(module, set())
-    return permission in module_permissions
+    return bool(permission_mask(role, module) & PERMISSION_BITS.get(permission, 0))
 
 
 def get_accessible_modules(role: str) -> List[str]:
@@ -123,10 +161,7 @@ def get_accessible_modules(role: str) -> List[str]:
     Returns:
         List of module names the role can access
     """
-    if role not in ROLE_PERMISSIONS:
-        return []
-
-    return list(ROLE_PERMISSIONS[role].keys())
+    return list(ROLE_MODULES.get(role_name(role), ()))
 
 
 def is_read_only(role: str, module: str) -> bool:
@@ -140,11 +175,7 @@ def is_read_only(role: str, module: str) -> bool:
     Returns:
         bool: True if only read permission, False otherwise
     """
-    if role not in ROLE_PERMISSIONS:
-        return False
-
-    module_permissions = ROLE_PERMISSIONS[role].get(module, set())
+    mask = permission_mask(role, module)
 
     # Has read but no write permissions
-    return (Permission.READ in module_permissions and
-            not any(p in module_permissions for p in [Permission.CREATE, Permission.UPDATE, Permission.DELETE]))
+    return bool(mask & PERMISSION_BITS[Permission.READ]) and not mask & WRITE_MASK
@@ -0,0 +1,226 @@
+"""
+Response cache for public list endpoints
+
+Anonymous list pages (news, events, course showcases, leisure places/stats,
+active votings) are identical for every visitor. ResponseCacheMiddleware keeps
+the serialized body of CACHED_ROUTES per (path, normalized query) together with
+a strong ETag, and answers from memory:
+- `If-None-Match` with the current ETag -> 304, no handler, no database
+- otherwise -> the stored bytes, no handler, no database
+
+Every entry remembers the content versions it was built from. A successful
+POST/PUT/PATCH/DELETE under an entity's write prefixes (create, update,
+moderation, ...) bumps that entity's version, so the next request rebuilds the
+page. High-frequency user actions that do not change the lists (lesson
+progress, test submissions, applications) are excluded. Code that writes
+outside HTTP (schedulers) calls bump_content_version() itself.
+
+Versions live in the worker process: a write handled by another worker becomes
+visible once the entry's TTL runs out.
+"""
+
+import hashlib
+import re
+import threading
+from typing import Dict, Iterable, List, NamedTuple, Optional, Tuple
+from urllib.parse import parse_qsl, urlencode
+
+from app.cache import LocalCache
+
+RESPONSE_CACHE_TTL = 30
+RESPONSE_CACHE_SIZE = 1024
+
+# Путь GET -> сущности, от которых зависит ответ
+CACHED_ROUTES: Dict[str, Tuple[str, ...]] = {
+    "/api/v2/news/": ("news",),
+    "/api/v2/events/": ("events",),
+    "/api/v2/courses/recommended": ("courses",),
+    "/api/v2/courses/popular": ("courses",),
+    "/api/v2/courses/free": ("courses",),
+    "/api/v2/leisure/places": ("leisure",),
+    "/api/v2/leisure/stats": ("leisure",),
+    "/api/v2/projects/active/voting": ("projects",),
+}
+
+# Успешная запись под префиксом поднимает версию сущности
+WRITE_PREFIXES: Tuple[Tuple[str, str], ...] = (
+    ("/api/v2/admin/news", "news"),
+    ("/api/v2/parser/news", "news"),
+    ("/api/v2/events", "events"),
+    ("/api/v2/courses", "courses"),
+    ("/api/v2/leisure", "leisure"),
+    ("/api/v2/projects", "projects"),
+)
+
+# Частые действия пользователей, не меняющие публичные списки
+NON_INVALIDATING_WRITES = re.compile(
+    r"/(participate|enroll|submit|grade|upload-file|export|applications)$"
+    r"|/lessons/\d+/complete$"
+    r"|/(applications|submissions)/\d+/status$"
+)
+
+WRITE_METHODS = {"POST", "PUT", "PATCH", "DELETE"}
+
+CACHE_CONTROL = b"no-cache"
+
+
+class ContentVersions:
+    """Per-entity change counters of this worker"""
+
+    def __init__(self):
+        self._versions: Dict[str, int] = {}
+        self._lock = threading.Lock()
+
+    def bump(self, *entities: str) -> None:
+        with self._lock:
+            for entity in entities:
+                self._versions[entity] = self._versions.get(entity, 0) + 1
+
+    def snapshot(self, entities: Iterable[str]) -> Tuple[int, ...]:
+        with self._lock:
+            return tuple(self._versions.get(entity, 0) for entity in entities)
+
+
+content_versions = ContentVersions()
+
+
+def bump_content_version(*entities: str) -> None:
+    """Mark cached responses built from these entities as stale"""
+    content_versions.bump(*entities)
+
+
+def written_entity(path: str) -> Optional[str]:
+    """Entity whose cached lists a write to `path` invalidates"""
+    if NON_INVALIDATING_WRITES.search(path):
+        return None
+    for prefix, entity in WRITE_PREFIXES:
+        if path.startswith(prefix):
+            return entity
+    return None
+
+
+def normalize_query(query_string: bytes) -> str:
+    """?b=2&a=1 and ?a=1&b=2 share an entry"""
+    return urlencode(sorted(parse_qsl(query_string.decode("latin-1"), keep_blank_values=True)))
+
+
+def make_etag(body: bytes) -> bytes:
+    return b'"' + hashlib.blake2b(body, digest_size=16).hexdigest().encode() + b'"'
+
+
+def etag_matches(if_none_match: Optional[bytes], etag: bytes) -> bool:
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == b"*":
+        return True
+    return etag in (tag.strip() for tag in if_none_match.split(b","))
+
+
+class CachedResponse(NamedTuple):
+    versions: Tuple[int, ...]
+    etag: bytes
+    body: bytes
+    headers: List[Tuple[bytes, bytes]]
+
+
+def _header(scope, name: bytes) -> Optional[bytes]:
+    for key, value in scope["headers"]:
+        if key == name:
+            return value
+    return None
+
+
+class ResponseCacheMiddleware:
+    """ASGI middleware serving CACHED_ROUTES from memory (see module docstring)"""
+
+    def __init__(self, app, routes: Dict[str, Tuple[str, ...]] = CACHED_ROUTES,
+                 ttl: float = RESPONSE_CACHE_TTL, maxsize: int = RESPONSE_CACHE_SIZE):
+        self.app = app
+        self.routes = routes
+        self.cache = LocalCache(maxsize=maxsize, ttl=ttl)
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        method, path = scope["method"], scope["path"]
+        if method in WRITE_METHODS:
+            await self._handle_write(scope, receive, send, written_entity(path))
+            return
+
+        entities = self.routes.get(path) if method == "GET" else None
+        if entities is None:
+            await self.app(scope, receive, send)
+            return
+
+        key = (path, normalize_query(scope["query_string"]))
+        versions = content_versions.snapshot(entities)
+        if_none_match = _header(scope, b"if-none-match")
+
+        entry = self.cache.get(key)
+        if entry is not None and entry.versions == versions:
+            await self._send_cached(send, entry, if_none_match)
+            return
+
+        await self._fill(scope, receive, send, key, versions, if_none_match)
+
+    async def _handle_write(self, scope, receive, send, entity: Optional[str]):
+        if entity is None:
+            await self.app(scope, receive, send)
+            return
+
+        async def send_wrapper(message):
+            # Версию поднимаем до отправки ответа: следующий GET клиента уже увидит изменения
+            if message["type"] == "http.response.start" and 200 <= message["status"] < 400:
+                content_versions.bump(entity)
+            await send(message)
+
+        await self.app(scope, receive, send_wrapper)
+
+    async def _send_cached(self, send, entry: CachedResponse, if_none_match: Optional[bytes]):
+        if etag_matches(if_none_match, entry.etag):
+            await send({
+                "type": "http.response.start",
+                "status": 304,
+                "headers": [(b"etag", entry.etag), (b"cache-control", CACHE_CONTROL)],
+            })
+            await send({"type": "http.response.body", "body": b""})
+            return
+
+        await send({"type": "http.response.start", "status": 200, "headers": entry.headers})
+        await send({"type": "http.response.body", "body": entry.body})
+
+    async def _fill(self, scope, receive, send, key, versions, if_none_match):
+        start = None
+        chunks = []
+
+        async def capture(message):
+            nonlocal start
+            if message["type"] == "http.response.start":
+                start = message
+                return
+            if message["type"] != "http.response.body":
+                await send(message)
+                return
+            chunks.append(message.get("body", b""))
+            if message.get("more_body", False):
+                return
+
+            body = b"".join(chunks)
+            if start["status"] != 200:
+                await send(start)
+                await send({"type": "http.response.body", "body": body})
+                return
+
+            etag = make_etag(body)
+            headers = [
+                (name, value) for name, value in start["headers"]
+                if name.lower() not in (b"etag", b"cache-control")
+            ]
+            headers += [(b"etag", etag), (b"cache-control", CACHE_CONTROL)]
+            entry = CachedResponse(versions=versions, etag=etag, body=body, headers=headers)
+            self.cache.set(key, entry)
+            await self._send_cached(send, entry, if_none_match)
+
+        await self.app(scope, receive, capture)
@@ -1,14 +1,17 @@
 from fastapi import HTTPException, status
 from typing import List
 
+from app.rbac.permissions import role_name
+
+
 class RoleChecker:
     def __init__(self, allowed_roles: List[str]):
-        self.allowed_roles = allowed_roles
+        self.allowed_roles = frozenset(role_name(role) for role in allowed_roles)
 
     def __call__(self, current_admin):
-        if current_admin.role not in self.allowed_roles:
+        if role_name(current_admin.role) not in self.allowed_roles:
             raise HTTPException(
                 status_code=status.HTTP_403_FORBIDDEN,
                 detail="У вас нет доступа к этому разделу"
             )
-        return current_admin
\ No newline at end of file
+        return current_admin
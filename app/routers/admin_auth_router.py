@@ -221,6 +221,7 @@ def update_admin_profile(
 
     db.commit()
     db.refresh(current_admin)
+    oauth2.invalidate_admin_principal(current_admin.id)
 
     return {
         "message": "Профиль успешно обновлен",
@@ -254,6 +255,7 @@ def change_admin_password(
     # Устанавливаем новый пароль
     current_admin.password = hash_password(password_data.new_password)
     db.commit()
+    oauth2.invalidate_admin_principal(current_admin.id)
 
     return {"message": "Пароль успешно изменен"}
 
@@ -335,6 +337,7 @@ def approve_admin(
 
     db.commit()
     db.refresh(admin)
+    oauth2.invalidate_admin_principal(admin.id)
 
     status_text = "одобрена" if approval_data.approval_status == "approved" else "отклонена"
 
@@ -12,7 +12,11 @@ from typing import List
 from PIL import Image
 import io
 from app.routers.whatsapp_sender import send_whatsapp_message
-from app.services.mobizon_service import get_mobizon_service
+from app.services.mobizon_service import get_mobizon_service, otp_message
+from app.sms_queue import enqueue_sms, notify_worker
+from app.otp_store import (
+    check_send_rate_limit, check_verify_rate_limit, find_active_otp, issue_otp, record_failed_otp
+)
 
 settings = get_settings()
 
@@ -89,7 +93,7 @@ def generate_otp_code() -> str:
 
 # Проверка существования профиля
 @router.post("/check-profile")
-def check_profile(login_data: schemas.LoginRequest, db: Session = Depends(get_db)):
+def check_profile(login_data: schemas.LoginRequest, request: Request, db: Session = Depends(get_db)):
     """
     Проверяет существование профиля по номеру телефона
     """
@@ -104,38 +108,19 @@ def check_profile(login_data: schemas.LoginRequest, db: Session = Depends(get_db
 
     if user:
         # Пользователь найден - отправляем OTP для авторизации
+        check_send_rate_limit(phone_number, request.client.host if request.client else None)
         otp_code = generate_otp_code()
 
-        # Деактивируем старые коды для этого номера
-        db.query(models.OtpCode).filter(
-            models.OtpCode.phone_number == phone_number,
-            models.OtpCode.is_used == False
-        ).update({"is_used": True})
+        # Новый код; старые активные коды номера деактивируются
+        issue_otp(db, phone_number, otp_code)
 
-        # Создаем новый OTP код
-        expires_at = datetime.utcnow() + timedelta(minutes=5)
-        new_otp = models.OtpCode(
-            phone_number=phone_number,
-            code=otp_code.strip(),  # Ensure no whitespace
-            expires_at=expires_at
-        )
-
-        db.add(new_otp)
+        # SMS ставится в очередь в той же транзакции; отправляет воркер app/sms_queue.py
+        enqueue_sms(db, phone_number, otp_message(otp_code))
         db.commit()
-        db.refresh(new_otp)  # Refresh to ensure data is committed
-
-        # Отправка SMS через Mobizon
-        mobizon = get_mobizon_service()
-        sms_result = mobizon.send_otp(phone_number, otp_code)
+        notify_worker()
 
         print(f"DEBUG: OTP код для {phone_number}: {otp_code}")  # Временно для тестирования
 
-        if sms_result.get("success"):
-            print(f"SMS successfully sent to {phone_number}")
-        else:
-            print(f"SMS failed to send to {phone_number}: {sms_result.get('message')}")
-            # Note: OTP is still generated and can be used even if SMS fails
-
         return {
             "profile_exists": True,
             "message": "OTP код отправлен на ваш номер по SMS",
@@ -151,43 +136,26 @@ def check_profile(login_data: schemas.LoginRequest, db: Session = Depends(get_db
 
 # Отправка OTP кода (оставляем для совместимости)
 @router.post("/send-otp", response_model=schemas.LoginResponse)
-def send_otp(login_data: schemas.LoginRequest, db: Session = Depends(get_db)):
+def send_otp(login_data: schemas.LoginRequest, request: Request, db: Session = Depends(get_db)):
     """
     Отправляет OTP код на указанный номер телефона
     """
     phone_number = normalize_phone_number(login_data.phone_number)
+    check_send_rate_limit(phone_number, request.client.host if request.client else None)
 
     # Генерируем случайный OTP код
     otp_code = generate_otp_code()
 
-    # Деактивируем старые коды для этого номера
-    db.query(models.OtpCode).filter(
-        models.OtpCode.phone_number == phone_number,
-        models.OtpCode.is_used == False
-    ).update({"is_used": True})
+    # Новый код на 5 минут; старые активные коды номера деактивируются
+    issue_otp(db, phone_number, otp_code)
 
-    # Создаем новый OTP код
-    expires_at = datetime.utcnow() + timedelta(minutes=5)  # 5 минут на ввод
-    new_otp = models.OtpCode(
-        phone_number=phone_number,
-        code=otp_code,
-        expires_at=expires_at
-    )
-
-    db.add(new_otp)
+    # SMS ставится в очередь в той же транзакции; отправляет воркер app/sms_queue.py
+    enqueue_sms(db, phone_number, otp_message(otp_code))
     db.commit()
-
-    # Отправка SMS через Mobizon
-    mobizon = get_mobizon_service()
-    sms_result = mobizon.send_otp(phone_number, otp_code)
+    notify_worker()
 
     print(f"DEBUG: OTP код для {phone_number}: {otp_code}")  # Временно для тестирования
 
-    if sms_result.get("success"):
-        print(f"SMS successfully sent to {phone_number}")
-    else:
-        print(f"SMS failed to send to {phone_number}: {sms_result.get('message')}")
-
     return schemas.LoginResponse(
         message="OTP код отправлен на ваш номер по SMS",
         otp_sent=True
@@ -216,6 +184,7 @@ def login_with_phone(login_data: schemas.LoginRequest, db: Session = Depends(get
     # Обновляем статус верификации
     user.is_verified = True
     db.commit()
+    oauth2.invalidate_user_principal(user.id)
 
     # Создаем токен
     access_token = oauth2.create_access_token(data={"user_id": str(user.id)})
@@ -249,21 +218,10 @@ def verify_otp(otp_data: schemas.OtpRequest, request: Request, db: Session = Dep
 
     print(f"DEBUG verify-otp: original_phone={otp_data.phone_number}, normalized_phone={phone_number}, code={otp_code_input}")
 
-    # Ищем активный OTP код для данного номера
-    otp_record = db.query(models.OtpCode).filter(
-        models.OtpCode.phone_number == phone_number,
-        models.OtpCode.is_used == False,
-        models.OtpCode.expires_at > datetime.utcnow()
-    ).first()
+    check_verify_rate_limit(ip_address)
 
-    # Debug: Check if any OTP exists for this phone (even if expired/used)
-    all_otps = db.query(models.OtpCode).filter(
-        models.OtpCode.phone_number == phone_number
-    ).order_by(models.OtpCode.created_at.desc()).limit(3).all()
-
-    print(f"DEBUG: Found {len(all_otps)} total OTP records for {phone_number}")
-    for otp in all_otps:
-        print(f"  - code={otp.code}, is_used={otp.is_used}, expires_at={otp.expires_at}, now={datetime.utcnow()}")
+    # Ищем активный OTP код для данного номера
+    otp_record = find_active_otp(db, phone_number)
 
     # Проверяем существование и валидность OTP
     if not otp_record:
@@ -293,6 +251,7 @@ def verify_otp(otp_data: schemas.OtpRequest, request: Request, db: Session = Dep
         # Проверяем правильность кода
         if otp_record.code != otp_code_input:
             print(f"DEBUG: OTP mismatch - expected: {otp_record.code}, got: {otp_code_input}")
+            record_failed_otp(db, otp_record, ip_address)
 
             # Log failed login - invalid OTP code
             login_log = analytics_models.LoginHistory(
@@ -347,6 +306,7 @@ def verify_otp(otp_data: schemas.OtpRequest, request: Request, db: Session = Dep
     # Обновляем статус верификации
     user.is_verified = True
     db.commit()
+    oauth2.invalidate_user_principal(user.id)
 
     # Log successful login
     login_log = analytics_models.LoginHistory(
@@ -457,6 +417,7 @@ async def upload_document(file: UploadFile = File(...)):
 # Регистрация физического лица
 @router.post("/register-individual")
 async def register_individual(
+        request: Request,
         phone_number: str = Form(...),
         full_name: str = Form(...),
         address: str = Form(...),
@@ -478,11 +439,9 @@ async def register_individual(
         otp_code_input = otp_code.strip()
 
         # Check for valid OTP code
-        otp_record = db.query(models.OtpCode).filter(
-            models.OtpCode.phone_number == phone_number,
-            models.OtpCode.is_used == False,
-            models.OtpCode.expires_at > datetime.utcnow()
-        ).first()
+        ip_address = request.client.host if request.client else None
+        check_verify_rate_limit(ip_address)
+        otp_record = find_active_otp(db, phone_number)
 
         if not otp_record:
             raise HTTPException(
@@ -495,6 +454,7 @@ async def register_individual(
 
         # Check if OTP code is correct (or master code)
         if not is_bypass_code and otp_record.code != otp_code_input:
+            record_failed_otp(db, otp_record, ip_address)
             raise HTTPException(
                 status_code=status.HTTP_400_BAD_REQUEST,
                 detail="Неверный OTP код"
@@ -554,6 +514,7 @@ async def register_individual(
     # Обновляем статус верификации пользователя
     new_user.is_verified = True
     db.commit()
+    oauth2.invalidate_user_principal(new_user.id)
 
     # Создаем токен доступа
     access_token = oauth2.create_access_token(data={"user_id": str(new_user.id)})
@@ -575,6 +536,7 @@ async def register_individual(
 @router.post("/register-organization")
 def register_organization(
         org_data: schemas.OrganizationRegistration,
+        request: Request,
         db: Session = Depends(get_db)
 ):
     """
@@ -589,11 +551,9 @@ def register_organization(
         otp_code_input = org_data.otp_code.strip()
 
         # Check for valid OTP code
-        otp_record = db.query(models.OtpCode).filter(
-            models.OtpCode.phone_number == phone_number,
-            models.OtpCode.is_used == False,
-            models.OtpCode.expires_at > datetime.utcnow()
-        ).first()
+        ip_address = request.client.host if request.client else None
+        check_verify_rate_limit(ip_address)
+        otp_record = find_active_otp(db, phone_number)
 
         if not otp_record:
             raise HTTPException(
@@ -606,6 +566,7 @@ def register_organization(
 
         # Check if OTP code is correct (or master code)
         if not is_bypass_code and otp_record.code != otp_code_input:
+            record_failed_otp(db, otp_record, ip_address)
             raise HTTPException(
                 status_code=status.HTTP_400_BAD_REQUEST,
                 detail="Неверный OTP код"
@@ -660,6 +621,7 @@ def register_organization(
     # Обновляем статус верификации пользователя
     new_user.is_verified = True
     db.commit()
+    oauth2.invalidate_user_principal(new_user.id)
 
     # Создаем токен доступа
     access_token = oauth2.create_access_token(data={"user_id": str(new_user.id)})
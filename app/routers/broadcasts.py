@@ -22,6 +22,7 @@ from app.broadcast_schemas import (
 )
 from app.telegram_otp_models import TelegramSession
 from app.oauth2 import get_current_admin
+from app.metrics import track_outbound
 from app.rbac.middleware import require_role
 from app.rbac.roles import Role
 
@@ -485,9 +486,10 @@ async def send_telegram_broadcast_message(
             "reply_markup": reply_markup
         }
 
-        async with httpx.AsyncClient(timeout=10.0) as client:
-            response = await client.post(url, json=payload)
-            response.raise_for_status()
+        with track_outbound("telegram", "sendMessage"):
+            async with httpx.AsyncClient(timeout=10.0) as client:
+                response = await client.post(url, json=payload)
+                response.raise_for_status()
 
         return True, None
 
@@ -10,6 +10,7 @@ from app.utils import send_email, validate_file_extension, save_upload_file
 from app.oauth2 import get_current_user
 from app.rbac import Module, Permission, require_permission, require_module_access
 from app.notification_service import notify_interested_users_for_content
+from app.services.course_catalog import course_catalog, CatalogFilters, SORTS
 from config import get_settings
 from datetime import datetime
 import os
@@ -136,6 +137,51 @@ def search_courses(
 
     return courses
 
+
+@router.get("/catalog", response_model=dict)
+def get_course_catalog(
+        db: Session = Depends(get_db),
+        search: Optional[str] = None,
+        category_id: Optional[int] = None,
+        language: Optional[CourseLanguage] = None,
+        level: Optional[CourseLevel] = None,
+        is_free: Optional[bool] = None,
+        price_min: Optional[float] = None,
+        price_max: Optional[float] = None,
+        sort: str = Query("relevance", description="relevance, newest, popular, rating, price_asc, price_desc"),
+        skip: int = Query(0, ge=0),
+        limit: int = Query(20, ge=1, le=100),
+        include_sections: bool = False,
+        section_limit: int = Query(10, ge=1, le=50)
+):
+    """
+    Каталог курсов одним запросом: страница результатов поиска/фильтров,
+    счётчики фасетов (язык, уровень, бесплатные/платные, категории)
+    и, при include_sections=true, блоки рекомендуемых/популярных/бесплатных курсов
+    """
+    if sort not in SORTS:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Неверная сортировка. Допустимые значения: {', '.join(SORTS)}"
+        )
+
+    index = course_catalog.get(db)
+    filters = CatalogFilters(
+        search=search,
+        category_id=category_id,
+        language=language.value if language else None,
+        level=level.value if level else None,
+        is_free=is_free,
+        price_min=price_min,
+        price_max=price_max
+    )
+
+    result = index.search(filters, sort=sort, skip=skip, limit=limit)
+    if include_sections:
+        result["sections"] = index.sections(limit=section_limit)
+    return result
+
+
 @router.get("/my", response_model=List[CourseEnrollmentWithCourse])
 def list_my_courses(
         skip: int = 0,
@@ -169,23 +215,26 @@ def list_categories(
 
 @router.get("/{course_id}", response_model=CourseDetail)
 def get_course_details(
+        background_tasks: BackgroundTasks,
         course_id: int = Path(..., title="ID курса", ge=1),
         db: Session = Depends(get_db)
 ):
     """
-    Получение детальной информации о курсе
+    Получение детальной информации о курсе.
+    Дерево курса отдается из кэша готового JSON (ключ - id курса и updated_at).
     """
-    course = crud.get_course(db, course_id=course_id)
-    if not course:
+    payload = crud.get_course_detail_json(db, course_id=course_id)
+    if payload is None:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Курс не найден"
         )
 
-    # Увеличиваем счетчик просмотров
-    crud.increment_course_views(db, course_id=course_id)
+    # Просмотры копятся в памяти и записываются пачкой после ответа
+    crud.course_view_counter.add(course_id)
+    background_tasks.add_task(crud.course_view_counter.flush_if_due)
 
-    return course
+    return Response(content=payload, media_type="application/json")
 
 @router.post("/", response_model=CourseDetail, status_code=status.HTTP_201_CREATED)
 async def create_course(
@@ -431,6 +480,7 @@ async def update_course(
     #         status_comment="Курс обновлен и ожидает повторной модерации"
     #     )
 
+    crud.invalidate_course_detail(db, course_id)
     return updated_course
 
 
@@ -490,6 +540,7 @@ def update_course_status(
                 message=message
             )
 
+    crud.invalidate_course_detail(db, course_id)
     return updated_course
 
 
@@ -519,6 +570,7 @@ def delete_course(
 
     # Удаляем курс
     crud.delete_course(db=db, course_id=course_id)
+    crud.invalidate_course_detail(db, course_id)
     return Response(status_code=status.HTTP_204_NO_CONTENT)
 
 
@@ -565,6 +617,7 @@ def add_chapter(
     #         status_comment="Курс обновлен и ожидает повторной модерации"
     #     )
 
+    crud.invalidate_course_detail(db, course_id)
     return updated_course
 
 
@@ -622,6 +675,7 @@ async def add_lesson(
         lesson=lesson_data
     )
 
+    crud.invalidate_course_detail(db, course_id)
     return updated_course
 
 @router.post("/{course_id}/chapters/{chapter_id}/lessons/{lesson_id}/tests", response_model=CourseDetail)
@@ -720,6 +774,7 @@ async def add_test(
     #         status_comment="Курс обновлен и ожидает повторной модерации"
     #     )
 
+    crud.invalidate_course_detail(db, course_id)
     return updated_course
 
 
@@ -807,7 +862,8 @@ def complete_lesson(
     progress_data = crud.complete_lesson(
         db=db,
         enrollment_id=enrollment.id,
-        lesson_id=lesson_id
+        lesson_id=lesson_id,
+        course_id=course_id
     )
 
     # Возвращаем полную информацию о прогрессе
@@ -869,6 +925,60 @@ def submit_test_answers(
     return result
 
 
+@router.post("/{course_id}/tests/submit", response_model=dict)
+def submit_quiz_answers(
+        course_id: int,
+        submission: CourseQuizSubmission,
+        db: Session = Depends(get_db),
+        current_user=Depends(get_current_user)
+):
+    """
+    Отправка ответов сразу на несколько тестов (вся попытка за один запрос)
+    """
+    # Повторные ответы на один и тот же тест: учитываем последний
+    answers_by_test = {item.test_id: item.answers for item in submission.tests}
+    if not answers_by_test:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Нет ответов для проверки"
+        )
+
+    # Проверяем, что все тесты существуют и принадлежат указанному курсу (один запрос)
+    test_courses = crud.get_tests_course_ids(db, list(answers_by_test.keys()))
+    missing = [test_id for test_id in answers_by_test if test_id not in test_courses]
+    if missing:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"Тесты не найдены: {missing}"
+        )
+    if any(test_course_id != course_id for test_course_id in test_courses.values()):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Тест не принадлежит указанному курсу"
+        )
+
+    # Проверяем наличие записи на курс
+    enrollment = crud.get_enrollment(db, user_id=current_user.id, course_id=course_id)
+    if not enrollment:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Вы не записаны на этот курс"
+        )
+
+    results = crud.submit_quiz_answers(
+        db=db,
+        enrollment_id=enrollment.id,
+        submissions=answers_by_test
+    )
+
+    return {
+        "course_id": course_id,
+        "results": results,
+        "total_tests": len(results),
+        "passed_tests": sum(1 for r in results if r["passed"])
+    }
+
+
 @router.get("/moderation/pending", response_model=List[CourseList])
 def list_pending_courses(
         skip: int = 0,
@@ -1001,6 +1111,7 @@ def approve_course(
         telegram_bot_token=settings.telegram_bot_token,
     )
 
+    crud.invalidate_course_detail(db, course_id)
     return course
 
 
@@ -1024,6 +1135,7 @@ def reject_course(
 
     db.commit()
     db.refresh(course)
+    crud.invalidate_course_detail(db, course_id)
     return course
 
 
@@ -1174,6 +1286,7 @@ async def admin_update_course(
         admin_role=current_admin.role
     )
 
+    crud.invalidate_course_detail(db, course_id)
     return updated_course
 
 
@@ -1200,6 +1313,7 @@ def update_chapter(
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Глава не найдена")
 
     updated_chapter = crud.update_chapter(db=db, chapter_id=chapter_id, chapter_update=chapter_data)
+    crud.invalidate_course_detail(db, course_id)
     return updated_chapter
 
 
@@ -1221,6 +1335,7 @@ def delete_chapter(
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Глава не найдена")
 
     crud.delete_chapter(db=db, chapter_id=chapter_id)
+    crud.invalidate_course_detail(db, course_id)
     return Response(status_code=status.HTTP_204_NO_CONTENT)
 
 
@@ -1252,6 +1367,7 @@ def update_lesson(
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Урок не найден")
 
     updated_lesson = crud.update_lesson(db=db, lesson_id=lesson_id, lesson_update=lesson_data)
+    crud.invalidate_course_detail(db, course_id)
     return updated_lesson
 
 
@@ -1278,6 +1394,7 @@ def delete_lesson(
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Урок не найден")
 
     crud.delete_lesson(db=db, lesson_id=lesson_id)
+    crud.invalidate_course_detail(db, course_id)
     return Response(status_code=status.HTTP_204_NO_CONTENT)
 
 
@@ -1314,6 +1431,7 @@ def update_test(
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Тест не найден")
 
     updated_test = crud.update_test(db=db, test_id=test_id, test_update=test_data)
+    crud.invalidate_course_detail(db, course_id)
     return updated_test
 
 
@@ -1345,6 +1463,7 @@ def delete_test(
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Тест не найден")
 
     crud.delete_test(db=db, test_id=test_id)
+    crud.invalidate_course_detail(db, course_id)
     return Response(status_code=status.HTTP_204_NO_CONTENT)
 
 
@@ -1366,6 +1485,7 @@ def reorder_chapters(
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Курс не найден")
 
     updated_course = crud.reorder_chapters(db=db, course_id=course_id, reorder=reorder_data)
+    crud.invalidate_course_detail(db, course_id)
     return updated_course
 
 
@@ -1388,6 +1508,7 @@ def reorder_lessons(
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Глава не найдена")
 
     updated_chapter = crud.reorder_lessons(db=db, chapter_id=chapter_id, reorder=reorder_data)
+    crud.invalidate_course_detail(db, course_id)
     return updated_chapter
 
 
@@ -1409,6 +1530,7 @@ def create_homework(
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Курс не найден")
 
     homework = crud.create_homework(db=db, homework=homework_data)
+    crud.invalidate_course_detail(db, course_id)
     return homework
 
 
@@ -1442,6 +1564,7 @@ def update_homework(
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Домашнее задание не найдено")
 
     updated_homework = crud.update_homework(db=db, homework_id=homework_id, homework_update=homework_data)
+    crud.invalidate_course_detail(db, course_id)
     return updated_homework
 
 
@@ -1459,6 +1582,7 @@ def delete_homework(
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Домашнее задание не найдено")
 
     crud.delete_homework(db=db, homework_id=homework_id)
+    crud.invalidate_course_detail(db, course_id)
     return Response(status_code=status.HTTP_204_NO_CONTENT)
 
 
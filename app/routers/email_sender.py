@@ -61,7 +61,7 @@ async def send_custom_email(
 
     try:
         # Send emails using the email service
-        result = email_service.send_bulk_emails(
+        result = await email_service.send_bulk_emails_async(
             recipients=email_data.recipients,
             subject=email_data.subject,
             body_html=email_data.body_html,
@@ -245,7 +245,7 @@ async def send_test_email(
         """
 
         # Send test email
-        success = email_service.send_email(
+        success = await email_service.send_email_async(
             to_email=current_admin.email,
             subject="Тестовое письмо - SARYARQA JASTARY",
             body_html=html_body,
@@ -19,6 +19,7 @@ from app.schemas import (
     # ExpertFilter # Уже был в вашем фрагменте
 )
 from app import crud
+from app.fuzzy_search import DEFAULT_SIMILARITY, MIN_SIMILARITY
 from app.utils import send_email # Предполагается, что этот модуль существует
 from app.oauth2 import get_current_user # Если используется аутентификация
 
@@ -49,6 +50,8 @@ def search_experts(
         search: Optional[str] = None,
         skip: int = 0,
         limit: int = 100,
+        fuzzy: bool = Query(False, description="Поиск по ФИО с учетом опечаток"),
+        similarity: float = Query(DEFAULT_SIMILARITY, ge=MIN_SIMILARITY, le=1.0),
         db: Session = Depends(get_db)
 ):
     """
@@ -60,7 +63,9 @@ def search_experts(
         city=city,
         search=search,
         skip=skip,
-        limit=limit
+        limit=limit,
+        fuzzy=fuzzy,
+        similarity=similarity
     )
     return experts
 
@@ -10,6 +10,7 @@ from app.schemas import ModerationStats, ModerationStatus
 from app.oauth2 import get_current_admin
 from app.rbac import Module, Permission, require_module_access, require_permission, apply_owner_filter
 from app import models
+from app.fuzzy_search import DEFAULT_SIMILARITY, MIN_SIMILARITY, apply_fuzzy_search
 from typing import List, Optional
 import os
 import uuid
@@ -978,6 +979,8 @@ def search_leisure(
         category_id: Optional[int] = None,
         skip: int = 0,
         limit: int = 20,
+        fuzzy: bool = Query(False, description="Поиск по названию с учетом опечаток"),
+        similarity: float = Query(DEFAULT_SIMILARITY, ge=MIN_SIMILARITY, le=1.0),
         db: Session = Depends(get_db)
 ):
     """Поиск по билетам и местам"""
@@ -988,14 +991,18 @@ def search_leisure(
     }
 
     if search_in in [None, "all", "tickets"]:
-        tickets = db.query(Ticket).filter(
-            or_(
-                Ticket.title.ilike(f"%{q}%"),
-                Ticket.title_ru.ilike(f"%{q}%"),
-                Ticket.description.ilike(f"%{q}%"),
-                Ticket.description_ru.ilike(f"%{q}%")
+        if fuzzy:
+            tickets_query = apply_fuzzy_search(db, db.query(Ticket), [Ticket.title, Ticket.title_ru], q, similarity)
+        else:
+            tickets_query = db.query(Ticket).filter(
+                or_(
+                    Ticket.title.ilike(f"%{q}%"),
+                    Ticket.title_ru.ilike(f"%{q}%"),
+                    Ticket.description.ilike(f"%{q}%"),
+                    Ticket.description_ru.ilike(f"%{q}%")
+                )
             )
-        ).limit(limit).all()
+        tickets = tickets_query.limit(limit).all()
 
         results["tickets"] = [
             {
@@ -1011,14 +1018,17 @@ def search_leisure(
         ]
 
     if search_in in [None, "all", "places"]:
-        query = db.query(Place).filter(
-            or_(
-                Place.title.ilike(f"%{q}%"),
-                Place.title_ru.ilike(f"%{q}%"),
-                Place.description.ilike(f"%{q}%"),
-                Place.description_ru.ilike(f"%{q}%")
+        if fuzzy:
+            query = apply_fuzzy_search(db, db.query(Place), [Place.title, Place.title_ru], q, similarity)
+        else:
+            query = db.query(Place).filter(
+                or_(
+                    Place.title.ilike(f"%{q}%"),
+                    Place.title_ru.ilike(f"%{q}%"),
+                    Place.description.ilike(f"%{q}%"),
+                    Place.description_ru.ilike(f"%{q}%")
+                )
             )
-        )
 
         if category_id:
             query = query.filter(Place.category_id == category_id)
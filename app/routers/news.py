@@ -9,6 +9,7 @@ from app import news_models, news_schemas, models, oauth2
 from app.publication_config import PUBLICATION_SLOTS, SLOT_WINDOW_MINUTES
 from app.notification_service import notify_interested_users_for_content
 from config import get_settings
+from app.fast_json import ModelJSON
 
 logger = logging.getLogger(__name__)
 
@@ -30,6 +31,9 @@ parser_router = APIRouter(
     tags=["News Parser"]
 )
 
+news_list_json = ModelJSON(List[news_schemas.NewsResponse])
+
+
 @router.get("/", response_model=List[news_schemas.NewsResponse])
 def get_all_news(
     category: Optional[str] = Query(None, description="Filter news by category"),
@@ -58,7 +62,8 @@ def get_all_news(
         query = query.filter(news_models.News.category == category)
 
     news_list = query.order_by(news_models.News.date.desc()).all()
-    return news_list
+    # Самый большой публичный ответ: валидация и сериализация в один проход
+    return news_list_json.response(news_list)
 
 @router.get("/categories", response_model=List[str])
 def get_all_categories(db: Session = Depends(get_db)):
@@ -1,8 +1,9 @@
 from fastapi import APIRouter, BackgroundTasks, Depends, HTTPException, status, UploadFile, File, Form
 from fastapi.responses import JSONResponse
 from sqlalchemy.orm import Session
-from sqlalchemy import func, desc
+from sqlalchemy import func, desc, text
 from app.database import get_db
+from app.cache import LocalCache
 from app import oauth2, models
 from app.project_models import (
     Project, ProjectGallery, VotingParticipant, Vote,
@@ -447,6 +448,7 @@ def update_project(
             setattr(project, key, value)
 
     db.commit()
+    invalidate_project_stats(project_id)
 
     return {"message": "Проект успешно обновлен"}
 
@@ -469,6 +471,7 @@ def delete_project(
 
     db.delete(project)
     db.commit()
+    invalidate_project_stats(project_id)
 
     return {"message": "Проект успешно удален"}
 
@@ -590,6 +593,7 @@ def create_voting_participant(
 
     db.add(participant)
     db.commit()
+    invalidate_project_stats(project_id)
     db.refresh(participant)
 
     return {
@@ -722,6 +726,7 @@ def vote_for_participant(
     participant.votes_count += 1
 
     db.commit()
+    invalidate_project_stats(project_id)
 
     return {
         "message": "Голос принят",
@@ -848,6 +853,7 @@ async def submit_application(
 
     db.add(application)
     db.commit()
+    invalidate_project_stats(project_id)
     db.refresh(application)
 
     return {
@@ -978,6 +984,7 @@ def update_application_status(
                 )
 
     db.commit()
+    invalidate_project_stats(application.project_id)
 
     return {
         "message": f"Статус заявки изменен на {new_status}",
@@ -988,11 +995,24 @@ def update_application_status(
 
 # === СТАТИСТИКА ===
 
+# Admin dashboards poll stats; entries are dropped on votes, application
+# status changes and participant/project edits handled by this worker.
+project_stats_cache = LocalCache(maxsize=512, ttl=30)
+
+
+def invalidate_project_stats(project_id: int) -> None:
+    project_stats_cache.invalidate(project_id)
+
+
 @router.get("/{project_id}/stats")
 def get_project_stats(project_id: int, db: Session = Depends(get_db)):
     """
     Получение статистики по проекту
     """
+    cached = project_stats_cache.get(project_id)
+    if cached is not None:
+        return cached
+
     project = db.query(Project).filter(Project.id == project_id).first()
     if not project:
         raise HTTPException(
@@ -1010,19 +1030,21 @@ def get_project_stats(project_id: int, db: Session = Depends(get_db)):
     }
 
     if project.project_type == "voting":
-        # Статистика для голосовалки
-        total_participants = db.query(func.count(VotingParticipant.id)).filter(
-            VotingParticipant.project_id == project_id
-        ).scalar()
-
-        total_votes = db.query(func.count(Vote.id)).filter(
-            Vote.project_id == project_id
-        ).scalar()
-
-        # Лидирующий участник
-        top_participant = db.query(VotingParticipant).filter(
+        # Статистика для голосовалки - один запрос со скалярными подзапросами
+        leading = db.query(VotingParticipant.name, VotingParticipant.votes_count).filter(
             VotingParticipant.project_id == project_id
-        ).order_by(desc(VotingParticipant.votes_count)).first()
+        ).order_by(desc(VotingParticipant.votes_count)).limit(1).subquery()
+
+        total_participants, total_votes, leading_name, leading_votes = db.query(
+            db.query(func.count(VotingParticipant.id)).filter(
+                VotingParticipant.project_id == project_id
+            ).scalar_subquery(),
+            db.query(func.count(Vote.id)).filter(
+                Vote.project_id == project_id
+            ).scalar_subquery(),
+            db.query(leading.c.name).scalar_subquery(),
+            db.query(leading.c.votes_count).scalar_subquery(),
+        ).one()
 
         stats.update({
             "total_participants": total_participants,
@@ -1030,31 +1052,21 @@ def get_project_stats(project_id: int, db: Session = Depends(get_db)):
             "average_votes_per_participant": round(total_votes / total_participants,
                                                    2) if total_participants > 0 else 0,
             "leading_participant": {
-                "name": top_participant.name,
-                "votes": top_participant.votes_count
-            } if top_participant else None
+                "name": leading_name,
+                "votes": leading_votes
+            } if total_participants > 0 else None
         })
 
     elif project.project_type == "application":
-        # Статистика для приема заявок
-        total_applications = db.query(func.count(ProjectApplication.id)).filter(
+        # Статистика для приема заявок - COUNT(*) FILTER (WHERE ...) за один проход
+        total_applications, pending_applications, approved_applications, rejected_applications = db.query(
+            func.count(ProjectApplication.id),
+            func.count(ProjectApplication.id).filter(ProjectApplication.status == "pending"),
+            func.count(ProjectApplication.id).filter(ProjectApplication.status == "approved"),
+            func.count(ProjectApplication.id).filter(ProjectApplication.status == "rejected"),
+        ).filter(
             ProjectApplication.project_id == project_id
-        ).scalar()
-
-        pending_applications = db.query(func.count(ProjectApplication.id)).filter(
-            ProjectApplication.project_id == project_id,
-            ProjectApplication.status == "pending"
-        ).scalar()
-
-        approved_applications = db.query(func.count(ProjectApplication.id)).filter(
-            ProjectApplication.project_id == project_id,
-            ProjectApplication.status == "approved"
-        ).scalar()
-
-        rejected_applications = db.query(func.count(ProjectApplication.id)).filter(
-            ProjectApplication.project_id == project_id,
-            ProjectApplication.status == "rejected"
-        ).scalar()
+        ).one()
 
         stats.update({
             "total_applications": total_applications,
@@ -1065,6 +1077,7 @@ def get_project_stats(project_id: int, db: Session = Depends(get_db)):
                                    2) if (approved_applications + rejected_applications) > 0 else 0
         })
 
+    project_stats_cache.set(project_id, stats)
     return stats
 
 
@@ -1198,12 +1211,15 @@ def delete_participant(
             detail="Участник не найден"
         )
 
+    project_id = participant.project_id
+
     # Удаляем все голоса за этого участника
     db.query(Vote).filter(Vote.participant_id == participant_id).delete()
 
     # Удаляем участника
     db.delete(participant)
     db.commit()
+    invalidate_project_stats(project_id)
 
     return {"message": "Участник удален"}
 
@@ -1236,6 +1252,7 @@ def update_participant(
             setattr(participant, field, participant_data[field])
 
     db.commit()
+    invalidate_project_stats(participant.project_id)
 
     return {"message": "Данные участника обновлены"}
 
@@ -1327,6 +1344,7 @@ def complete_project(
 
     project.status = "completed"
     db.commit()
+    invalidate_project_stats(project_id)
 
     # Если это голосовалка, сохраняем результаты
     if project.project_type == "voting":
@@ -1402,6 +1420,7 @@ def boost_participant_votes(
     participant.votes_count += votes_to_add
 
     db.commit()
+    invalidate_project_stats(project_id)
 
     return {
         "message": f"Количество голосов увеличено на {votes_to_add}",
@@ -1447,6 +1466,7 @@ def set_participant_votes(
     participant.votes_count = new_votes_count
 
     db.commit()
+    invalidate_project_stats(project_id)
 
     return {
         "message": f"Количество голосов установлено: {new_votes_count}",
@@ -1513,6 +1533,7 @@ def boost_all_participants_votes(
         })
 
     db.commit()
+    invalidate_project_stats(project_id)
 
     return {
         "message": f"Голоса увеличены на {votes_to_add} у всех участников",
@@ -1583,6 +1604,7 @@ def distribute_random_votes(
         })
 
     db.commit()
+    invalidate_project_stats(project_id)
 
     return {
         "message": f"Распределено {total_votes} голосов между {participants_count} участниками",
@@ -1632,6 +1654,7 @@ def reset_all_votes(
     votes_deleted = db.query(Vote).filter(Vote.project_id == project_id).delete()
 
     db.commit()
+    invalidate_project_stats(project_id)
 
     return {
         "message": "Все голоса сброшены",
@@ -1691,6 +1714,7 @@ def create_fake_votes(
     participant.votes_count += votes_count
 
     db.commit()
+    invalidate_project_stats(project_id)
 
     return {
         "message": f"Создано {votes_count} фейковых голосов",
@@ -1861,6 +1885,7 @@ def admin_update_project(
         existing_project.video_url = project_data.video_url
 
     db.commit()
+    invalidate_project_stats(project_id)
     db.refresh(existing_project)
 
     return existing_project
@@ -1928,6 +1953,7 @@ def admin_delete_project(
     # 7. Finally, delete the project itself
     db.delete(existing_project)
     db.commit()
+    invalidate_project_stats(project_id)
 
     return JSONResponse(status_code=status.HTTP_204_NO_CONTENT, content={})
 
@@ -2521,6 +2547,25 @@ def update_submission_status(
 
 # --- Analytics & Export ---
 
+# Value counts for categorical form fields, computed in Postgres.
+# Multi-select answers (JSON arrays) are unnested so that each option is counted;
+# `responses ? key` can use the GIN index on responses.
+FIELD_VALUE_COUNTS_SQL = text("""
+    SELECT f.key AS field_id, v.value AS value, COUNT(*) AS count
+    FROM project_form_submissions s
+    CROSS JOIN unnest(CAST(:field_ids AS text[])) AS f(key)
+    CROSS JOIN LATERAL jsonb_array_elements(
+        CASE WHEN jsonb_typeof(s.responses -> f.key) = 'array'
+             THEN s.responses -> f.key
+             ELSE jsonb_build_array(s.responses -> f.key)
+        END
+    ) AS v(value)
+    WHERE s.project_id = :project_id
+      AND s.responses ? f.key
+    GROUP BY f.key, v.value
+""")
+
+
 @router.get("/{project_id}/analytics", response_model=FormAnalyticsResponse)
 def get_form_analytics(
     project_id: int,
@@ -2540,63 +2585,58 @@ def get_form_analytics(
         if project.admin_id != current_admin.id:
             raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="You don't have permission to view analytics for this project")
     
-    # Get all submissions for this project
-    submissions = db.query(ProjectFormSubmission).filter(
+    # Status counters in a single pass: COUNT(*) FILTER (WHERE ...)
+    counts = db.query(
+        func.count(ProjectFormSubmission.id),
+        func.count(ProjectFormSubmission.id).filter(ProjectFormSubmission.status == "pending"),
+        func.count(ProjectFormSubmission.id).filter(ProjectFormSubmission.status == "approved"),
+        func.count(ProjectFormSubmission.id).filter(ProjectFormSubmission.status == "rejected"),
+        func.min(ProjectFormSubmission.submitted_at),
+    ).filter(
         ProjectFormSubmission.project_id == project_id
-    ).all()
-    
-    total_submissions = len(submissions)
-    pending_count = len([s for s in submissions if s.status == "pending"])
-    approved_count = len([s for s in submissions if s.status == "approved"])
-    rejected_count = len([s for s in submissions if s.status == "rejected"])
-    
+    ).one()
+    total_submissions, pending_count, approved_count, rejected_count, first_submission = counts
+
     # Submissions over time (group by date)
-    from collections import defaultdict
-    submissions_by_date = defaultdict(int)
-    for sub in submissions:
-        date_str = sub.submitted_at.strftime("%Y-%m-%d")
-        submissions_by_date[date_str] += 1
-    
+    day = func.date_trunc('day', ProjectFormSubmission.submitted_at).label("day")
+    submissions_by_date = db.query(day, func.count(ProjectFormSubmission.id)).filter(
+        ProjectFormSubmission.project_id == project_id
+    ).group_by(day).order_by(day).all()
+
     submissions_over_time = [
-        {"date": date, "count": count}
-        for date, count in sorted(submissions_by_date.items())
+        {"date": date.strftime("%Y-%m-%d"), "count": count}
+        for date, count in submissions_by_date
     ]
-    
+
     # Field statistics (aggregate responses for dropdown/radio/checkbox fields)
     template = db.query(ProjectFormTemplate).filter(
         ProjectFormTemplate.project_id == project_id
     ).first()
-    
+
     field_statistics = {}
-    if template:
-        for field in template.fields:
-            field_id = field['id']
-            field_type = field['type']
-            
-            # Only calculate stats for categorical fields
-            if field_type in ['dropdown', 'radio', 'checkbox', 'rating']:
-                responses_for_field = []
-                for sub in submissions:
-                    if field_id in sub.responses:
-                        value = sub.responses[field_id]
-                        if isinstance(value, list):
-                            responses_for_field.extend(value)
-                        else:
-                            responses_for_field.append(value)
-                
-                # Count occurrences
-                from collections import Counter
-                value_counts = Counter(responses_for_field)
-                field_statistics[field_id] = {
-                    "field_label_kz": field.get('label_kz', ''),
-                    "field_label_ru": field.get('label_ru', ''),
-                    "type": field_type,
-                    "value_counts": dict(value_counts)
-                }
-    
+    categorical_fields = [
+        field for field in (template.fields if template else [])
+        if field['type'] in ['dropdown', 'radio', 'checkbox', 'rating']
+    ]
+    if categorical_fields and total_submissions:
+        value_counts = {field['id']: {} for field in categorical_fields}
+        rows = db.execute(FIELD_VALUE_COUNTS_SQL, {
+            "project_id": project_id,
+            "field_ids": list(value_counts.keys()),
+        })
+        for field_id, value, count in rows:
+            value_counts[field_id][value] = count
+
+        for field in categorical_fields:
+            field_statistics[field['id']] = {
+                "field_label_kz": field.get('label_kz', ''),
+                "field_label_ru": field.get('label_ru', ''),
+                "type": field['type'],
+                "value_counts": value_counts[field['id']]
+            }
+
     # Calculate average submissions per day
-    if submissions:
-        first_submission = min(s.submitted_at for s in submissions)
+    if first_submission:
         days_active = (datetime.utcnow() - first_submission).days + 1
         avg_per_day = total_submissions / days_active if days_active > 0 else 0
     else:
@@ -2622,87 +2662,60 @@ def export_submissions(
     current_admin: models.Admin = Depends(require_permission(Module.PROJECTS, Permission.READ))
 ):
     """
-    Admin: Export submissions to CSV or Excel format.
+    Admin: Export submissions to CSV or Excel (XLSX) format.
+    Rows are streamed from a server-side cursor, so memory use does not grow with the export size.
     """
-    import csv
-    import io
+    from fastapi import status as http_status
     from fastapi.responses import StreamingResponse
-    
+    from app.services.submission_export import stream_submissions_csv, stream_submissions_xlsx
+
+    if format not in ("csv", "excel", "xlsx"):
+        raise HTTPException(
+            status_code=http_status.HTTP_400_BAD_REQUEST,
+            detail="Unsupported export format. Use 'csv' or 'excel'"
+        )
+
     # Verify project ownership
     project = db.query(Project).filter(Project.id == project_id).first()
     if not project:
-        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Project not found")
-    
+        raise HTTPException(status_code=http_status.HTTP_404_NOT_FOUND, detail="Project not found")
+
     # Check ownership
     if current_admin.role not in ['administrator', 'super_admin']:
         if project.admin_id != current_admin.id:
-            raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="You don't have permission to export submissions")
-    
-    # Get submissions
-    query = db.query(ProjectFormSubmission).filter(
-        ProjectFormSubmission.project_id == project_id
-    )
-    
-    if status:
-        query = query.filter(ProjectFormSubmission.status == status)
-    
-    submissions = query.order_by(desc(ProjectFormSubmission.submitted_at)).all()
-    
+            raise HTTPException(status_code=http_status.HTTP_403_FORBIDDEN, detail="You don't have permission to export submissions")
+
     # Get form template for field labels
     template = db.query(ProjectFormTemplate).filter(
         ProjectFormTemplate.project_id == project_id
     ).first()
-    
-    if not template or not submissions:
+
+    query = db.query(ProjectFormSubmission.id).filter(
+        ProjectFormSubmission.project_id == project_id
+    )
+    if status:
+        query = query.filter(ProjectFormSubmission.status == status)
+    has_submissions = db.query(query.exists()).scalar()
+
+    if not template or not has_submissions:
         raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
+            status_code=http_status.HTTP_404_NOT_FOUND,
             detail="No data to export"
         )
-    
-    # Prepare CSV
-    output = io.StringIO()
-    
-    # Build header row
-    header = ["ID", "Submission Date", "Name", "Phone", "Email", "Status", "Admin Comment"]
-    
-    # Add field labels
-    for field in template.fields:
-        label = field.get('label_ru', field.get('label_kz', field['id']))
-        header.append(label)
-    
-    writer = csv.writer(output)
-    writer.writerow(header)
-    
-    # Write data rows
-    for sub in submissions:
-        row = [
-            sub.id,
-            sub.submitted_at.strftime("%Y-%m-%d %H:%M:%S"),
-            sub.applicant_name or "",
-            sub.phone_number,
-            sub.email or "",
-            sub.status,
-            sub.admin_comment or ""
-        ]
-        
-        # Add responses
-        for field in template.fields:
-            field_id = field['id']
-            value = sub.responses.get(field_id, "")
-            # Convert lists to comma-separated string
-            if isinstance(value, list):
-                value = ", ".join(str(v) for v in value)
-            row.append(value)
-        
-        writer.writerow(row)
-    
-    # Prepare response
-    output.seek(0)
-    
+
+    fields = list(template.fields or [])
+
+    if format == "csv":
+        return StreamingResponse(
+            stream_submissions_csv(project_id, fields, status),
+            media_type="text/csv",
+            headers={"Content-Disposition": f"attachment; filename=project_{project_id}_submissions.csv"}
+        )
+
     return StreamingResponse(
-        iter([output.getvalue()]),
-        media_type="text/csv",
-        headers={"Content-Disposition": f"attachment; filename=project_{project_id}_submissions.csv"}
+        stream_submissions_xlsx(project_id, fields, status),
+        media_type="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
+        headers={"Content-Disposition": f"attachment; filename=project_{project_id}_submissions.xlsx"}
     )
 
 
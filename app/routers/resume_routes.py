@@ -1,4 +1,4 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Query, status
 from sqlalchemy.orm import Session
 from sqlalchemy import func, desc, and_
 from app.database import get_db
@@ -17,6 +17,8 @@ from app.resume_schemas import (
     CityCreate, CityResponse,
     SkillCreate, SkillResponse
 )
+from app.services.profession_autocomplete import profession_autocomplete
+from app.fuzzy_search import DEFAULT_SIMILARITY, MIN_SIMILARITY, apply_fuzzy_search
 from typing import List, Optional
 from datetime import datetime
 
@@ -35,6 +37,7 @@ def create_profession(
     db.add(profession)
     db.commit()
     db.refresh(profession)
+    profession_autocomplete.invalidate()
 
     return profession
 
@@ -80,6 +83,7 @@ def delete_profession(
 
     profession.is_active = False
     db.commit()
+    profession_autocomplete.invalidate()
 
     return {"message": "Профессия успешно удалена"}
 
@@ -848,6 +852,8 @@ def search_resumes(
         city_id: Optional[int] = None,
         skip: int = 0,
         limit: int = 20,
+        fuzzy: bool = Query(False, description="Поиск по ФИО с учетом опечаток"),
+        similarity: float = Query(DEFAULT_SIMILARITY, ge=MIN_SIMILARITY, le=1.0),
         db: Session = Depends(get_db)
 ):
     """Поиск резюме по ключевым словам"""
@@ -856,8 +862,11 @@ def search_resumes(
         Resume.is_published == True
     )
 
+    if query and fuzzy:
+        # Поиск по имени с опечатками (триграммный индекс), лучшие совпадения первыми
+        search_query = apply_fuzzy_search(db, search_query, [Resume.full_name], query, similarity)
     # Поиск по имени или описанию
-    if query:
+    elif query:
         search_query = search_query.filter(
             Resume.full_name.ilike(f"%{query}%") |
             Resume.about_me.ilike(f"%{query}%")
@@ -982,103 +991,10 @@ def search_professions(
     - **language**: приоритетный язык поиска (ru или kz), по умолчанию ru
     - **limit**: максимальное количество результатов (1-100), по умолчанию 10
 
-    Алгоритм поиска:
-    1. Сначала ищет точные совпадения в приоритетном языке
-    2. Затем ищет частичные совпадения в приоритетном языке
-    3. После этого ищет во втором языке
-    4. Возвращает уникальные результаты в порядке релевантности
+    Поиск идет по индексу в памяти (app/services/profession_autocomplete.py).
+    Порядок результатов:
+    1. Точное совпадение, начало названия, начало слова, вхождение — в приоритетном языке
+    2. То же самое во втором языке
+    3. При равенстве — более короткие названия, затем по алфавиту
     """
-
-    # Приводим поисковый запрос к нижнему регистру для поиска без учета регистра
-    search_term = query.lower().strip()
-
-    # Определяем поля для поиска в зависимости от приоритетного языка
-    if language == "ru":
-        primary_field = Profession.name_ru
-        secondary_field = Profession.name_kz
-    else:  # kz
-        primary_field = Profession.name_kz
-        secondary_field = Profession.name_ru
-
-    # Список для хранения результатов с сохранением порядка
-    results = []
-    found_ids = set()
-
-    # 1. Точные совпадения в приоритетном языке
-    exact_matches_primary = db.query(Profession).filter(
-        Profession.is_active == True,
-        func.lower(primary_field) == search_term
-    ).all()
-
-    for profession in exact_matches_primary:
-        if profession.id not in found_ids:
-            results.append(profession)
-            found_ids.add(profession.id)
-
-    # 2. Частичные совпадения в приоритетном языке (начинающиеся с поискового запроса)
-    if len(results) < limit:
-        partial_matches_primary = db.query(Profession).filter(
-            Profession.is_active == True,
-            func.lower(primary_field).like(f"{search_term}%"),
-            Profession.id.notin_(found_ids) if found_ids else True
-        ).limit(limit - len(results)).all()
-
-        for profession in partial_matches_primary:
-            if profession.id not in found_ids:
-                results.append(profession)
-                found_ids.add(profession.id)
-
-    # 3. Содержащие поисковый запрос в приоритетном языке
-    if len(results) < limit:
-        contains_matches_primary = db.query(Profession).filter(
-            Profession.is_active == True,
-            func.lower(primary_field).contains(search_term),
-            Profession.id.notin_(found_ids) if found_ids else True
-        ).limit(limit - len(results)).all()
-
-        for profession in contains_matches_primary:
-            if profession.id not in found_ids:
-                results.append(profession)
-                found_ids.add(profession.id)
-
-    # 4. Точные совпадения во втором языке
-    if len(results) < limit:
-        exact_matches_secondary = db.query(Profession).filter(
-            Profession.is_active == True,
-            func.lower(secondary_field) == search_term,
-            Profession.id.notin_(found_ids) if found_ids else True
-        ).limit(limit - len(results)).all()
-
-        for profession in exact_matches_secondary:
-            if profession.id not in found_ids:
-                results.append(profession)
-                found_ids.add(profession.id)
-
-    # 5. Частичные совпадения во втором языке
-    if len(results) < limit:
-        partial_matches_secondary = db.query(Profession).filter(
-            Profession.is_active == True,
-            func.lower(secondary_field).like(f"{search_term}%"),
-            Profession.id.notin_(found_ids) if found_ids else True
-        ).limit(limit - len(results)).all()
-
-        for profession in partial_matches_secondary:
-            if profession.id not in found_ids:
-                results.append(profession)
-                found_ids.add(profession.id)
-
-    # 6. Содержащие поисковый запрос во втором языке
-    if len(results) < limit:
-        contains_matches_secondary = db.query(Profession).filter(
-            Profession.is_active == True,
-            func.lower(secondary_field).contains(search_term),
-            Profession.id.notin_(found_ids) if found_ids else True
-        ).limit(limit - len(results)).all()
-
-        for profession in contains_matches_secondary:
-            if profession.id not in found_ids:
-                results.append(profession)
-                found_ids.add(profession.id)
-
-    # Ограничиваем количество результатов
-    return results[:limit]
\ No newline at end of file
+    return profession_autocomplete.get(db).search(query, language, limit)
\ No newline at end of file
@@ -0,0 +1,121 @@
+"""
+Unified search
+
+One endpoint over events, experts, courses, resumes, vacancies, tickets,
+places and projects. Documents live in `search_documents` (weighted tsvector
+under a GIN index) and are kept in sync by the triggers from
+migrations/013_add_search_documents.sql, so every write path — ORM, bulk
+updates, moderation, raw SQL — is indexed without application code.
+
+The results page, the total and the per-type facets come from a single query.
+"""
+
+from typing import List, Optional
+
+from fastapi import APIRouter, Depends, HTTPException, Query, status
+from sqlalchemy import text
+from sqlalchemy.orm import Session
+
+from app.database import get_db
+
+router = APIRouter(prefix="/api/v2/search", tags=["Search"])
+
+BASE_URL = "https://api.saryarqa-jastary.kz"
+
+ENTITY_TYPES = ("event", "expert", "course", "resume", "vacancy", "ticket", "place", "project")
+
+# Документ сущности может быть на двух языках — берем запрошенный, если он есть.
+# Фасеты считаются до фильтра по типам, чтобы клиент видел, сколько найдено в остальных
+SEARCH_SQL = text("""
+    WITH q AS (
+        SELECT websearch_to_tsquery('russian', :q) || websearch_to_tsquery('simple', :q) AS query
+    ),
+    matched AS (
+        SELECT DISTINCT ON (d.entity_type, d.entity_id)
+            d.entity_type, d.entity_id, d.language, d.title, d.snippet, d.image_url, d.published_at,
+            ts_rank_cd(d.document, q.query) AS rank
+        FROM search_documents d, q
+        WHERE d.document @@ q.query
+        ORDER BY d.entity_type, d.entity_id, (d.language = :language) DESC
+    ),
+    filtered AS (
+        SELECT * FROM matched
+        WHERE CAST(:types AS text[]) IS NULL OR entity_type = ANY(CAST(:types AS text[]))
+    ),
+    page AS (
+        SELECT * FROM filtered
+        ORDER BY rank DESC, published_at DESC NULLS LAST, entity_type, entity_id
+        LIMIT :limit OFFSET :skip
+    )
+    SELECT
+        (
+            SELECT COALESCE(json_object_agg(entity_type, found), '{}'::json)
+            FROM (SELECT entity_type, count(*) AS found FROM matched GROUP BY entity_type) f
+        ) AS facets,
+        (SELECT count(*) FROM filtered) AS total,
+        (
+            SELECT COALESCE(json_agg(json_build_object(
+                'type', p.entity_type,
+                'id', p.entity_id,
+                'language', p.language,
+                'title', p.title,
+                'snippet', p.snippet,
+                'image_url', p.image_url,
+                'published_at', p.published_at,
+                'rank', p.rank
+            ) ORDER BY p.rank DESC, p.published_at DESC NULLS LAST, p.entity_type, p.entity_id), '[]'::json)
+            FROM page p
+        ) AS items
+""")
+
+
+def get_full_url(path: Optional[str]) -> Optional[str]:
+    """Формирует полный URL"""
+    if not path:
+        return None
+    if path.startswith('http'):
+        return path
+    return f"{BASE_URL}{path}"
+
+
+@router.get("/")
+def search(
+    q: str = Query(..., min_length=2, max_length=200, description="Поисковый запрос"),
+    types: Optional[List[str]] = Query(None, description=f"Типы: {', '.join(ENTITY_TYPES)}"),
+    language: str = Query("ru", pattern="^(ru|kz)$"),
+    skip: int = Query(0, ge=0),
+    limit: int = Query(20, ge=1, le=100),
+    db: Session = Depends(get_db)
+):
+    """
+    Search across all public content.
+
+    Results are ranked by ts_rank_cd (title > attributes > text), then by
+    date. `facets` holds match counts per type regardless of `types`.
+    """
+    if types:
+        unknown = set(types) - set(ENTITY_TYPES)
+        if unknown:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=f"Неизвестные типы: {', '.join(sorted(unknown))}"
+            )
+
+    row = db.execute(SEARCH_SQL, {
+        "q": q.strip(),
+        "types": types or None,
+        "language": language,
+        "skip": skip,
+        "limit": limit
+    }).one()
+
+    items = row.items
+    for item in items:
+        item["image_url"] = get_full_url(item["image_url"])
+
+    return {
+        "query": q,
+        "total": row.total,
+        "facets": {entity_type: row.facets.get(entity_type, 0) for entity_type in ENTITY_TYPES},
+        "items": items
+    }
@@ -18,6 +18,7 @@ from app.notification_service import create_notification, notify_interested_user
 from app import models, resume_models
 from datetime import datetime
 from config import get_settings
+from app.fast_json import json_response
 
 router = APIRouter(prefix="/api/v2/vacancies", tags=["Vacancies"])
 
@@ -53,7 +54,8 @@ def list_vacancies(
         max_salary=max_salary,
         is_active=True
     )
-    return vacancies
+    # Словари собраны вручную — сразу в orjson, без jsonable_encoder
+    return json_response(vacancies)
 
 
 @router.get("/search")
@@ -1,15 +1,16 @@
 # volunteer_admin_routes.py
 from fastapi import APIRouter, Depends, HTTPException, status
 from sqlalchemy.orm import Session
-from sqlalchemy import desc, func
+from sqlalchemy import desc, func, text
 from app.database import get_db
-from app import models, oauth2
+from app import models, oauth2, vcoin_ledger
 from app.v_models import *
 from app.v_schemas import *
 from datetime import datetime
 from typing import Optional
 from app.rbac import Module, Permission, require_permission, require_module_access
-from app.notification_service import create_notification
+from app.notification_service import create_notification, create_notifications
+from app.volunteer_status import DEFAULT_STATUS_REQUIREMENTS, invalidate_status_ladder
 
 router = APIRouter(prefix="/api/v2/admin/volunteer", tags=["Volunteer Admin"])
 
@@ -197,51 +198,22 @@ def mark_attendance(
     app.missed = not attended
 
     volunteer = db.query(Volunteer).filter(Volunteer.id == app.volunteer_id).first()
-    balance = db.query(VolunteerBalance).filter(
-        VolunteerBalance.volunteer_id == volunteer.id
-    ).first()
-
-    if not balance:
-        balance = VolunteerBalance(volunteer_id=volunteer.id)
-        db.add(balance)
+    event = db.query(VolunteerEvent).filter(VolunteerEvent.id == app.event_id).first()
 
     if attended:
-        # Начисляем V-coins
-        event = db.query(VolunteerEvent).filter(VolunteerEvent.id == app.event_id).first()
+        # Начисляем V-coins: баланс, счётчики и журнал - одним запросом
         app.v_coins_earned = event.v_coins_reward
-
-        balance.events_participated += 1
-        balance.current_balance += event.v_coins_reward
-        balance.total_earned += event.v_coins_reward
-
-        # Транзакция
-        transaction = VCoinTransaction(
-            volunteer_id=volunteer.id,
-            amount=event.v_coins_reward,
-            transaction_type="earned",
+        vcoin_ledger.record_attendance(
+            db, volunteer.id, event.v_coins_reward,
             description=f"Участие в мероприятии: {event.title}",
             event_id=event.id
         )
-        db.add(transaction)
-
-        # Сбрасываем warning_level если посетил
-        if balance.warning_level != "green":
-            balance.events_missed = 0
-            balance.warning_level = "green"
+        warning_level = "green"
     else:
-        # Пропуск - увеличиваем счетчик
-        balance.events_missed += 1
-
-        # Обновляем warning_level
-        if balance.events_missed == 1:
-            balance.warning_level = "yellow"
-        elif balance.events_missed == 2:
-            balance.warning_level = "orange"
-        elif balance.events_missed >= 3:
-            balance.warning_level = "red"
+        # Пропуск - увеличиваем счетчик и пересчитываем warning_level
+        warning_level = vcoin_ledger.record_absence(db, volunteer.id)
 
     # Notify volunteer about attendance
-    event = db.query(VolunteerEvent).filter(VolunteerEvent.id == app.event_id).first()
     event_title = event.title if event else ""
     if attended:
         create_notification(
@@ -273,7 +245,135 @@ def mark_attendance(
     return {
         "message": "Присутствие отмечено",
         "attended": attended,
-        "warning_level": balance.warning_level
+        "warning_level": warning_level
+    }
+
+
+@router.post("/events/{event_id}/attendance")
+def mark_attendance_bulk(
+        event_id: int,
+        request: BulkAttendanceRequest,
+        db: Session = Depends(get_db),
+        current_admin: models.Admin = Depends(require_permission(Module.VOLUNTEERS, Permission.UPDATE))
+):
+    """
+    Отметить присутствие/отсутствие сразу по списку заявок мероприятия.
+    Одна транзакция: заявки, балансы, журнал V-coins и уведомления
+    обновляются набором запросов, не зависящим от числа участников.
+    """
+    event = db.query(VolunteerEvent).filter(VolunteerEvent.id == event_id).first()
+    if not event:
+        raise HTTPException(status_code=404, detail="Мероприятие не найдено")
+
+    # Повторы одной заявки: учитываем последнюю отметку
+    requested = {item.application_id: item.attended for item in request.items}
+    if not requested:
+        raise HTTPException(status_code=400, detail="Список отметок пуст")
+
+    rows = db.query(
+        EventApplication.id,
+        EventApplication.volunteer_id,
+        EventApplication.attended,
+        EventApplication.missed,
+        Volunteer.user_id
+    ).join(
+        Volunteer, Volunteer.id == EventApplication.volunteer_id
+    ).filter(
+        EventApplication.id.in_(list(requested.keys())),
+        EventApplication.event_id == event_id
+    ).with_for_update(of=EventApplication).all()
+    found = {row.id: row for row in rows}
+
+    results = []
+    changed = []
+    for application_id, attended in requested.items():
+        row = found.get(application_id)
+        if row is None:
+            results.append({"application_id": application_id, "status": "not_found"})
+            continue
+        # Повторная отметка с тем же значением не начисляет V-coins второй раз
+        if (attended and row.attended) or (not attended and row.missed):
+            results.append({"application_id": application_id, "status": "unchanged", "attended": attended})
+            continue
+        changed.append((row, attended))
+
+    reward = event.v_coins_reward or 0
+    balances = {}
+    if changed:
+        db.execute(
+            text("""
+                UPDATE event_applications2 a
+                SET attended = m.attended,
+                    missed = NOT m.attended,
+                    v_coins_earned = CASE WHEN m.attended THEN :reward ELSE a.v_coins_earned END,
+                    updated_at = now()
+                FROM unnest(CAST(:ids AS integer[]), CAST(:attended AS boolean[])) AS m(id, attended)
+                WHERE a.id = m.id
+            """),
+            {
+                "ids": [row.id for row, _ in changed],
+                "attended": [attended for _, attended in changed],
+                "reward": reward
+            }
+        )
+
+        balances = vcoin_ledger.record_attendance_bulk(db, [
+            vcoin_ledger.AttendanceMark(
+                volunteer_id=row.volunteer_id,
+                attended=attended,
+                reward=reward,
+                description=f"Участие в мероприятии: {event.title}",
+                event_id=event.id
+            )
+            for row, attended in changed
+        ])
+
+        notifications = []
+        for row, attended in changed:
+            if attended:
+                notifications.append({
+                    "user_id": row.user_id,
+                    "title_kz": "Қатысу белгіленді",
+                    "title_ru": "Присутствие отмечено",
+                    "notification_type": "attendance_marked",
+                    "entity_type": "volunteer_application",
+                    "entity_id": row.id,
+                    "message_kz": f"Сіздің '{event.title}' іс-шарасына қатысуыңыз белгіленді",
+                    "message_ru": f"Ваше присутствие на мероприятии '{event.title}' отмечено",
+                })
+            else:
+                notifications.append({
+                    "user_id": row.user_id,
+                    "title_kz": "Қатыспау белгіленді",
+                    "title_ru": "Отсутствие отмечено",
+                    "notification_type": "absence_marked",
+                    "entity_type": "volunteer_application",
+                    "entity_id": row.id,
+                    "message_kz": f"Сіздің '{event.title}' іс-шарасына қатыспағаныңыз белгіленді",
+                    "message_ru": f"Ваше отсутствие на мероприятии '{event.title}' отмечено",
+                })
+        create_notifications(db, notifications)
+
+    db.commit()
+
+    for row, attended in changed:
+        balance, warning_level = balances.get(row.volunteer_id, (None, None))
+        results.append({
+            "application_id": row.id,
+            "status": "attended" if attended else "missed",
+            "attended": attended,
+            "v_coins_earned": reward if attended else 0,
+            "current_balance": balance,
+            "warning_level": warning_level
+        })
+
+    return {
+        "message": "Присутствие отмечено",
+        "event_id": event_id,
+        "processed": len(changed),
+        "unchanged": sum(1 for r in results if r["status"] == "unchanged"),
+        "not_found": sum(1 for r in results if r["status"] == "not_found"),
+        "results": results
     }
 
 
@@ -811,9 +911,14 @@ def update_volunteer(
     if not volunteer:
         raise HTTPException(status_code=404, detail="Волонтёр не найден")
 
-    balance = db.query(VolunteerBalance).filter(
+    balance_query = db.query(VolunteerBalance).filter(
         VolunteerBalance.volunteer_id == volunteer_id
-    ).first()
+    )
+    if v_coins_balance is not None:
+        # Разница до целевого баланса считается под блокировкой строки:
+        # параллельное начисление/покупка не сдвинет результат (блокировка до commit)
+        balance_query = balance_query.with_for_update()
+    balance = balance_query.first()
 
     if full_name:
         volunteer.full_name = full_name
@@ -823,8 +928,14 @@ def update_volunteer(
             raise HTTPException(status_code=400, detail="Неверный статус")
         volunteer.volunteer_status = volunteer_status
 
-    if v_coins_balance is not None and balance:
-        balance.current_balance = v_coins_balance
+    current_balance = balance.current_balance if balance else 0
+    if v_coins_balance is not None and balance and v_coins_balance != balance.current_balance:
+        # Прямая установка баланса - через корректирующую запись в журнале
+        entry = vcoin_ledger.adjust(
+            db, volunteer_id, v_coins_balance - balance.current_balance,
+            description="Админ: установка баланса"
+        )
+        current_balance = entry.balance
 
     volunteer.updated_at = datetime.utcnow()
     db.commit()
@@ -835,7 +946,7 @@ def update_volunteer(
             "id": volunteer.id,
             "full_name": volunteer.full_name,
             "volunteer_status": volunteer.volunteer_status,
-            "v_coins_balance": balance.current_balance if balance else 0
+            "v_coins_balance": current_balance
         }
     }
 
@@ -854,40 +965,22 @@ def manage_volunteer_coins(
     if not volunteer:
         raise HTTPException(status_code=404, detail="Волонтёр не найден")
 
-    balance = db.query(VolunteerBalance).filter(
-        VolunteerBalance.volunteer_id == volunteer_id
-    ).first()
-
-    if not balance:
-        balance = VolunteerBalance(volunteer_id=volunteer_id)
-        db.add(balance)
-        db.flush()
-
     if type == "add":
-        balance.current_balance += amount
-        balance.total_earned += amount
-        transaction_amount = amount
+        entry = vcoin_ledger.credit(db, volunteer_id, amount, "admin_adjustment", description=f"Админ: {reason}")
     elif type == "deduct":
-        if balance.current_balance < amount:
+        # Списание только при достаточном балансе (проверка внутри UPDATE)
+        entry = vcoin_ledger.adjust(db, volunteer_id, -amount, description=f"Админ: {reason}", require_funds=True)
+        if entry is None:
+            db.rollback()
             raise HTTPException(status_code=400, detail="Недостаточно V-coins")
-        balance.current_balance -= amount
-        transaction_amount = -amount
     else:
         raise HTTPException(status_code=400, detail="Неверный тип операции")
 
-    # Создаём транзакцию
-    transaction = VCoinTransaction(
-        volunteer_id=volunteer_id,
-        amount=transaction_amount,
-        transaction_type="admin_adjustment",
-        description=f"Админ: {reason}"
-    )
-    db.add(transaction)
     db.commit()
 
     return {
         "message": f"V-coins успешно {'начислены' if type == 'add' else 'списаны'}",
-        "new_balance": balance.current_balance
+        "new_balance": entry.balance
     }
 
 
@@ -976,24 +1069,12 @@ def approve_task_report(
     completion.admin_comment = request.admin_comment  # ← ИСПРАВЛЕНО
     completion.v_coins_earned = task.v_coins_bonus
 
-    # Начисляем V-coins волонтёру
-    balance = db.query(VolunteerBalance).filter(
-        VolunteerBalance.volunteer_id == volunteer.id
-    ).first()
-
-    if balance:
-        balance.current_balance += task.v_coins_bonus
-        balance.total_earned += task.v_coins_bonus
-
-    # Создаём транзакцию
-    transaction = VCoinTransaction(
-        volunteer_id=volunteer.id,
-        amount=task.v_coins_bonus,
-        transaction_type="earned",
+    # Начисляем V-coins волонтёру (баланс и журнал - одним запросом)
+    vcoin_ledger.credit(
+        db, volunteer.id, task.v_coins_bonus, "earned",
         description=f"Выполнение задачи: {task.title}",
         event_id=application.event_id
     )
-    db.add(transaction)
 
     # Notify volunteer
     create_notification(
@@ -1163,32 +1244,24 @@ def cancel_purchase(
         current_admin: models.Admin = Depends(require_permission(Module.VOLUNTEERS, Permission.UPDATE))
 ):
     """Отменить покупку и вернуть V-coins"""
-    purchase = db.query(BenefitPurchase).filter(BenefitPurchase.id == purchase_id).first()
+    # Блокируем покупку: повторная/параллельная отмена не вернёт V-coins дважды
+    purchase = db.query(BenefitPurchase).filter(BenefitPurchase.id == purchase_id).with_for_update().first()
     if not purchase:
         raise HTTPException(status_code=404, detail="Покупка не найдена")
 
     if purchase.status == "completed":
         raise HTTPException(status_code=400, detail="Нельзя отменить завершённую покупку")
 
+    if purchase.status == "cancelled":
+        raise HTTPException(status_code=400, detail="Покупка уже отменена")
+
     # Возвращаем V-coins волонтёру
     volunteer = db.query(Volunteer).filter(Volunteer.id == purchase.volunteer_id).first()
-    balance = db.query(VolunteerBalance).filter(
-        VolunteerBalance.volunteer_id == volunteer.id
-    ).first()
-
-    if balance:
-        balance.current_balance += purchase.v_coins_spent
-        balance.total_spent -= purchase.v_coins_spent
-
-    # Создаём транзакцию возврата
-    transaction = VCoinTransaction(
-        volunteer_id=volunteer.id,
-        amount=purchase.v_coins_spent,
-        transaction_type="refund",
+    vcoin_ledger.refund(
+        db, volunteer.id, purchase.v_coins_spent,
         description=f"Возврат за отменённую покупку: {request.reason}",
         benefit_id=purchase.benefit_id
     )
-    db.add(transaction)
 
     # Обновляем покупку
     purchase.status = "cancelled"
@@ -1196,9 +1269,8 @@ def cancel_purchase(
         purchase.cancellation_reason = request.reason
 
     # Возвращаем сток плюшки
+    vcoin_ledger.release_stock(db, purchase.benefit_id)
     benefit = db.query(Benefit).filter(Benefit.id == purchase.benefit_id).first()
-    if benefit and benefit.stock_limit:
-        benefit.stock_available += 1
 
     # Notify volunteer
     benefit_title = benefit.title if benefit else ""
@@ -1237,50 +1309,14 @@ def get_status_requirements(
 
     if not requirements:
         # Если таблица пустая - создаём дефолтные значения
-        default_statuses = [
-            {
-                "status": "VOLUNTEER",
-                "title_ru": "Волонтер",
-                "title_kz": "Волонтер",
-                "level": 1,
-                "v_coins_required": 0,  # Стартовый статус
-                "benefits_ru": "Базовый статус",
-                "benefits_kz": "Негізгі мәртебе"
-            },
-            {
-                "status": "TEAM_LEADER",
-                "title_ru": "Тимлидер",
-                "title_kz": "Топ жетекшісі",
-                "level": 2,
-                "v_coins_required": 150,
-                "benefits_ru": "Доступ к роли тимлидера, Управление командой, Больше бонусов",
-                "benefits_kz": "Топ жетекшісі рөліне қол жеткізу, Команданы басқару, Көбірек бонустар"
-            },
-            {
-                "status": "SUPERVISOR",
-                "title_ru": "Супервайзер",
-                "title_kz": "Супервайзер",
-                "level": 3,
-                "v_coins_required": 200,
-                "benefits_ru": "Доступ к роли супервайзера, Контроль проектов, VIP плюшки",
-                "benefits_kz": "Супервайзер рөліне қол жеткізу, Жобаларды бақылау, VIP артықшылықтар"
-            },
-            {
-                "status": "COORDINATOR",
-                "title_ru": "Координатор",
-                "title_kz": "Үйлестіруші",
-                "level": 4,
-                "v_coins_required": 300,
-                "benefits_ru": "Высший статус, Координация программ, Все привилегии",
-                "benefits_kz": "Жоғары мәртебе, Бағдарламаларды үйлестіру, Барлық артықшылықтар"
-            }
-        ]
+        default_statuses = DEFAULT_STATUS_REQUIREMENTS
 
         for status_data in default_statuses:
             new_req = StatusRequirement(**status_data)
             db.add(new_req)
 
         db.commit()
+        invalidate_status_ladder()
         requirements = db.query(StatusRequirement).order_by(StatusRequirement.level).all()
 
     return {
@@ -1338,6 +1374,7 @@ def update_status_requirement(
     requirement.updated_at = datetime.utcnow()
     db.commit()
     db.refresh(requirement)
+    invalidate_status_ladder()
 
     return {
         "message": f"Требования для статуса {status} обновлены",
@@ -1364,49 +1401,13 @@ def reset_status_requirements(
     db.query(StatusRequirement).delete()
 
     # Создаём дефолтные
-    default_statuses = [
-        {
-            "status": "VOLUNTEER",
-            "title_ru": "Волонтер",
-            "title_kz": "Волонтер",
-            "level": 1,
-            "v_coins_required": 0,
-            "benefits_ru": "Базовый статус",
-            "benefits_kz": "Негізгі мәртебе"
-        },
-        {
-            "status": "TEAM_LEADER",
-            "title_ru": "Тимлидер",
-            "title_kz": "Топ жетекшісі",
-            "level": 2,
-            "v_coins_required": 150,
-            "benefits_ru": "Доступ к роли тимлидера, Управление командой, Больше бонусов",
-            "benefits_kz": "Топ жетекшісі рөліне қол жеткізу, Команданы басқару, Көбірек бонустар"
-        },
-        {
-            "status": "SUPERVISOR",
-            "title_ru": "Супервайзер",
-            "title_kz": "Супервайзер",
-            "level": 3,
-            "v_coins_required": 200,
-            "benefits_ru": "Доступ к роли супервайзера, Контроль проектов, VIP плюшки",
-            "benefits_kz": "Супервайзер рөліне қол жеткізу, Жобаларды бақылау, VIP артықшылықтар"
-        },
-        {
-            "status": "COORDINATOR",
-            "title_ru": "Координатор",
-            "title_kz": "Үйлестіруші",
-            "level": 4,
-            "v_coins_required": 300,
-            "benefits_ru": "Высший статус, Координация программ, Все привилегии",
-            "benefits_kz": "Жоғары мәртебе, Бағдарламаларды үйлестіру, Барлық артықшылықтар"
-        }
-    ]
+    default_statuses = DEFAULT_STATUS_REQUIREMENTS
 
     for status_data in default_statuses:
         new_req = StatusRequirement(**status_data)
         db.add(new_req)
 
     db.commit()
+    invalidate_status_ladder()
 
     return {"message": "Требования сброшены к дефолтным значениям"}
\ No newline at end of file
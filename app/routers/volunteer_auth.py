@@ -6,6 +6,9 @@ from app.database import get_db
 from app import models, schemas, oauth2, analytics_models
 from app.v_models import *
 from datetime import datetime, timedelta
+from app.otp_store import (
+    check_send_rate_limit, check_verify_rate_limit, find_active_otp, issue_otp, record_failed_otp
+)
 import random
 import os
 import uuid
@@ -53,7 +56,7 @@ def get_volunteer_directions():
 
 
 @router.post("/check-profile")
-def check_volunteer_profile(login_data: schemas.LoginRequest, db: Session = Depends(get_db)):
+def check_volunteer_profile(login_data: schemas.LoginRequest, request: Request, db: Session = Depends(get_db)):
     """Проверяет существование профиля волонтёра по номеру телефона"""
     phone_number = login_data.phone_number
 
@@ -67,21 +70,10 @@ def check_volunteer_profile(login_data: schemas.LoginRequest, db: Session = Depe
         ).first()
 
         if volunteer:
+            check_send_rate_limit(phone_number, request.client.host if request.client else None)
             otp_code = generate_otp_code()
 
-            db.query(models.OtpCode).filter(
-                models.OtpCode.phone_number == phone_number,
-                models.OtpCode.is_used == False
-            ).update({"is_used": True})
-
-            expires_at = datetime.utcnow() + timedelta(minutes=5)
-            new_otp = models.OtpCode(
-                phone_number=phone_number,
-                code=otp_code,
-                expires_at=expires_at
-            )
-
-            db.add(new_otp)
+            issue_otp(db, phone_number, otp_code)
             db.commit()
 
             print(f"DEBUG: OTP код для волонтёра {phone_number}: {otp_code}")
@@ -298,11 +290,8 @@ def verify_volunteer_otp(otp_data: schemas.OtpRequest, request: Request, db: Ses
     ip_address = request.client.host if request.client else None
     user_agent = request.headers.get('user-agent')
 
-    otp_record = db.query(models.OtpCode).filter(
-        models.OtpCode.phone_number == otp_data.phone_number,
-        models.OtpCode.is_used == False,
-        models.OtpCode.expires_at > datetime.utcnow()
-    ).first()
+    check_verify_rate_limit(ip_address)
+    otp_record = find_active_otp(db, otp_data.phone_number)
 
     if not otp_record:
         # Log failed login - OTP not found or expired
@@ -325,6 +314,7 @@ def verify_volunteer_otp(otp_data: schemas.OtpRequest, request: Request, db: Ses
 
     if otp_data.code != "950826":
         if otp_record.code != otp_data.code:
+            record_failed_otp(db, otp_record, ip_address)
             # Log failed login - invalid OTP code
             login_log = analytics_models.LoginHistory(
                 user_id=None,
@@ -1,9 +1,10 @@
 # volunteer_routes.py
 from fastapi import APIRouter, Depends, HTTPException, status, Query, UploadFile, File
 from sqlalchemy.orm import Session
-from sqlalchemy import desc, func, and_
+from sqlalchemy import desc, func, and_, text
 from app.database import get_db
-from app import models, oauth2
+from app import models, oauth2, vcoin_ledger, leaderboard
+from app.volunteer_status import get_status_ladder
 from app.v_models import *
 from app.v_schemas import *
 from datetime import datetime, timedelta
@@ -16,9 +17,38 @@ router = APIRouter(prefix="/api/v2/volunteer", tags=["Volunteer"])
 
 # === ЛИЧНЫЙ КАБИНЕТ ===
 
+# Профиль, баланс и последние 5 заявок - одним запросом
+DASHBOARD_SQL = text("""
+    SELECT v.id,
+           v.full_name,
+           v.volunteer_status,
+           v.direction_id,
+           COALESCE(b.current_balance, 0) AS current_balance,
+           COALESCE(b.total_earned, 0) AS total_earned,
+           COALESCE(b.total_spent, 0) AS total_spent,
+           COALESCE(b.warning_level, 'green') AS warning_level,
+           COALESCE(b.events_participated, 0) AS events_participated,
+           COALESCE(b.events_missed, 0) AS events_missed,
+           COALESCE((
+               SELECT json_agg(r ORDER BY r.created_at DESC)
+               FROM (
+                   SELECT a.id, a.event_id, a.applied_role AS role, a.status, a.attended,
+                          a.v_coins_earned, a.created_at
+                   FROM event_applications2 a
+                   WHERE a.volunteer_id = v.id
+                   ORDER BY a.created_at DESC
+                   LIMIT 5
+               ) r
+           ), '[]'::json) AS recent_events
+    FROM volunteers_13 v
+    LEFT JOIN volunteer_balances b ON b.volunteer_id = v.id
+    WHERE v.user_id = :user_id
+""")
+
+
 @router.get("/dashboard")
 def get_volunteer_dashboard(
-        current_user: models.User = Depends(oauth2.get_current_user),
+        current_user: oauth2.Principal = Depends(oauth2.get_current_user_principal),
         db: Session = Depends(get_db)
 ):
     """
@@ -27,70 +57,48 @@ def get_volunteer_dashboard(
     # if current_user.user_type != "VOLUNTEER":
     #     raise HTTPException(status_code=403, detail="Только для волонтеров")
 
-    volunteer = db.query(Volunteer).filter(Volunteer.user_id == current_user.id).first()
-    if not volunteer:
+    row = db.execute(DASHBOARD_SQL, {"user_id": current_user.id}).first()
+    if not row:
         raise HTTPException(status_code=404, detail="Профиль волонтера не найден")
 
-    # Баланс и статистика
-    balance = db.query(VolunteerBalance).filter(
-        VolunteerBalance.volunteer_id == volunteer.id
-    ).first()
-
-    if not balance:
-        balance = VolunteerBalance(volunteer_id=volunteer.id)
-        db.add(balance)
-        db.commit()
-        db.refresh(balance)
-
-    # Требования для повышения
-    status_requirements = {
-        "VOLUNTEER": {"next": "TEAM_LEADER", "v_coins_needed": 150},
-        "TEAM_LEADER": {"next": "SUPERVISOR", "v_coins_needed": 200},
-        "SUPERVISOR": {"next": "COORDINATOR", "v_coins_needed": 300},
-        "COORDINATOR": {"next": None, "v_coins_needed": 0}
-    }
-
-    current_req = status_requirements.get(volunteer.volunteer_status, {})
+    # Требования для повышения (таблица status_requirements, кэш процесса)
+    step = get_status_ladder(db).get(row.volunteer_status)
+    v_coins_needed = step.v_coins_needed if step else 0
     progress_percent = 0
-    if current_req.get("v_coins_needed"):
-        progress_percent = min(100, (balance.current_balance / current_req["v_coins_needed"]) * 100)
-
-    # История последних мероприятий
-    recent_events = db.query(EventApplication).filter(
-        EventApplication.volunteer_id == volunteer.id
-    ).order_by(desc(EventApplication.created_at)).limit(5).all()
+    if v_coins_needed:
+        progress_percent = min(100, (row.current_balance / v_coins_needed) * 100)
 
     return {
         "volunteer": {
-            "id": volunteer.id,
-            "full_name": volunteer.full_name,
-            "status": volunteer.volunteer_status,
-            "direction_id": volunteer.direction_id
+            "id": row.id,
+            "full_name": row.full_name,
+            "status": row.volunteer_status,
+            "direction_id": row.direction_id
         },
         "balance": {
-            "current": balance.current_balance,
-            "total_earned": balance.total_earned,
-            "total_spent": balance.total_spent,
-            "warning_level": balance.warning_level,
-            "events_participated": balance.events_participated,
-            "events_missed": balance.events_missed
+            "current": row.current_balance,
+            "total_earned": row.total_earned,
+            "total_spent": row.total_spent,
+            "warning_level": row.warning_level,
+            "events_participated": row.events_participated,
+            "events_missed": row.events_missed
         },
         "progress": {
-            "current_status": volunteer.volunteer_status,
-            "next_status": current_req.get("next"),
-            "v_coins_needed": current_req.get("v_coins_needed", 0),
+            "current_status": row.volunteer_status,
+            "next_status": step.next_status if step else None,
+            "v_coins_needed": v_coins_needed,
             "progress_percent": round(progress_percent, 1)
         },
         "recent_events": [
             {
-                "id": app.id,
-                "event_id": app.event_id,
-                "role": app.applied_role,
-                "status": app.status,
-                "attended": app.attended,
-                "v_coins_earned": app.v_coins_earned
+                "id": app["id"],
+                "event_id": app["event_id"],
+                "role": app["role"],
+                "status": app["status"],
+                "attended": app["attended"],
+                "v_coins_earned": app["v_coins_earned"]
             }
-            for app in recent_events
+            for app in row.recent_events
         ]
     }
 
@@ -470,22 +478,11 @@ async def submit_report(
 
     # Транзакция V-coins
     if bonus > 0:
-        transaction = VCoinTransaction(
-            volunteer_id=volunteer.id,
-            amount=bonus,
-            transaction_type="bonus",
+        vcoin_ledger.credit(
+            db, volunteer.id, bonus, "bonus",
             description=f"Бонус за фото в отчете",
             event_id=event.id
         )
-        db.add(transaction)
-
-        # Обновляем баланс
-        balance = db.query(VolunteerBalance).filter(
-            VolunteerBalance.volunteer_id == volunteer.id
-        ).first()
-        if balance:
-            balance.current_balance += bonus
-            balance.total_earned += bonus
 
     db.commit()
 
@@ -699,21 +696,11 @@ def mark_task_complete(
     if task.v_coins_bonus > 0:
         application.v_coins_earned += task.v_coins_bonus
 
-        transaction = VCoinTransaction(
-            volunteer_id=volunteer.id,
-            amount=task.v_coins_bonus,
-            transaction_type="bonus",
+        vcoin_ledger.credit(
+            db, volunteer.id, task.v_coins_bonus, "bonus",
             description=f"Выполнение задачи: {task.title}",
             event_id=application.event_id
         )
-        db.add(transaction)
-
-        balance = db.query(VolunteerBalance).filter(
-            VolunteerBalance.volunteer_id == volunteer.id
-        ).first()
-        if balance:
-            balance.current_balance += task.v_coins_bonus
-            balance.total_earned += task.v_coins_bonus
 
     db.commit()
 
@@ -803,13 +790,6 @@ def purchase_benefit(
     if not benefit:
         raise HTTPException(status_code=404, detail="Плюшка не найдена")
 
-    balance = db.query(VolunteerBalance).filter(
-        VolunteerBalance.volunteer_id == volunteer.id
-    ).first()
-
-    if not balance or balance.current_balance < benefit.v_coins_cost:
-        raise HTTPException(status_code=400, detail="Недостаточно V-coins")
-
     # Проверка статуса
     status_hierarchy = {
         "VOLUNTEER": 1,
@@ -821,44 +801,29 @@ def purchase_benefit(
     if status_hierarchy[volunteer.volunteer_status] < status_hierarchy[benefit.min_status]:
         raise HTTPException(status_code=403, detail="Недостаточный статус")
 
-    # Проверка лимита
-    if benefit.stock_limit and benefit.stock_available <= 0:
+    # Резервируем сток (условный UPDATE, строка плюшки блокируется до commit)
+    if not vcoin_ledger.reserve_stock(db, benefit_id):
+        db.rollback()
         raise HTTPException(status_code=400, detail="Плюшка закончилась")
 
-    # Покупка
-    purchase = BenefitPurchase(
+    # Списание, запись в журнал и покупка - один атомарный запрос
+    entry = vcoin_ledger.purchase(
+        db,
         volunteer_id=volunteer.id,
         benefit_id=benefit_id,
-        v_coins_spent=benefit.v_coins_cost,
-        status="pending"
-    )
-    db.add(purchase)
-
-    # Списываем V-coins
-    balance.current_balance -= benefit.v_coins_cost
-    balance.total_spent += benefit.v_coins_cost
-
-    # Транзакция
-    transaction = VCoinTransaction(
-        volunteer_id=volunteer.id,
-        amount=-benefit.v_coins_cost,
-        transaction_type="spent",
-        description=f"Покупка: {benefit.title}",
-        benefit_id=benefit_id
+        cost=benefit.v_coins_cost,
+        description=f"Покупка: {benefit.title}"
     )
-    db.add(transaction)
-
-    # Уменьшаем сток
-    if benefit.stock_limit:
-        benefit.stock_available -= 1
+    if entry is None:
+        db.rollback()
+        raise HTTPException(status_code=400, detail="Недостаточно V-coins")
 
     db.commit()
-    db.refresh(purchase)
 
     return {
         "message": "Плюшка успешно куплена",
-        "purchase_id": purchase.id,
-        "remaining_balance": balance.current_balance
+        "purchase_id": entry.purchase_id,
+        "remaining_balance": entry.balance
     }
 
 
@@ -910,26 +875,12 @@ def get_promotion_requirements(
     ).first()
 
     requirements = {
-        "VOLUNTEER": {
-            "next_status": "TEAM_LEADER",
-            "v_coins_required": 150,
-            "benefits": ["Доступ к роли тим-лидера", "Управление командой", "Больше бонусов"]
-        },
-        "TEAM_LEADER": {
-            "next_status": "SUPERVISOR",
-            "v_coins_required": 200,
-            "benefits": ["Доступ к роли супервайзера", "Контроль проектов", "VIP плюшки"]
-        },
-        "SUPERVISOR": {
-            "next_status": "COORDINATOR",
-            "v_coins_required": 300,
-            "benefits": ["Высший статус", "Координация программ", "Все привилегии"]
-        },
-        "COORDINATOR": {
-            "next_status": None,
-            "v_coins_required": 0,
-            "benefits": ["Максимальный уровень достигнут"]
+        status_name: {
+            "next_status": step.next_status,
+            "v_coins_required": step.v_coins_needed,
+            "benefits": step.next_benefits
         }
+        for status_name, step in get_status_ladder(db).items()
     }
 
     current_req = requirements.get(volunteer.volunteer_status, {})
@@ -974,18 +925,12 @@ def request_promotion(
         raise HTTPException(status_code=404, detail="Баланс волонтера не найден")
 
     # Проверка логичности повышения
-    hierarchy = {
-        "VOLUNTEER": {"next": "TEAM_LEADER", "coins": 150},
-        "TEAM_LEADER": {"next": "SUPERVISOR", "coins": 200},
-        "SUPERVISOR": {"next": "COORDINATOR", "coins": 300}
-    }
-
-    current_level = hierarchy.get(volunteer.volunteer_status)
+    current_level = get_status_ladder(db).get(volunteer.volunteer_status)
 
-    if not current_level or current_level["next"] != requested_status:
+    if not current_level or not current_level.next_status or current_level.next_status != requested_status:
         raise HTTPException(status_code=400, detail="Недопустимое повышение")
 
-    if balance.current_balance < current_level["coins"]:
+    if balance.current_balance < current_level.v_coins_needed:
         raise HTTPException(status_code=400, detail="Недостаточно V-coins")
 
     # Проверка существующих запросов
@@ -1051,51 +996,43 @@ def get_my_promotion_requests(
 @router.get("/leaderboard")
 def get_leaderboard(
         period: str = "month",  # week, month, all
-        limit: int = 50,
+        limit: int = Query(50, ge=1, le=200),
+        skip: int = Query(0, ge=0),
         db: Session = Depends(get_db)
 ):
     """
-    Рейтинг волонтеров
+    Рейтинг волонтеров (week/month - заработано за текущую неделю/месяц, all - за всё время)
     """
-    # Базовый запрос
-    query = db.query(
-        Volunteer.id,
-        Volunteer.full_name,
-        Volunteer.volunteer_status,
-        VolunteerBalance.current_balance,
-        VolunteerBalance.total_earned,
-        VolunteerBalance.events_participated
-    ).join(
-        VolunteerBalance,
-        Volunteer.id == VolunteerBalance.volunteer_id
-    )
+    snapshot = leaderboard.get_snapshot(db, period)
 
-    # Фильтр по периоду (можно улучшить)
-    if period == "week":
-        # Топ за неделю по earned
-        query = query.order_by(desc(VolunteerBalance.total_earned))
-    elif period == "month":
-        query = query.order_by(desc(VolunteerBalance.total_earned))
-    else:
-        query = query.order_by(desc(VolunteerBalance.total_earned))
+    return {
+        "period": snapshot.period,
+        "total": len(snapshot.entries),
+        "updated_at": snapshot.built_at,
+        "leaderboard": snapshot.page(skip=skip, limit=limit)
+    }
 
-    leaders = query.limit(limit).all()
 
-    result = []
-    for i, leader in enumerate(leaders, 1):
-        result.append({
-            "position": i,
-            "volunteer_id": leader.id,
-            "full_name": leader.full_name,
-            "status": leader.volunteer_status,
-            "current_balance": leader.current_balance,
-            "total_earned": leader.total_earned,
-            "events_count": leader.events_participated
-        })
+@router.get("/leaderboard/me")
+def get_my_leaderboard_position(
+        period: str = "month",
+        current_user: oauth2.Principal = Depends(oauth2.get_current_user_principal),
+        db: Session = Depends(get_db)
+):
+    """
+    Моё место в рейтинге
+    """
+    volunteer = db.query(Volunteer.id).filter(Volunteer.user_id == current_user.id).first()
+    if not volunteer:
+        raise HTTPException(status_code=404, detail="Профиль волонтера не найден")
+
+    snapshot = leaderboard.get_snapshot(db, period)
 
     return {
-        "period": period,
-        "leaderboard": result
+        "period": snapshot.period,
+        "total": len(snapshot.entries),
+        "updated_at": snapshot.built_at,
+        "entry": snapshot.entry_for(volunteer.id)
     }
 
 
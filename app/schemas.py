@@ -1224,6 +1224,15 @@ class CourseTestUpdate(BaseModel):
     image: Optional[str] = None
 
 
+class CourseTestSubmission(BaseModel):
+    test_id: int
+    answers: List[int] = []
+
+
+class CourseQuizSubmission(BaseModel):
+    tests: List[CourseTestSubmission]
+
+
 # ========== REORDER SCHEMAS ==========
 
 class ReorderItem(BaseModel):
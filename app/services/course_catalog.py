@@ -0,0 +1,286 @@
+"""
+Course catalog index
+
+The public catalog (list, search, filters, recommended/popular/free blocks)
+is answered from an in-memory index of approved courses instead of one ad-hoc
+`ilike` query per block:
+- each course is serialized once into its CourseList representation
+- title/description/skills are tokenized into an inverted index; query
+  words match token prefixes, all words must match
+- filters and facet counts (language, level, free/paid, category) are
+  computed in the same pass
+
+The index is per worker. It is rebuilt when the catalog signature (number
+of approved courses, their latest updated_at, category links) changes, so a
+course edited in another worker is picked up on the next request.
+"""
+
+import bisect
+import logging
+import re
+import threading
+import time
+from collections import Counter
+from datetime import datetime
+from typing import Any, Dict, FrozenSet, Iterable, List, NamedTuple, Optional, Set, Tuple
+
+from sqlalchemy import func, select
+from sqlalchemy.orm import Session, selectinload
+
+from app import schemas
+from app.models import Course, CourseCategory, course_category
+
+logger = logging.getLogger(__name__)
+
+# Полная пересборка не реже, чем раз в REBUILD_TTL секунд (просмотры, переименование категорий)
+REBUILD_TTL = 300
+
+FACETS = ("language", "level", "is_free", "category")
+
+SORTS = ("relevance", "newest", "popular", "rating", "price_asc", "price_desc")
+
+_TOKEN_RE = re.compile(r"\w+", re.UNICODE)
+
+
+def tokenize(text: Optional[str]) -> List[str]:
+    return _TOKEN_RE.findall(text.lower()) if text else []
+
+
+class CatalogDocument(NamedTuple):
+    id: int
+    language: Optional[str]
+    level: Optional[str]
+    is_free: bool
+    price: float
+    category_ids: FrozenSet[int]
+    is_popular: bool
+    is_recommended: bool
+    views_count: int
+    rating: float
+    created_at: datetime
+    title_tokens: FrozenSet[str]
+    search_tokens: FrozenSet[str]
+    item: Dict[str, Any]
+
+
+class CatalogFilters(NamedTuple):
+    search: Optional[str] = None
+    category_id: Optional[int] = None
+    language: Optional[str] = None
+    level: Optional[str] = None
+    is_free: Optional[bool] = None
+    price_min: Optional[float] = None
+    price_max: Optional[float] = None
+
+
+class CourseCatalogIndex:
+    """Immutable snapshot of the approved courses"""
+
+    def __init__(self, documents: Iterable[CatalogDocument], categories: Dict[int, str], signature: Tuple = ()):
+        self.documents: Dict[int, CatalogDocument] = {doc.id: doc for doc in documents}
+        self.categories = categories
+        self.signature = signature
+        self.built_at = time.monotonic()
+
+        self._postings: Dict[str, Set[int]] = {}
+        for doc in self.documents.values():
+            for token in doc.search_tokens:
+                self._postings.setdefault(token, set()).add(doc.id)
+        self._tokens = sorted(self._postings)
+
+    def _prefix_ids(self, prefix: str) -> Set[int]:
+        ids: Set[int] = set()
+        start = bisect.bisect_left(self._tokens, prefix)
+        for token in self._tokens[start:]:
+            if not token.startswith(prefix):
+                break
+            ids |= self._postings[token]
+        return ids
+
+    def match_text(self, query: Optional[str]) -> Tuple[Optional[Set[int]], List[str]]:
+        """Ids of courses containing every query word (as a word prefix); None if no query"""
+        words = tokenize(query)
+        if not words:
+            return None, []
+        ids: Optional[Set[int]] = None
+        for word in sorted(set(words), key=len, reverse=True):
+            matched = self._prefix_ids(word)
+            ids = matched if ids is None else ids & matched
+            if not ids:
+                break
+        return ids, words
+
+    @staticmethod
+    def _passes(doc: CatalogDocument, filters: CatalogFilters, skip_facet: Optional[str] = None) -> bool:
+        if skip_facet != "language" and filters.language is not None and doc.language != filters.language:
+            return False
+        if skip_facet != "level" and filters.level is not None and doc.level != filters.level:
+            return False
+        if skip_facet != "is_free" and filters.is_free is not None and doc.is_free != filters.is_free:
+            return False
+        if skip_facet != "category" and filters.category_id is not None and filters.category_id not in doc.category_ids:
+            return False
+        return True
+
+    @staticmethod
+    def _passes_price(doc: CatalogDocument, filters: CatalogFilters) -> bool:
+        if filters.price_min is not None and doc.price < filters.price_min:
+            return False
+        if filters.price_max is not None and doc.price > filters.price_max:
+            return False
+        return True
+
+    def search(
+        self,
+        filters: CatalogFilters,
+        sort: str = "relevance",
+        skip: int = 0,
+        limit: int = 20
+    ) -> Dict[str, Any]:
+        """Filtered page of courses plus facet counts for the same query"""
+        text_ids, words = self.match_text(filters.search)
+        if text_ids is None:
+            candidates = list(self.documents.values())
+        else:
+            candidates = [self.documents[doc_id] for doc_id in text_ids]
+
+        # Каждый фасет считается без собственного фильтра, чтобы были видны альтернативы
+        facet_counts = {facet: Counter() for facet in FACETS}
+        results = []
+        for doc in candidates:
+            # Цена не является фасетом: отсеиваем сразу
+            if not self._passes_price(doc, filters):
+                continue
+            if self._passes(doc, filters, skip_facet="language") and doc.language:
+                facet_counts["language"][doc.language] += 1
+            if self._passes(doc, filters, skip_facet="level") and doc.level:
+                facet_counts["level"][doc.level] += 1
+            if self._passes(doc, filters, skip_facet="is_free"):
+                facet_counts["is_free"]["true" if doc.is_free else "false"] += 1
+            if self._passes(doc, filters, skip_facet="category"):
+                facet_counts["category"].update(doc.category_ids)
+            if self._passes(doc, filters):
+                results.append(doc)
+
+        self._sort(results, sort, words)
+
+        return {
+            "total": len(results),
+            "items": [doc.item for doc in results[skip:skip + limit]],
+            "facets": {
+                "language": dict(facet_counts["language"]),
+                "level": dict(facet_counts["level"]),
+                "is_free": {
+                    "true": facet_counts["is_free"]["true"],
+                    "false": facet_counts["is_free"]["false"]
+                },
+                "category": [
+                    {"id": category_id, "name": self.categories.get(category_id), "count": count}
+                    for category_id, count in facet_counts["category"].most_common()
+                ]
+            }
+        }
+
+    def _sort(self, docs: List[CatalogDocument], sort: str, words: List[str]) -> None:
+        if sort == "relevance" and words:
+            def title_hits(doc):
+                return sum(1 for word in words if any(token.startswith(word) for token in doc.title_tokens))
+            docs.sort(key=lambda d: (title_hits(d), d.views_count, d.id), reverse=True)
+        elif sort == "popular":
+            docs.sort(key=lambda d: (d.views_count, d.id), reverse=True)
+        elif sort == "rating":
+            docs.sort(key=lambda d: (d.rating, d.views_count, d.id), reverse=True)
+        elif sort == "price_asc":
+            docs.sort(key=lambda d: (d.price, -d.id))
+        elif sort == "price_desc":
+            docs.sort(key=lambda d: (d.price, d.id), reverse=True)
+        else:
+            docs.sort(key=lambda d: (d.created_at, d.id), reverse=True)
+
+    def sections(self, limit: int = 10) -> Dict[str, List[Dict[str, Any]]]:
+        """Blocks of the catalog landing page (recommended, popular, free, most searched)"""
+        by_views = sorted(self.documents.values(), key=lambda d: (d.views_count, d.id), reverse=True)
+        return {
+            "recommended": [d.item for d in by_views if d.is_recommended][:limit],
+            "popular": [d.item for d in by_views if d.is_popular][:limit],
+            "free": [d.item for d in by_views if d.is_free][:limit],
+            "most_searched": [d.item for d in by_views[:limit]]
+        }
+
+
+def catalog_signature(db: Session) -> Tuple:
+    """Cheap fingerprint of everything the index is built from (one query)"""
+    approved = Course.moderation_status == "approved"
+    row = db.execute(
+        select(
+            select(func.count(Course.id)).where(approved).scalar_subquery(),
+            select(func.max(Course.updated_at)).where(approved).scalar_subquery(),
+            select(func.count()).select_from(course_category).scalar_subquery(),
+            select(func.count(CourseCategory.id)).scalar_subquery()
+        )
+    ).one()
+    return tuple(row)
+
+
+def build_catalog_index(db: Session, signature: Tuple = ()) -> CourseCatalogIndex:
+    courses = db.query(Course).options(
+        selectinload(Course.categories)
+    ).filter(Course.moderation_status == "approved").all()
+
+    categories = {category_id: name for category_id, name in db.query(CourseCategory.id, CourseCategory.name)}
+
+    documents = []
+    for course in courses:
+        search_text = " ".join(filter(None, [course.title, course.description, course.skills]))
+        documents.append(CatalogDocument(
+            id=course.id,
+            language=course.language,
+            level=course.level,
+            is_free=bool(course.is_free),
+            price=course.price or 0.0,
+            category_ids=frozenset(c.id for c in course.categories),
+            is_popular=bool(course.is_popular),
+            is_recommended=bool(course.is_recommended),
+            views_count=course.views_count or 0,
+            rating=course.rating or 0.0,
+            created_at=course.created_at or datetime.min,
+            title_tokens=frozenset(tokenize(course.title)),
+            search_tokens=frozenset(tokenize(search_text)),
+            item=schemas.CourseList.model_validate(course).model_dump(mode="json")
+        ))
+
+    return CourseCatalogIndex(documents, categories, signature)
+
+
+class CourseCatalog:
+    """Holder of the current index; rebuilds it lazily when the catalog changes"""
+
+    def __init__(self, rebuild_ttl: float = REBUILD_TTL):
+        self.rebuild_ttl = rebuild_ttl
+        self._index: Optional[CourseCatalogIndex] = None
+        self._lock = threading.Lock()
+
+    def get(self, db: Session) -> CourseCatalogIndex:
+        signature = catalog_signature(db)
+        index = self._index
+        if (
+            index is not None
+            and index.signature == signature
+            and time.monotonic() - index.built_at < self.rebuild_ttl
+        ):
+            return index
+
+        with self._lock:
+            index = self._index
+            if index is None or index.signature != signature or time.monotonic() - index.built_at >= self.rebuild_ttl:
+                started = time.perf_counter()
+                index = build_catalog_index(db, signature)
+                self._index = index
+                logger.info(
+                    f"Course catalog index rebuilt: {len(index.documents)} courses "
+                    f"in {(time.perf_counter() - started) * 1000:.1f} ms"
+                )
+        return index
+
+
+course_catalog = CourseCatalog()
@@ -3,13 +3,75 @@ Mobizon SMS API Service
 Documentation: https://api.mobizon.kz/
 """
 
+import httpx
 import requests
-from typing import Optional, Dict, Any
+from typing import Optional, Dict, Any, Tuple
 from config import get_settings
+from app.metrics import track_outbound
 import logging
 
 logger = logging.getLogger(__name__)
 
+SEND_SMS_PATH = "/message/sendSmsMessage"
+
+
+def normalize_recipient(phone: str) -> str:
+    """Digits only, no + sign (format expected by Mobizon)"""
+    return phone.replace("+", "").replace(" ", "").replace("-", "").replace("(", "").replace(")", "")
+
+
+def otp_message(otp_code: str) -> str:
+    # Simplified message format - some SMS providers are sensitive to special characters
+    return f"{otp_code} - SARYARQAJASTARY kod rastau"
+
+
+def build_send_request(api_key: str, phone: str, message: str, sender: str = None) -> Tuple[Dict[str, str], Dict[str, str]]:
+    """(query params, form data) of a sendSmsMessage call"""
+    data = {
+        "recipient": phone,
+        "text": message
+    }
+
+    # Add sender (from parameter) only if provided
+    # Note: Sender must be pre-registered in Mobizon account
+    if sender:
+        data["from"] = sender
+
+    # API key goes in URL params, data in request body
+    params = {
+        "output": "json",
+        "api": "v1",
+        "apiKey": api_key
+    }
+    return params, data
+
+
+def parse_send_response(phone: str, response_data: Dict[str, Any]) -> Dict[str, Any]:
+    logger.info(f"Mobizon response: {response_data}")
+
+    # According to docs: code 0 means success
+    if response_data.get("code") == 0:
+        message_id = response_data.get("data", {}).get("messageId")
+        campaign_id = response_data.get("data", {}).get("campaignId")
+        logger.info(f"SMS sent successfully to {phone[:4]}****{phone[-2:]} (message_id: {message_id}, campaign_id: {campaign_id})")
+        return {
+            "success": True,
+            "message": "SMS sent successfully",
+            "message_id": message_id,
+            "campaign_id": campaign_id
+        }
+
+    error_msg = response_data.get("message", "Unknown error")
+    error_code = response_data.get("code")
+    logger.error(f"Mobizon API error (code {error_code}): {error_msg}")
+    logger.error(f"Full response: {response_data}")
+    return {
+        "success": False,
+        "retryable": False,
+        "message": f"Failed to send SMS (code {error_code}): {error_msg}"
+    }
+
+
 class MobizonService:
     """Service for sending SMS via Mobizon API"""
 
@@ -33,64 +95,27 @@ class MobizonService:
         """
         try:
             # Ensure phone is in correct format (digits only, no + sign)
-            phone = phone.replace("+", "").replace(" ", "").replace("-", "").replace("(", "").replace(")", "")
-
-            # Correct API endpoint according to documentation
-            url = f"{self.BASE_URL}/message/sendSmsMessage"
-
-            # Build data for form-encoded POST request
-            data = {
-                "recipient": phone,
-                "text": message
-            }
-
-            # Add sender (from parameter) only if provided
-            # Note: Sender must be pre-registered in Mobizon account
-            if sender:
-                data["from"] = sender
+            phone = normalize_recipient(phone)
 
-            # API key goes in URL params, data in request body
-            params = {
-                "output": "json",
-                "api": "v1",
-                "apiKey": self.api_key
-            }
+            url = f"{self.BASE_URL}{SEND_SMS_PATH}"
+            params, data = build_send_request(self.api_key, phone, message, sender)
 
             logger.info(f"Sending SMS to {phone[:4]}****{phone[-2:]}")
             logger.debug(f"SMS data: recipient={phone}, text_length={len(message)}, from={sender}")
 
             # Use form-encoded POST as per documentation
-            response = requests.post(
-                url,
-                params=params,
-                data=data,
-                headers={"Content-Type": "application/x-www-form-urlencoded"},
-                timeout=10
-            )
-            response_data = response.json()
-
-            logger.info(f"Mobizon response: {response_data}")
-
-            # According to docs: code 0 means success
-            if response_data.get("code") == 0:
-                message_id = response_data.get("data", {}).get("messageId")
-                campaign_id = response_data.get("data", {}).get("campaignId")
-                logger.info(f"SMS sent successfully to {phone[:4]}****{phone[-2:]} (message_id: {message_id}, campaign_id: {campaign_id})")
-                return {
-                    "success": True,
-                    "message": "SMS sent successfully",
-                    "message_id": message_id,
-                    "campaign_id": campaign_id
-                }
-            else:
-                error_msg = response_data.get("message", "Unknown error")
-                error_code = response_data.get("code")
-                logger.error(f"Mobizon API error (code {error_code}): {error_msg}")
-                logger.error(f"Full response: {response_data}")
-                return {
-                    "success": False,
-                    "message": f"Failed to send SMS (code {error_code}): {error_msg}"
-                }
+            with track_outbound("mobizon", "send_sms") as call:
+                response = requests.post(
+                    url,
+                    params=params,
+                    data=data,
+                    headers={"Content-Type": "application/x-www-form-urlencoded"},
+                    timeout=10
+                )
+                result = parse_send_response(phone, response.json())
+                if not result.get("success"):
+                    call.fail()
+            return result
 
         except requests.exceptions.Timeout:
             logger.error("Mobizon API timeout")
@@ -116,10 +141,8 @@ class MobizonService:
         Returns:
             dict: API response
         """
-        # Simplified message format - some SMS providers are sensitive to special characters
-        message = f"{otp_code} - SARYARQAJASTARY kod rastau"
         # Try without sender name first (more compatible)
-        return self.send_sms(phone, message, sender=None)
+        return self.send_sms(phone, otp_message(otp_code), sender=None)
 
     def check_balance(self) -> Optional[float]:
         """
@@ -132,8 +155,11 @@ class MobizonService:
             url = f"{self.BASE_URL}/user/getownbalance"
             params = {"apiKey": self.api_key}
 
-            response = requests.get(url, params=params, timeout=10)
-            response_data = response.json()
+            with track_outbound("mobizon", "get_balance") as call:
+                response = requests.get(url, params=params, timeout=10)
+                response_data = response.json()
+                if response_data.get("code") != 0:
+                    call.fail()
 
             if response_data.get("code") == 0:
                 balance = response_data.get("data", {}).get("balance", 0)
@@ -148,6 +174,55 @@ class MobizonService:
             return None
 
 
+class AsyncMobizonClient:
+    """
+    Non-blocking Mobizon client for the SMS queue worker.
+
+    One pooled httpx.AsyncClient is reused for all sends (keep-alive, bounded
+    number of connections). Results have the same shape as MobizonService.send_sms,
+    plus "retryable" for timeouts, transport errors and 5xx responses.
+    """
+
+    def __init__(self, api_key: str = None, timeout: float = 10.0, max_connections: int = 10):
+        self.api_key = api_key if api_key is not None else get_settings().MOBIZON_API_KEY
+        self._client = httpx.AsyncClient(
+            base_url=MobizonService.BASE_URL,
+            timeout=httpx.Timeout(timeout, connect=5.0),
+            limits=httpx.Limits(max_connections=max_connections, max_keepalive_connections=max_connections),
+            headers={"Content-Type": "application/x-www-form-urlencoded"}
+        )
+
+    async def send_sms(self, phone: str, message: str, sender: str = None) -> Dict[str, Any]:
+        phone = normalize_recipient(phone)
+        params, data = build_send_request(self.api_key, phone, message, sender)
+
+        logger.info(f"Sending SMS to {phone[:4]}****{phone[-2:]}")
+        try:
+            with track_outbound("mobizon", "send_sms") as call:
+                response = await self._client.post(SEND_SMS_PATH, params=params, data=data)
+                if response.status_code >= 500:
+                    call.fail()
+                    logger.error(f"Mobizon HTTP {response.status_code}")
+                    return {"success": False, "retryable": True, "message": f"SMS service HTTP {response.status_code}"}
+                result = parse_send_response(phone, response.json())
+                if not result.get("success"):
+                    call.fail()
+            return result
+
+        except httpx.TimeoutException:
+            logger.error("Mobizon API timeout")
+            return {"success": False, "retryable": True, "message": "SMS service timeout"}
+        except httpx.TransportError as e:
+            logger.error(f"Mobizon transport error: {str(e)}")
+            return {"success": False, "retryable": True, "message": f"SMS service unavailable: {str(e)}"}
+        except Exception as e:
+            logger.error(f"Error sending SMS via Mobizon: {str(e)}")
+            return {"success": False, "retryable": False, "message": f"Error sending SMS: {str(e)}"}
+
+    async def aclose(self) -> None:
+        await self._client.aclose()
+
+
 # Singleton instance
 _mobizon_service: Optional[MobizonService] = None
 
@@ -0,0 +1,213 @@
+"""
+Profession autocomplete index
+
+`/resumes/professions/search` is answered from an in-memory index of active
+professions instead of six sequential `lower(...) LIKE` queries. Ranking
+follows the old cascade, primary language first:
+exact name → name prefix → word prefix → substring, then the same for the
+second language. Ties go to shorter names, then alphabetical order.
+
+Name prefixes come from a sorted array (bisect), word prefixes from a sorted
+array of words, and substrings from a trigram index with a final `in` check.
+
+The index is built at startup, rebuilt in this worker after a profession is
+created or deleted, and at most REBUILD_TTL seconds old in other workers.
+"""
+
+import bisect
+import logging
+import re
+import threading
+import time
+from typing import Any, Dict, Iterable, List, NamedTuple, Optional, Set, Tuple
+
+from sqlalchemy.orm import Session
+
+from app.database import SessionLocal
+from app.resume_models import Profession
+
+logger = logging.getLogger(__name__)
+
+REBUILD_TTL = 300
+
+LANGUAGES = ("ru", "kz")
+
+_SPACES_RE = re.compile(r"\s+")
+_WORD_RE = re.compile(r"\w+", re.UNICODE)
+
+# Уровни ранжирования внутри одного языка
+EXACT, PREFIX, WORD_PREFIX, SUBSTRING = range(4)
+
+
+def normalize(text: Optional[str]) -> str:
+    return _SPACES_RE.sub(" ", text.lower()).strip() if text else ""
+
+
+def trigrams(text: str) -> Set[str]:
+    return {text[i:i + 3] for i in range(len(text) - 2)}
+
+
+class ProfessionEntry(NamedTuple):
+    id: int
+    names: Dict[str, str]  # язык -> нормализованное название
+    item: Dict[str, Any]
+
+
+class _LanguageIndex:
+    """Lookup structures over the names in one language"""
+
+    def __init__(self, entries: Iterable[ProfessionEntry], language: str):
+        self.exact: Dict[str, List[int]] = {}
+        self.names: List[Tuple[str, int]] = []
+        self.words: List[Tuple[str, int]] = []
+        self.trigrams: Dict[str, Set[int]] = {}
+        self.text: Dict[int, str] = {}
+
+        for entry in entries:
+            name = entry.names[language]
+            if not name:
+                continue
+            self.text[entry.id] = name
+            self.exact.setdefault(name, []).append(entry.id)
+            self.names.append((name, entry.id))
+            for word in set(_WORD_RE.findall(name)):
+                self.words.append((word, entry.id))
+            for gram in trigrams(name):
+                self.trigrams.setdefault(gram, set()).add(entry.id)
+
+        self.names.sort()
+        self.words.sort()
+
+    @staticmethod
+    def _prefix(pairs: List[Tuple[str, int]], prefix: str) -> Set[int]:
+        ids = set()
+        position = bisect.bisect_left(pairs, (prefix,))
+        while position < len(pairs) and pairs[position][0].startswith(prefix):
+            ids.add(pairs[position][1])
+            position += 1
+        return ids
+
+    def _substring(self, term: str) -> Set[int]:
+        if len(term) < 3:
+            candidates = self.text.keys()
+        else:
+            grams = sorted(trigrams(term), key=lambda g: len(self.trigrams.get(g, ())))
+            candidates = set(self.trigrams.get(grams[0], ()))
+            for gram in grams[1:]:
+                if not candidates:
+                    break
+                candidates &= self.trigrams.get(gram, set())
+        return {entry_id for entry_id in candidates if term in self.text[entry_id]}
+
+    def match(self, term: str, needed: int) -> Dict[int, int]:
+        """
+        entry id -> best level (EXACT..SUBSTRING). Levels are tried in order and
+        lower ones are skipped once `needed` entries are found.
+        """
+        lookups = (
+            (EXACT, lambda: self.exact.get(term, ())),
+            (PREFIX, lambda: self._prefix(self.names, term)),
+            (WORD_PREFIX, lambda: self._prefix(self.words, term)),
+            (SUBSTRING, lambda: self._substring(term)),
+        )
+        levels = {}
+        for level, lookup in lookups:
+            if len(levels) >= needed:
+                break
+            for entry_id in lookup():
+                levels.setdefault(entry_id, level)
+        return levels
+
+
+class ProfessionIndex:
+    """Immutable snapshot of the active professions"""
+
+    def __init__(self, entries: Iterable[ProfessionEntry]):
+        self.entries: Dict[int, ProfessionEntry] = {entry.id: entry for entry in entries}
+        self.languages = {language: _LanguageIndex(self.entries.values(), language) for language in LANGUAGES}
+        self.built_at = time.monotonic()
+
+    def search(self, query: str, language: str = "ru", limit: int = 10) -> List[Dict[str, Any]]:
+        term = normalize(query)
+        if not term:
+            return []
+
+        primary = language if language in LANGUAGES else "ru"
+        secondary = next(lang for lang in LANGUAGES if lang != primary)
+
+        ranked: Dict[int, Tuple] = {}
+        for offset, lang in ((0, primary), (4, secondary)):
+            if len(ranked) >= limit:
+                break
+            for entry_id, level in self.languages[lang].match(term, limit - len(ranked)).items():
+                if entry_id in ranked:
+                    continue
+                name = self.entries[entry_id].names[lang]
+                ranked[entry_id] = (offset + level, len(name), name, entry_id)
+
+        best = sorted(ranked, key=ranked.__getitem__)[:limit]
+        return [self.entries[entry_id].item for entry_id in best]
+
+
+def build_profession_index(db: Session) -> ProfessionIndex:
+    professions = db.query(Profession).filter(Profession.is_active == True).all()
+    return ProfessionIndex(
+        ProfessionEntry(
+            id=profession.id,
+            names={"ru": normalize(profession.name_ru), "kz": normalize(profession.name_kz)},
+            item={
+                "id": profession.id,
+                "name_ru": profession.name_ru,
+                "name_kz": profession.name_kz,
+                "category": profession.category,
+                "is_active": profession.is_active,
+                "created_at": profession.created_at
+            }
+        )
+        for profession in professions
+    )
+
+
+class ProfessionAutocomplete:
+    """Holder of the current index; rebuilds it lazily after invalidation or TTL"""
+
+    def __init__(self, rebuild_ttl: float = REBUILD_TTL):
+        self.rebuild_ttl = rebuild_ttl
+        self._index: Optional[ProfessionIndex] = None
+        self._lock = threading.Lock()
+
+    def _fresh(self, index: Optional[ProfessionIndex]) -> bool:
+        return index is not None and time.monotonic() - index.built_at < self.rebuild_ttl
+
+    def get(self, db: Session) -> ProfessionIndex:
+        index = self._index
+        if self._fresh(index):
+            return index
+
+        with self._lock:
+            index = self._index
+            if not self._fresh(index):
+                started = time.perf_counter()
+                index = build_profession_index(db)
+                self._index = index
+                logger.info(
+                    f"Profession autocomplete index rebuilt: {len(index.entries)} professions "
+                    f"in {(time.perf_counter() - started) * 1000:.1f} ms"
+                )
+        return index
+
+    def invalidate(self) -> None:
+        self._index = None
+
+    def warm_up(self) -> None:
+        """Build the index at startup so the first search does not pay for it"""
+        db = SessionLocal()
+        try:
+            self.get(db)
+        except Exception as e:
+            logger.warning(f"Could not build profession autocomplete index at startup: {str(e)}")
+        finally:
+            db.close()
+
+
+profession_autocomplete = ProfessionAutocomplete()
@@ -0,0 +1,231 @@
+"""
+Streaming export of project form submissions (CSV / XLSX)
+
+Submissions are read with a server-side cursor (`yield_per`) and written
+out batch by batch, so memory stays constant regardless of how many rows
+a contest collected.
+"""
+
+import csv
+import io
+import re
+import zipfile
+from typing import Any, Dict, Iterator, List, Optional
+from xml.sax.saxutils import escape
+
+from app.database import SessionLocal
+from app.project_models import ProjectFormSubmission
+
+EXPORT_BATCH_SIZE = 500
+
+BASE_HEADER = ["ID", "Submission Date", "Name", "Phone", "Email", "Status", "Admin Comment"]
+
+# Characters that are not allowed in XML 1.0 documents
+_ILLEGAL_XML_CHARS_RE = re.compile(r"[\x00-\x08\x0b\x0c\x0e-\x1f]")
+
+
+def build_header(fields: List[Dict[str, Any]]) -> List[str]:
+    """Fixed columns followed by one column per template field"""
+    header = list(BASE_HEADER)
+    for field in fields:
+        header.append(field.get('label_ru', field.get('label_kz', field['id'])))
+    return header
+
+
+def submission_to_row(sub: ProjectFormSubmission, fields: List[Dict[str, Any]]) -> List[Any]:
+    row = [
+        sub.id,
+        sub.submitted_at.strftime("%Y-%m-%d %H:%M:%S"),
+        sub.applicant_name or "",
+        sub.phone_number,
+        sub.email or "",
+        sub.status,
+        sub.admin_comment or ""
+    ]
+
+    responses = sub.responses or {}
+    for field in fields:
+        value = responses.get(field['id'], "")
+        # Convert lists to comma-separated string
+        if isinstance(value, list):
+            value = ", ".join(str(v) for v in value)
+        row.append(value)
+    return row
+
+
+def iter_submission_batches(
+    project_id: int,
+    fields: List[Dict[str, Any]],
+    status: Optional[str] = None,
+    batch_size: int = EXPORT_BATCH_SIZE
+) -> Iterator[List[List[Any]]]:
+    """
+    Yield lists of export rows, `batch_size` at a time.
+
+    Uses its own session: the response body is produced after the request's
+    `get_db` session has already been closed.
+    """
+    db = SessionLocal()
+    try:
+        query = db.query(ProjectFormSubmission).filter(
+            ProjectFormSubmission.project_id == project_id
+        )
+        if status:
+            query = query.filter(ProjectFormSubmission.status == status)
+
+        # yield_per turns on stream_results, i.e. a psycopg2 server-side cursor
+        query = query.order_by(ProjectFormSubmission.submitted_at.desc()).yield_per(batch_size)
+
+        batch = []
+        for sub in query:
+            batch.append(submission_to_row(sub, fields))
+            if len(batch) >= batch_size:
+                yield batch
+                batch = []
+                # Rows already written do not need to stay in the identity map
+                db.expunge_all()
+        if batch:
+            yield batch
+    finally:
+        db.close()
+
+
+def stream_submissions_csv(
+    project_id: int,
+    fields: List[Dict[str, Any]],
+    status: Optional[str] = None,
+    batch_size: int = EXPORT_BATCH_SIZE
+) -> Iterator[bytes]:
+    """CSV body, one chunk per batch of submissions"""
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+
+    writer.writerow(build_header(fields))
+    yield buffer.getvalue().encode("utf-8")
+
+    for batch in iter_submission_batches(project_id, fields, status, batch_size):
+        buffer.seek(0)
+        buffer.truncate(0)
+        writer.writerows(batch)
+        yield buffer.getvalue().encode("utf-8")
+
+
+class _ChunkSink:
+    """
+    Write-only, non-seekable file object for zipfile.
+
+    zipfile falls back to data descriptors when `tell()`/`seek()` are not
+    available, which is what lets the archive be streamed.
+    """
+
+    def __init__(self):
+        self._chunks: List[bytes] = []
+
+    def write(self, data: bytes) -> int:
+        if data:
+            self._chunks.append(bytes(data))
+        return len(data)
+
+    def flush(self):
+        pass
+
+    def drain(self) -> bytes:
+        data = b"".join(self._chunks)
+        self._chunks.clear()
+        return data
+
+
+_CONTENT_TYPES_XML = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+    '<Types xmlns="http://schemas.openxmlformats.org/package/2006/content-types">'
+    '<Default Extension="rels" ContentType="application/vnd.openxmlformats-package.relationships+xml"/>'
+    '<Default Extension="xml" ContentType="application/xml"/>'
+    '<Override PartName="/xl/workbook.xml" '
+    'ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet.main+xml"/>'
+    '<Override PartName="/xl/worksheets/sheet1.xml" '
+    'ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.worksheet+xml"/>'
+    '</Types>'
+)
+
+_ROOT_RELS_XML = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+    '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+    '<Relationship Id="rId1" '
+    'Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/officeDocument" '
+    'Target="xl/workbook.xml"/>'
+    '</Relationships>'
+)
+
+_WORKBOOK_XML = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+    '<workbook xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main" '
+    'xmlns:r="http://schemas.openxmlformats.org/officeDocument/2006/relationships">'
+    '<sheets><sheet name="Submissions" sheetId="1" r:id="rId1"/></sheets>'
+    '</workbook>'
+)
+
+_WORKBOOK_RELS_XML = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+    '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+    '<Relationship Id="rId1" '
+    'Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/worksheet" '
+    'Target="worksheets/sheet1.xml"/>'
+    '</Relationships>'
+)
+
+_SHEET_HEAD = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+    '<worksheet xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main">'
+    '<sheetData>'
+)
+
+_SHEET_TAIL = '</sheetData></worksheet>'
+
+
+def _xlsx_cell(value: Any) -> str:
+    # Inline strings: no sharedStrings table has to be kept in memory
+    if isinstance(value, bool) or value is None:
+        value = "" if value is None else str(value)
+    if isinstance(value, (int, float)):
+        return f'<c><v>{value}</v></c>'
+    text = escape(_ILLEGAL_XML_CHARS_RE.sub("", str(value)))
+    return f'<c t="inlineStr"><is><t xml:space="preserve">{text}</t></is></c>'
+
+
+def _xlsx_row(values: List[Any]) -> str:
+    return "<row>" + "".join(_xlsx_cell(v) for v in values) + "</row>"
+
+
+def stream_submissions_xlsx(
+    project_id: int,
+    fields: List[Dict[str, Any]],
+    status: Optional[str] = None,
+    batch_size: int = EXPORT_BATCH_SIZE
+) -> Iterator[bytes]:
+    """
+    XLSX body written as a streamed zip archive.
+
+    The worksheet XML is compressed on the fly; only the current batch of
+    rows and the deflate window are held in memory.
+    """
+    sink = _ChunkSink()
+    with zipfile.ZipFile(sink, mode="w", compression=zipfile.ZIP_DEFLATED) as archive:
+        archive.writestr("[Content_Types].xml", _CONTENT_TYPES_XML)
+        archive.writestr("_rels/.rels", _ROOT_RELS_XML)
+        archive.writestr("xl/workbook.xml", _WORKBOOK_XML)
+        archive.writestr("xl/_rels/workbook.xml.rels", _WORKBOOK_RELS_XML)
+
+        with archive.open("xl/worksheets/sheet1.xml", mode="w", force_zip64=True) as sheet:
+            sheet.write((_SHEET_HEAD + _xlsx_row(build_header(fields))).encode("utf-8"))
+            yield sink.drain()
+
+            for batch in iter_submission_batches(project_id, fields, status, batch_size):
+                sheet.write("".join(_xlsx_row(row) for row in batch).encode("utf-8"))
+                chunk = sink.drain()
+                if chunk:
+                    yield chunk
+
+            sheet.write(_SHEET_TAIL.encode("utf-8"))
+
+    # Central directory is written when the archive is closed
+    yield sink.drain()
@@ -0,0 +1,233 @@
+"""
+Outbound SMS queue.
+
+Requests only insert a row into `sms_messages` (in the same transaction as the
+OTP code) and wake the worker. The worker in each API process claims due
+messages with FOR UPDATE SKIP LOCKED, sends them concurrently through the
+pooled AsyncMobizonClient and records the delivery status in one UPDATE.
+
+Timeouts, transport errors and 5xx responses are retried with backoff. A
+claimed message carries a lease (next_attempt_at); if the worker dies mid-send,
+the message is picked up again once the lease expires.
+"""
+
+import asyncio
+import logging
+from typing import Any, Dict, List, Optional
+
+from sqlalchemy import text
+from sqlalchemy.orm import Session
+
+from app import models
+from app.database import SessionLocal
+from app.services.mobizon_service import AsyncMobizonClient
+from config import get_settings
+
+logger = logging.getLogger(__name__)
+
+SMS_MAX_ATTEMPTS = 3
+
+# Паузы перед повторами (сек.): OTP живет 5 минут, поэтому короткие
+RETRY_DELAYS = (5, 20)
+
+CLAIM_LEASE_SECONDS = 60
+CLAIM_BATCH_SIZE = 20
+
+CLAIM_SQL = text("""
+    UPDATE sms_messages m
+    SET status = 'sending',
+        attempts = m.attempts + 1,
+        next_attempt_at = now() + make_interval(secs => :lease)
+    WHERE m.id IN (
+        SELECT id FROM sms_messages
+        WHERE status IN ('queued', 'sending')
+          AND next_attempt_at <= now()
+          AND attempts < :max_attempts
+        ORDER BY next_attempt_at
+        LIMIT :batch
+        FOR UPDATE SKIP LOCKED
+    )
+    RETURNING m.id, m.phone_number, m.message, m.attempts
+""")
+
+# Сообщения, чья последняя попытка оборвалась вместе с воркером
+EXPIRE_SQL = text("""
+    UPDATE sms_messages
+    SET status = 'failed',
+        last_error = COALESCE(last_error, 'Delivery attempt interrupted')
+    WHERE status = 'sending'
+      AND next_attempt_at <= now()
+      AND attempts >= :max_attempts
+""")
+
+RECORD_SQL = text("""
+    UPDATE sms_messages m
+    SET status = r.status,
+        provider_message_id = COALESCE(r.provider_message_id, m.provider_message_id),
+        last_error = r.last_error,
+        sent_at = CASE WHEN r.status = 'sent' THEN now() ELSE m.sent_at END,
+        next_attempt_at = now() + make_interval(secs => r.delay)
+    FROM unnest(
+        CAST(:ids AS integer[]),
+        CAST(:statuses AS text[]),
+        CAST(:provider_ids AS text[]),
+        CAST(:errors AS text[]),
+        CAST(:delays AS integer[])
+    ) AS r(id, status, provider_message_id, last_error, delay)
+    WHERE m.id = r.id
+""")
+
+_worker_running = False
+_worker_task: Optional[asyncio.Task] = None
+_loop: Optional[asyncio.AbstractEventLoop] = None
+_wakeup: Optional[asyncio.Event] = None
+
+
+def enqueue_sms(db: Session, phone_number: str, message: str, purpose: str = "otp") -> models.SmsMessage:
+    """Add an SMS to the queue; it is sent after the caller commits"""
+    sms = models.SmsMessage(phone_number=phone_number, message=message, purpose=purpose)
+    db.add(sms)
+    return sms
+
+
+def notify_worker() -> None:
+    """Wake the worker right away (safe to call from threadpool routes)"""
+    if _loop is None or _wakeup is None:
+        return
+    try:
+        _loop.call_soon_threadsafe(_wakeup.set)
+    except RuntimeError:
+        # Цикл событий уже закрыт (остановка приложения) — сообщение заберет следующий воркер
+        pass
+
+
+def claim_messages() -> List[Any]:
+    db = SessionLocal()
+    try:
+        db.execute(EXPIRE_SQL, {"max_attempts": SMS_MAX_ATTEMPTS})
+        rows = db.execute(CLAIM_SQL, {
+            "lease": CLAIM_LEASE_SECONDS,
+            "max_attempts": SMS_MAX_ATTEMPTS,
+            "batch": CLAIM_BATCH_SIZE
+        }).fetchall()
+        db.commit()
+        return rows
+    except Exception:
+        db.rollback()
+        raise
+    finally:
+        db.close()
+
+
+def _outcome(attempts: int, result: Dict[str, Any]):
+    """(status, delay seconds) for a send result"""
+    if result.get("success"):
+        return "sent", 0
+    if result.get("retryable") and attempts < SMS_MAX_ATTEMPTS:
+        return "queued", RETRY_DELAYS[min(attempts, len(RETRY_DELAYS)) - 1]
+    return "failed", 0
+
+
+def record_results(messages: List[Any], results: List[Dict[str, Any]]) -> None:
+    params = {"ids": [], "statuses": [], "provider_ids": [], "errors": [], "delays": []}
+    for message, result in zip(messages, results):
+        status, delay = _outcome(message.attempts, result)
+        provider_id = result.get("message_id")
+        params["ids"].append(message.id)
+        params["statuses"].append(status)
+        params["provider_ids"].append(str(provider_id) if provider_id is not None else None)
+        params["errors"].append(None if status == "sent" else result.get("message"))
+        params["delays"].append(delay)
+
+    db = SessionLocal()
+    try:
+        db.execute(RECORD_SQL, params)
+        db.commit()
+    except Exception:
+        db.rollback()
+        raise
+    finally:
+        db.close()
+
+
+async def process_batch(client: AsyncMobizonClient) -> int:
+    """Claim due messages, send them concurrently and record the outcome"""
+    # Запросы к БД синхронные — выполняем в потоке, чтобы не блокировать цикл событий
+    messages = await asyncio.to_thread(claim_messages)
+    if not messages:
+        return 0
+
+    results = await asyncio.gather(*(client.send_sms(m.phone_number, m.message) for m in messages))
+    await asyncio.to_thread(record_results, messages, results)
+
+    sent = sum(1 for result in results if result.get("success"))
+    logger.info(f"SMS queue: {sent}/{len(messages)} message(s) sent")
+    return len(messages)
+
+
+async def worker_loop(poll_seconds: float):
+    logger.info(f"SMS queue worker started (poll interval: {poll_seconds} s)")
+    client = AsyncMobizonClient()
+    wakeup = _wakeup
+    try:
+        while _worker_running:
+            wakeup.clear()
+            try:
+                claimed = await process_batch(client)
+            except Exception as e:
+                logger.error(f"SMS queue error (will retry): {str(e)}")
+                claimed = 0
+
+            if claimed:
+                # Могли остаться еще сообщения — берем следующую пачку сразу
+                continue
+
+            try:
+                await asyncio.wait_for(wakeup.wait(), timeout=poll_seconds)
+            except asyncio.TimeoutError:
+                pass
+    finally:
+        await client.aclose()
+
+
+def start_worker():
+    """
+    Start the SMS queue worker.
+    Should be called when the application starts.
+    """
+    global _worker_running, _worker_task, _loop, _wakeup
+
+    poll_seconds = get_settings().SMS_QUEUE_POLL_SECONDS
+    if poll_seconds <= 0:
+        logger.info("SMS queue worker disabled")
+        return
+
+    if _worker_running:
+        logger.warning("SMS queue worker is already running")
+        return
+
+    _worker_running = True
+    try:
+        _loop = asyncio.get_running_loop()
+        _wakeup = asyncio.Event()
+        _worker_task = asyncio.create_task(worker_loop(poll_seconds))
+    except Exception as e:
+        logger.error(f"Failed to create SMS queue worker task: {str(e)}")
+        _worker_running = False
+
+
+def stop_worker():
+    """
+    Stop the SMS queue worker.
+    Should be called when the application shuts down.
+    """
+    global _worker_running, _worker_task, _loop, _wakeup
+
+    _worker_running = False
+    _loop = None
+    _wakeup = None
+
+    if _worker_task:
+        _worker_task.cancel()
+        _worker_task = None
+        logger.info("SMS queue worker stopped")
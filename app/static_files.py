@@ -0,0 +1,180 @@
+"""
+Cache-friendly static file serving
+
+StaticFiles subclass used for /static, /uploads, /certificates and /courses:
+- uploaded files are saved under a uuid4 name, so their content never changes
+  and they are served with `Cache-Control: immutable`
+- strong ETag, correct If-None-Match / If-Modified-Since precedence
+- Range and If-Range requests are handled by FileResponse
+- precompressed `.br` / `.gz` siblings are served when the client accepts them
+"""
+
+import mimetypes
+import os
+import re
+import stat
+from email.utils import parsedate_to_datetime
+from typing import List, Optional, Tuple
+
+from starlette.datastructures import Headers
+from starlette.responses import FileResponse, Response
+from starlette.staticfiles import NotModifiedResponse, StaticFiles
+from starlette.types import Scope
+
+# uuid4 (with or without dashes) or a 16+ hex digit content hash in the file name
+HASHED_NAME_RE = re.compile(
+    r"([0-9a-f]{8}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{12}|[0-9a-f]{32}|[.-][0-9a-f]{16,}\.)",
+    re.IGNORECASE,
+)
+
+IMMUTABLE_CACHE_CONTROL = "public, max-age=31536000, immutable"
+DEFAULT_CACHE_CONTROL = "public, max-age=3600, must-revalidate"
+
+# Order matters: the first accepted encoding with an existing sibling wins
+PRECOMPRESSED_ENCODINGS: List[Tuple[str, str]] = [("br", ".br"), ("gzip", ".gz")]
+
+
+def is_hashed_path(path: str) -> bool:
+    """True if the file name carries a uuid/content hash, i.e. its content never changes"""
+    return HASHED_NAME_RE.search(os.path.basename(path)) is not None
+
+
+def parse_accept_encoding(header: Optional[str]) -> set:
+    """Return the set of encodings the client accepts (q=0 entries excluded)"""
+    accepted = set()
+    if not header:
+        return accepted
+    for item in header.split(","):
+        parts = [p.strip() for p in item.split(";")]
+        coding = parts[0].lower()
+        if not coding:
+            continue
+        q = 1.0
+        for param in parts[1:]:
+            if param.lower().startswith("q="):
+                try:
+                    q = float(param[2:])
+                except ValueError:
+                    q = 0.0
+        if q > 0:
+            accepted.add(coding)
+    return accepted
+
+
+def _etag_matches(etag: str, header: str, weak: bool = True) -> bool:
+    """
+    Compare an ETag against an If-None-Match / If-Match header value.
+    Weak comparison (RFC 9110 8.8.3.2) ignores the W/ prefix.
+    """
+    if header.strip() == "*":
+        return True
+    for tag in header.split(","):
+        tag = tag.strip()
+        if weak and tag.startswith("W/"):
+            tag = tag[2:]
+        if tag == etag:
+            return True
+    return False
+
+
+class CachedStaticFiles(StaticFiles):
+    """StaticFiles with long-lived caching, strong ETags and precompressed siblings"""
+
+    def __init__(self, *args, immutable_hashed: bool = True, precompressed: bool = True, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.immutable_hashed = immutable_hashed
+        self.precompressed = precompressed
+
+    def cache_control_for(self, path: str) -> str:
+        if self.immutable_hashed and is_hashed_path(path):
+            return IMMUTABLE_CACHE_CONTROL
+        return DEFAULT_CACHE_CONTROL
+
+    def find_precompressed(self, full_path: str, request_headers: Headers) -> Tuple[str, Optional[os.stat_result], Optional[str]]:
+        """Return (path, stat, encoding) of the best precompressed sibling, if any"""
+        accepted = parse_accept_encoding(request_headers.get("accept-encoding"))
+        for encoding, suffix in PRECOMPRESSED_ENCODINGS:
+            if encoding not in accepted:
+                continue
+            candidate = f"{full_path}{suffix}"
+            try:
+                candidate_stat = os.stat(candidate)
+            except (FileNotFoundError, NotADirectoryError):
+                continue
+            if stat.S_ISREG(candidate_stat.st_mode):
+                return candidate, candidate_stat, encoding
+        return full_path, None, None
+
+    def file_response(
+        self,
+        full_path,
+        stat_result: os.stat_result,
+        scope: Scope,
+        status_code: int = 200,
+    ) -> Response:
+        request_headers = Headers(scope=scope)
+        full_path = str(full_path)
+
+        headers = {"cache-control": self.cache_control_for(full_path)}
+        serve_path, serve_stat, encoding = full_path, stat_result, None
+
+        if self.precompressed and status_code == 200:
+            headers["vary"] = "Accept-Encoding"
+            candidate_path, candidate_stat, candidate_encoding = self.find_precompressed(full_path, request_headers)
+            if candidate_encoding is not None:
+                serve_path, serve_stat, encoding = candidate_path, candidate_stat, candidate_encoding
+                headers["content-encoding"] = encoding
+
+        response = FileResponse(
+            serve_path,
+            status_code=status_code,
+            headers=headers,
+            # Content-Type of the original file, not of the .br/.gz sibling
+            media_type=mimetypes.guess_type(full_path)[0] or "text/plain",
+            stat_result=serve_stat,
+        )
+        if encoding is not None:
+            # Each representation needs its own strong validator
+            response.headers["etag"] = response.headers["etag"][:-1] + f'-{encoding}"'
+
+        if status_code == 200:
+            if self.is_precondition_failed(response.headers, request_headers):
+                return Response(status_code=412, headers={"etag": response.headers["etag"]})
+            if self.is_not_modified(response.headers, request_headers):
+                return NotModifiedResponse(response.headers)
+        return response
+
+    def is_precondition_failed(self, response_headers: Headers, request_headers: Headers) -> bool:
+        """If-Match (strong comparison) and If-Unmodified-Since"""
+        if_match = request_headers.get("if-match")
+        if if_match is not None:
+            return not _etag_matches(response_headers["etag"], if_match, weak=False)
+
+        if_unmodified_since = request_headers.get("if-unmodified-since")
+        if if_unmodified_since is not None:
+            try:
+                since = parsedate_to_datetime(if_unmodified_since)
+                last_modified = parsedate_to_datetime(response_headers["last-modified"])
+            except (TypeError, ValueError):
+                return False
+            return last_modified > since
+        return False
+
+    def is_not_modified(self, response_headers: Headers, request_headers: Headers) -> bool:
+        """
+        If-None-Match takes precedence over If-Modified-Since (RFC 9110 13.2.2),
+        so a changed ETag is never masked by a stale date.
+        """
+        if_none_match = request_headers.get("if-none-match")
+        if if_none_match is not None:
+            return _etag_matches(response_headers["etag"], if_none_match)
+
+        if_modified_since = request_headers.get("if-modified-since")
+        if if_modified_since is not None:
+            try:
+                since = parsedate_to_datetime(if_modified_since)
+                last_modified = parsedate_to_datetime(response_headers["last-modified"])
+            except (TypeError, ValueError):
+                return False
+            return last_modified <= since
+        return False
@@ -17,7 +17,7 @@ import enum
 
 # app/v_models.py
 # Модели для волонтёров БЕЗ foreign key и relationship
-from sqlalchemy import Column, Integer, String, DateTime, Boolean, Text, Date, Float
+from sqlalchemy import Column, Integer, String, DateTime, Boolean, Text, Date, Float, Index
 from sqlalchemy.sql import func
 from app.database import Base
 import enum
@@ -171,7 +171,7 @@ class VCoinTransaction(Base):
     volunteer_id = Column(Integer, nullable=False)
 
     amount = Column(Integer, nullable=False)  # Может быть отрицательным (трата)
-    transaction_type = Column(String)  # earned, spent, bonus, penalty
+    transaction_type = Column(String)  # earned, spent, bonus, refund, admin_adjustment, reconciliation
 
     description = Column(String)
     description_kz = Column(String)
@@ -182,6 +182,11 @@ class VCoinTransaction(Base):
 
     created_at = Column(DateTime(timezone=True), server_default=func.now())
 
+    # Журнал: баланс = SUM(amount) по volunteer_id (см. app/vcoin_ledger.py)
+    __table_args__ = (
+        Index("idx_vcoin_transactions_volunteer_created", "volunteer_id", "created_at"),
+    )
+
 
 # === БАЛАНС V-COINS ===
 class VolunteerBalance(Base):
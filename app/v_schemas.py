@@ -1,6 +1,6 @@
 # v_schemas.py
 from pydantic import BaseModel
-from typing import Optional
+from typing import List, Optional
 from datetime import datetime
 
 
@@ -66,6 +66,15 @@ class EventApplicationResponse(BaseModel):
         from_attributes = True
 
 
+class AttendanceMarkItem(BaseModel):
+    application_id: int
+    attended: bool
+
+
+class BulkAttendanceRequest(BaseModel):
+    items: List[AttendanceMarkItem]
+
+
 # === REPORT SCHEMAS ===
 class ReportSubmit(BaseModel):
     report_text: Optional[str] = None
@@ -0,0 +1,415 @@
+"""
+V-coin ledger
+
+Every change of a volunteer's balance is a row in `vcoin_transactions`.
+The balance row and the ledger row are written by ONE statement:
+
+    WITH balance AS (
+        UPDATE volunteer_balances SET current_balance = current_balance + :amount, ...
+        WHERE volunteer_id = :id [AND current_balance >= :cost]
+        RETURNING volunteer_id, current_balance
+    ), ledger AS (
+        INSERT INTO vcoin_transactions (...) SELECT ... FROM balance RETURNING id
+    )
+    SELECT ledger.id, balance.current_balance FROM balance JOIN ledger ON true
+
+The UPDATE takes the row lock and checks funds in the same step, so two
+parallel purchases cannot both spend the same coins, and nothing is written
+to the ledger when the condition fails. `volunteer_balances.current_balance`
+is a cache of SUM(vcoin_transactions.amount); `reconcile_balances` recomputes
+it in bulk.
+"""
+
+import logging
+from typing import Any, Dict, List, NamedTuple, Optional, Tuple
+
+from sqlalchemy import Integer, String, case, func, insert, literal, select, text, true, update
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.orm import Session
+
+from app.v_models import Benefit, BenefitPurchase, VCoinTransaction, VolunteerBalance
+
+logger = logging.getLogger(__name__)
+
+# Ключ advisory lock: сверку выполняет только один воркер одновременно
+RECONCILE_LOCK_KEY = 730_035
+
+
+class LedgerEntry(NamedTuple):
+    transaction_id: int
+    balance: int
+    purchase_id: Optional[int] = None
+
+
+def _coalesce(column):
+    return func.coalesce(column, 0)
+
+
+def _balance_cte(volunteer_id: int, values: Dict[str, Any], *conditions):
+    return (
+        update(VolunteerBalance)
+        .where(VolunteerBalance.volunteer_id == volunteer_id, *conditions)
+        .values(**values)
+        .returning(VolunteerBalance.volunteer_id, VolunteerBalance.current_balance)
+        .cte("balance")
+    )
+
+
+def _ledger_cte(balance, amount: int, transaction_type: str, description: Optional[str],
+                event_id: Optional[int], benefit_id: Optional[int]):
+    return (
+        insert(VCoinTransaction)
+        .from_select(
+            ["volunteer_id", "amount", "transaction_type", "description", "event_id", "benefit_id"],
+            select(
+                balance.c.volunteer_id,
+                literal(amount, Integer),
+                literal(transaction_type, String),
+                literal(description, String),
+                literal(event_id, Integer),
+                literal(benefit_id, Integer)
+            )
+        )
+        .returning(VCoinTransaction.id)
+        .cte("ledger")
+    )
+
+
+def ensure_balance(db: Session, volunteer_id: int) -> None:
+    """Create the balance row if it does not exist (no-op otherwise)"""
+    db.execute(
+        pg_insert(VolunteerBalance)
+        .values(
+            volunteer_id=volunteer_id,
+            total_earned=0,
+            current_balance=0,
+            total_spent=0,
+            events_participated=0,
+            events_missed=0,
+            warning_level="green"
+        )
+        .on_conflict_do_nothing(index_elements=["volunteer_id"])
+    )
+
+
+def post_entry(
+    db: Session,
+    volunteer_id: int,
+    amount: int,
+    transaction_type: str,
+    description: Optional[str] = None,
+    *,
+    event_id: Optional[int] = None,
+    benefit_id: Optional[int] = None,
+    balance_values: Optional[Dict[str, Any]] = None,
+    require_funds: bool = False
+) -> Optional[LedgerEntry]:
+    """
+    Add `amount` (negative for spending) to the balance and write the ledger row.
+
+    `balance_values` are extra column updates for the same UPDATE (counters).
+    With `require_funds` the entry is only posted if the balance stays >= 0;
+    None is returned otherwise. The caller commits.
+    """
+    values = {"current_balance": _coalesce(VolunteerBalance.current_balance) + amount}
+    values.update(balance_values or {})
+
+    conditions = []
+    if require_funds:
+        conditions.append(_coalesce(VolunteerBalance.current_balance) >= -amount)
+
+    for attempt in range(2):
+        balance = _balance_cte(volunteer_id, values, *conditions)
+        ledger = _ledger_cte(balance, amount, transaction_type, description, event_id, benefit_id)
+        row = db.execute(
+            select(ledger.c.id, balance.c.current_balance).select_from(balance).join(ledger, true())
+        ).first()
+        if row is not None:
+            return LedgerEntry(row[0], row[1])
+        if require_funds or attempt:
+            return None
+        # Баланса ещё нет (волонтёр без операций): создаём и повторяем
+        ensure_balance(db, volunteer_id)
+    return None
+
+
+def credit(db: Session, volunteer_id: int, amount: int, transaction_type: str = "earned",
+           description: Optional[str] = None, *, event_id: Optional[int] = None,
+           balance_values: Optional[Dict[str, Any]] = None) -> LedgerEntry:
+    """Начисление: current_balance и total_earned растут на amount"""
+    values = {"total_earned": _coalesce(VolunteerBalance.total_earned) + amount}
+    values.update(balance_values or {})
+    return post_entry(
+        db, volunteer_id, amount, transaction_type, description,
+        event_id=event_id, balance_values=values
+    )
+
+
+def adjust(db: Session, volunteer_id: int, amount: int, description: Optional[str] = None,
+           require_funds: bool = False) -> Optional[LedgerEntry]:
+    """Ручная корректировка администратором (не влияет на total_earned/total_spent)"""
+    return post_entry(db, volunteer_id, amount, "admin_adjustment", description, require_funds=require_funds)
+
+
+def refund(db: Session, volunteer_id: int, amount: int, description: Optional[str] = None,
+           benefit_id: Optional[int] = None) -> LedgerEntry:
+    """Возврат за отменённую покупку"""
+    return post_entry(
+        db, volunteer_id, amount, "refund", description,
+        benefit_id=benefit_id,
+        balance_values={"total_spent": _coalesce(VolunteerBalance.total_spent) - amount}
+    )
+
+
+def reserve_stock(db: Session, benefit_id: int) -> bool:
+    """
+    Conditional stock decrement. Benefits without stock_limit always succeed.
+    The benefit row stays locked until commit/rollback.
+    """
+    has_limit = _coalesce(Benefit.stock_limit) > 0
+    row = db.execute(
+        update(Benefit)
+        .where(
+            Benefit.id == benefit_id,
+            Benefit.is_active == True,
+            (~has_limit) | (_coalesce(Benefit.stock_available) > 0)
+        )
+        .values(stock_available=case((has_limit, Benefit.stock_available - 1), else_=Benefit.stock_available))
+        .returning(Benefit.id)
+        .execution_options(synchronize_session=False)
+    ).first()
+    return row is not None
+
+
+def release_stock(db: Session, benefit_id: int) -> None:
+    db.execute(
+        update(Benefit)
+        .where(Benefit.id == benefit_id, _coalesce(Benefit.stock_limit) > 0)
+        .values(stock_available=Benefit.stock_available + 1)
+        .execution_options(synchronize_session=False)
+    )
+
+
+def purchase(db: Session, volunteer_id: int, benefit_id: int, cost: int,
+             description: Optional[str] = None) -> Optional[LedgerEntry]:
+    """
+    Списание + запись в ledger + создание BenefitPurchase одним запросом.
+    None, если V-coins недостаточно. Сток резервируется отдельно (reserve_stock),
+    в той же транзакции; при неудаче вызывающий код делает rollback.
+    """
+    balance = _balance_cte(
+        volunteer_id,
+        {
+            "current_balance": _coalesce(VolunteerBalance.current_balance) - cost,
+            "total_spent": _coalesce(VolunteerBalance.total_spent) + cost
+        },
+        _coalesce(VolunteerBalance.current_balance) >= cost
+    )
+    ledger = _ledger_cte(balance, -cost, "spent", description, None, benefit_id)
+    purchase_row = (
+        insert(BenefitPurchase)
+        .from_select(
+            ["volunteer_id", "benefit_id", "v_coins_spent", "status"],
+            select(balance.c.volunteer_id, literal(benefit_id, Integer), literal(cost, Integer), literal("pending", String))
+        )
+        .returning(BenefitPurchase.id)
+        .cte("purchase")
+    )
+    row = db.execute(
+        select(ledger.c.id, balance.c.current_balance, purchase_row.c.id)
+        .select_from(balance)
+        .join(ledger, true())
+        .join(purchase_row, true())
+    ).first()
+    if row is None:
+        return None
+    return LedgerEntry(row[0], row[1], row[2])
+
+
+# Уровень предупреждения по числу пропусков подряд
+def _warning_level(missed):
+    return case(
+        (missed >= 3, "red"),
+        (missed == 2, "orange"),
+        (missed == 1, "yellow"),
+        else_="green"
+    )
+
+
+def record_attendance(db: Session, volunteer_id: int, reward: int, description: Optional[str] = None,
+                      event_id: Optional[int] = None) -> LedgerEntry:
+    """Начисление за участие: +reward, events_participated + 1, предупреждения сбрасываются"""
+    return credit(
+        db, volunteer_id, reward, "earned", description,
+        event_id=event_id,
+        balance_values={
+            "events_participated": _coalesce(VolunteerBalance.events_participated) + 1,
+            "events_missed": 0,
+            "warning_level": "green"
+        }
+    )
+
+
+def record_absence(db: Session, volunteer_id: int) -> str:
+    """events_missed + 1 и новый warning_level; возвращает warning_level"""
+    missed = _coalesce(VolunteerBalance.events_missed) + 1
+    statement = (
+        update(VolunteerBalance)
+        .where(VolunteerBalance.volunteer_id == volunteer_id)
+        .values(events_missed=missed, warning_level=_warning_level(missed))
+        .returning(VolunteerBalance.warning_level)
+        .execution_options(synchronize_session=False)
+    )
+    row = db.execute(statement).first()
+    if row is None:
+        ensure_balance(db, volunteer_id)
+        row = db.execute(statement).first()
+    return row[0]
+
+
+class AttendanceMark(NamedTuple):
+    volunteer_id: int
+    attended: bool
+    reward: int = 0
+    description: Optional[str] = None
+    event_id: Optional[int] = None
+
+
+ATTENDANCE_BALANCES_SQL = text("""
+    WITH marks AS (
+        SELECT volunteer_id,
+               SUM(CASE WHEN attended THEN reward ELSE 0 END) AS reward,
+               COUNT(*) FILTER (WHERE attended) AS attended_count,
+               COUNT(*) FILTER (WHERE NOT attended) AS missed_count
+        FROM unnest(CAST(:volunteer_ids AS integer[]), CAST(:attended AS boolean[]), CAST(:rewards AS integer[]))
+             AS m(volunteer_id, attended, reward)
+        GROUP BY volunteer_id
+    ), updated AS (
+        SELECT b.id,
+               m.reward,
+               m.attended_count,
+               CASE WHEN m.attended_count > 0 THEN 0
+                    ELSE COALESCE(b.events_missed, 0) + m.missed_count END AS events_missed
+        FROM volunteer_balances b
+        JOIN marks m ON m.volunteer_id = b.volunteer_id
+    )
+    UPDATE volunteer_balances b
+    SET current_balance = COALESCE(b.current_balance, 0) + u.reward,
+        total_earned = COALESCE(b.total_earned, 0) + u.reward,
+        events_participated = COALESCE(b.events_participated, 0) + u.attended_count,
+        events_missed = u.events_missed,
+        warning_level = CASE WHEN u.events_missed >= 3 THEN 'red'
+                             WHEN u.events_missed = 2 THEN 'orange'
+                             WHEN u.events_missed = 1 THEN 'yellow'
+                             ELSE 'green' END,
+        updated_at = now()
+    FROM updated u
+    WHERE b.id = u.id
+    RETURNING b.volunteer_id, b.current_balance, b.warning_level
+""")
+
+
+def record_attendance_bulk(db: Session, marks: List[AttendanceMark]) -> Dict[int, Tuple[int, str]]:
+    """
+    Set-based version of record_attendance/record_absence for many volunteers:
+    one multi-row INSERT for missing balances, one UPDATE for all balances,
+    one multi-row INSERT into the ledger. Returns
+    volunteer_id -> (current_balance, warning_level). The caller commits.
+    """
+    if not marks:
+        return {}
+
+    volunteer_ids = sorted({mark.volunteer_id for mark in marks})
+    db.execute(
+        pg_insert(VolunteerBalance)
+        .values([
+            {
+                "volunteer_id": volunteer_id,
+                "total_earned": 0,
+                "current_balance": 0,
+                "total_spent": 0,
+                "events_participated": 0,
+                "events_missed": 0,
+                "warning_level": "green"
+            }
+            for volunteer_id in volunteer_ids
+        ])
+        .on_conflict_do_nothing(index_elements=["volunteer_id"])
+    )
+
+    balances = {
+        row.volunteer_id: (row.current_balance, row.warning_level)
+        for row in db.execute(ATTENDANCE_BALANCES_SQL, {
+            "volunteer_ids": [mark.volunteer_id for mark in marks],
+            "attended": [mark.attended for mark in marks],
+            "rewards": [mark.reward or 0 for mark in marks]
+        })
+    }
+
+    ledger_rows = [
+        {
+            "volunteer_id": mark.volunteer_id,
+            "amount": mark.reward,
+            "transaction_type": "earned",
+            "description": mark.description,
+            "event_id": mark.event_id
+        }
+        for mark in marks
+        if mark.attended and mark.reward
+    ]
+    if ledger_rows:
+        db.execute(insert(VCoinTransaction), ledger_rows)
+
+    return balances
+
+
+# Сверка в два запроса: сначала блокируем расходящиеся балансы, затем
+# пересчитываем их новым запросом. В READ COMMITTED у второго запроса свежий
+# снимок, в нём видны все транзакции, закоммиченные пока мы ждали блокировку.
+RECONCILE_LOCK_SQL = text("""
+    WITH ledger AS (
+        SELECT volunteer_id, COALESCE(SUM(amount), 0) AS balance
+        FROM vcoin_transactions
+        GROUP BY volunteer_id
+    )
+    SELECT b.id
+    FROM volunteer_balances b
+    LEFT JOIN ledger l ON l.volunteer_id = b.volunteer_id
+    WHERE b.current_balance IS DISTINCT FROM COALESCE(l.balance, 0)
+    FOR UPDATE OF b
+""")
+
+RECONCILE_SQL = text("""
+    UPDATE volunteer_balances b
+    SET current_balance = COALESCE((
+        SELECT SUM(t.amount) FROM vcoin_transactions t WHERE t.volunteer_id = b.volunteer_id
+    ), 0)
+    WHERE b.id = ANY(:balance_ids)
+      AND b.current_balance IS DISTINCT FROM COALESCE((
+        SELECT SUM(t.amount) FROM vcoin_transactions t WHERE t.volunteer_id = b.volunteer_id
+    ), 0)
+    RETURNING b.volunteer_id
+""")
+
+
+def reconcile_balances(db: Session) -> int:
+    """
+    Recompute current_balance from the ledger for the volunteers whose balance
+    drifted. Returns the number of corrected balances (0 if another worker is
+    reconciling right now).
+    """
+    locked = db.execute(select(func.pg_try_advisory_xact_lock(RECONCILE_LOCK_KEY))).scalar()
+    if not locked:
+        return 0
+
+    balance_ids = [row[0] for row in db.execute(RECONCILE_LOCK_SQL)]
+    if not balance_ids:
+        db.commit()
+        return 0
+
+    fixed = [row[0] for row in db.execute(RECONCILE_SQL, {"balance_ids": balance_ids})]
+    db.commit()
+
+    if fixed:
+        logger.warning(f"V-coin balances corrected from ledger for {len(fixed)} volunteer(s): {fixed[:20]}")
+    return len(fixed)
@@ -0,0 +1,86 @@
+"""
+V-coin reconciliation scheduler.
+
+Periodically recomputes `volunteer_balances.current_balance` from the
+V-coin ledger (see app/vcoin_ledger.py). The job is a single bulk UPDATE;
+an advisory lock makes sure only one worker runs it at a time.
+"""
+
+import asyncio
+import logging
+from typing import Optional
+
+from app.database import SessionLocal
+from app.vcoin_ledger import reconcile_balances
+from config import get_settings
+
+logger = logging.getLogger(__name__)
+
+_scheduler_running = False
+_scheduler_task: Optional[asyncio.Task] = None
+
+
+def run_reconciliation() -> int:
+    """Run one reconciliation pass in its own session"""
+    db = SessionLocal()
+    try:
+        return reconcile_balances(db)
+    except Exception:
+        db.rollback()
+        raise
+    finally:
+        db.close()
+
+
+async def scheduler_loop(interval_minutes: int):
+    logger.info(f"V-coin reconciliation scheduler started (interval: {interval_minutes} minute(s))")
+
+    while _scheduler_running:
+        # First pass one interval after startup, so deploys do not all hit the DB at once
+        await asyncio.sleep(interval_minutes * 60)
+        try:
+            # Bulk UPDATE runs in a thread so the event loop is not blocked
+            count = await asyncio.to_thread(run_reconciliation)
+            if count > 0:
+                logger.info(f"Reconciliation corrected {count} V-coin balance(s)")
+        except Exception as e:
+            logger.error(f"V-coin reconciliation error (will retry): {str(e)}")
+
+
+def start_scheduler():
+    """
+    Start the background reconciliation job.
+    Should be called when the application starts.
+    """
+    global _scheduler_running, _scheduler_task
+
+    interval = get_settings().VCOIN_RECONCILE_INTERVAL_MINUTES
+    if interval <= 0:
+        logger.info("V-coin reconciliation scheduler disabled")
+        return
+
+    if _scheduler_running:
+        logger.warning("V-coin reconciliation scheduler is already running")
+        return
+
+    _scheduler_running = True
+    try:
+        _scheduler_task = asyncio.create_task(scheduler_loop(interval))
+    except Exception as e:
+        logger.error(f"Failed to create V-coin reconciliation task: {str(e)}")
+        _scheduler_running = False
+
+
+def stop_scheduler():
+    """
+    Stop the background reconciliation job.
+    Should be called when the application shuts down.
+    """
+    global _scheduler_running, _scheduler_task
+
+    _scheduler_running = False
+
+    if _scheduler_task:
+        _scheduler_task.cancel()
+        _scheduler_task = None
+        logger.info("V-coin reconciliation scheduler stopped")
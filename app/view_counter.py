@@ -0,0 +1,85 @@
+"""
+Buffered view counters
+
+Public detail pages used to commit `views_count += 1` on every read. Views are
+now accumulated in memory and written in one UPDATE per entity when the
+buffer is flushed (from a background task after the response, and on
+shutdown), so reads stay read-only.
+"""
+
+import logging
+import threading
+import time
+from collections import Counter
+from typing import Dict
+
+from sqlalchemy import update
+
+from app.database import SessionLocal
+
+logger = logging.getLogger(__name__)
+
+
+class ViewCounter:
+    """Per-worker buffer of pending view increments for one model"""
+
+    def __init__(self, model, column: str = "views_count", flush_interval: float = 30):
+        self.model = model
+        self.column = column
+        self.flush_interval = flush_interval
+        self._pending: Counter = Counter()
+        self._lock = threading.Lock()
+        self._last_flush = time.monotonic()
+
+    def add(self, entity_id: int, count: int = 1) -> None:
+        with self._lock:
+            self._pending[entity_id] += count
+
+    def pending(self, entity_id: int) -> int:
+        with self._lock:
+            return self._pending.get(entity_id, 0)
+
+    def is_due(self) -> bool:
+        return time.monotonic() - self._last_flush >= self.flush_interval
+
+    def flush_if_due(self) -> None:
+        if self.is_due():
+            self.flush()
+
+    def flush(self) -> int:
+        """Write pending increments; returns the number of rows updated"""
+        with self._lock:
+            pending: Dict[int, int] = dict(self._pending)
+            self._pending.clear()
+            self._last_flush = time.monotonic()
+
+        if not pending:
+            return 0
+
+        column = getattr(self.model, self.column)
+        values = {self.column: column}
+        # Do not let a view bump updated_at (column onupdate fires for Core UPDATEs too)
+        if hasattr(self.model, "updated_at"):
+            values["updated_at"] = self.model.updated_at
+
+        db = SessionLocal()
+        try:
+            for entity_id, count in pending.items():
+                values[self.column] = column + count
+                db.execute(
+                    update(self.model)
+                    .where(self.model.id == entity_id)
+                    .values(**values)
+                    .execution_options(synchronize_session=False)
+                )
+            db.commit()
+            return len(pending)
+        except Exception as e:
+            db.rollback()
+            logger.error(f"Failed to flush {self.model.__tablename__} views: {str(e)}")
+            # Put the increments back so they are retried on the next flush
+            with self._lock:
+                self._pending.update(pending)
+            return 0
+        finally:
+            db.close()
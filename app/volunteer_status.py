@@ -0,0 +1,109 @@
+"""
+Volunteer status ladder
+
+The V-coins needed for each status come from the admin-editable
+`status_requirements` table. The ladder is built once and kept in a
+process-wide cache; the admin endpoints that change the table invalidate
+it, and the TTL bounds staleness in other workers.
+"""
+
+from typing import Dict, List, NamedTuple, Optional
+
+from sqlalchemy.orm import Session
+
+from app.cache import LocalCache
+from app.v_models import StatusRequirement
+
+STATUS_LADDER_TTL = 600
+
+# Дефолтные требования (используются, пока таблица пустая, и при сбросе)
+DEFAULT_STATUS_REQUIREMENTS = [
+    {
+        "status": "VOLUNTEER",
+        "title_ru": "Волонтер",
+        "title_kz": "Волонтер",
+        "level": 1,
+        "v_coins_required": 0,  # Стартовый статус
+        "benefits_ru": "Базовый статус",
+        "benefits_kz": "Негізгі мәртебе"
+    },
+    {
+        "status": "TEAM_LEADER",
+        "title_ru": "Тимлидер",
+        "title_kz": "Топ жетекшісі",
+        "level": 2,
+        "v_coins_required": 150,
+        "benefits_ru": "Доступ к роли тимлидера, Управление командой, Больше бонусов",
+        "benefits_kz": "Топ жетекшісі рөліне қол жеткізу, Команданы басқару, Көбірек бонустар"
+    },
+    {
+        "status": "SUPERVISOR",
+        "title_ru": "Супервайзер",
+        "title_kz": "Супервайзер",
+        "level": 3,
+        "v_coins_required": 200,
+        "benefits_ru": "Доступ к роли супервайзера, Контроль проектов, VIP плюшки",
+        "benefits_kz": "Супервайзер рөліне қол жеткізу, Жобаларды бақылау, VIP артықшылықтар"
+    },
+    {
+        "status": "COORDINATOR",
+        "title_ru": "Координатор",
+        "title_kz": "Үйлестіруші",
+        "level": 4,
+        "v_coins_required": 300,
+        "benefits_ru": "Высший статус, Координация программ, Все привилегии",
+        "benefits_kz": "Жоғары мәртебе, Бағдарламаларды үйлестіру, Барлық артықшылықтар"
+    }
+]
+
+MAX_LEVEL_BENEFITS = ["Максимальный уровень достигнут"]
+
+
+class StatusStep(NamedTuple):
+    """What a volunteer with `status` needs for the next status"""
+    status: str
+    level: int
+    next_status: Optional[str]
+    v_coins_needed: int
+    next_benefits: List[str]
+
+
+def _split_benefits(text: Optional[str]) -> List[str]:
+    return [item.strip() for item in (text or "").split(",") if item.strip()]
+
+
+def build_status_ladder(requirements: List[Dict]) -> Dict[str, StatusStep]:
+    ordered = sorted(requirements, key=lambda r: r["level"])
+    ladder = {}
+    for current, following in zip(ordered, ordered[1:] + [None]):
+        ladder[current["status"]] = StatusStep(
+            status=current["status"],
+            level=current["level"],
+            next_status=following["status"] if following else None,
+            v_coins_needed=(following["v_coins_required"] or 0) if following else 0,
+            next_benefits=_split_benefits(following["benefits_ru"]) if following else MAX_LEVEL_BENEFITS
+        )
+    return ladder
+
+
+status_ladder_cache = LocalCache(maxsize=1, ttl=STATUS_LADDER_TTL)
+
+
+def _load_status_ladder(db: Session) -> Dict[str, StatusStep]:
+    rows = db.query(
+        StatusRequirement.status,
+        StatusRequirement.level,
+        StatusRequirement.v_coins_required,
+        StatusRequirement.benefits_ru
+    ).all()
+    requirements = [row._asdict() for row in rows] or DEFAULT_STATUS_REQUIREMENTS
+    return build_status_ladder(requirements)
+
+
+def get_status_ladder(db: Session) -> Dict[str, StatusStep]:
+    """status -> StatusStep (read-only; defaults are used while the table is empty)"""
+    return status_ladder_cache.get_or_set("ladder", lambda: _load_status_ladder(db))
+
+
+def invalidate_status_ladder() -> None:
+    status_ladder_cache.clear()
@@ -0,0 +1,110 @@
+#!/usr/bin/env python3
+"""
+Bulk email benchmark against a local fake Resend API
+
+Starts an in-process HTTP server that imitates POST /emails and
+POST /emails/batch (with configurable latency), points the resend SDK at it
+and compares one API call per recipient with EmailService.send_bulk_emails
+(batch API, parallel batches). Any batch containing an address at
+@fail.test is rejected, to check that a rejected batch is retried and only
+the bad address fails.
+
+Usage:
+    python benchmarks/bulk_email.py
+    python benchmarks/bulk_email.py --recipients 1000 --latency-ms 120
+"""
+
+import argparse
+import json
+import sys
+import threading
+import time
+import uuid
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import resend  # noqa: E402
+
+from app.email_service import EmailService  # noqa: E402
+
+LATENCY = 0.1
+CALLS = {"/emails": 0, "/emails/batch": 0}
+
+
+class FakeResendHandler(BaseHTTPRequestHandler):
+    def log_message(self, format, *args):
+        pass
+
+    def _reply(self, code, payload):
+        body = json.dumps(payload).encode()
+        self.send_response(code)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_POST(self):
+        payload = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+        CALLS[self.path] = CALLS.get(self.path, 0) + 1
+        time.sleep(LATENCY)
+
+        emails = payload if self.path == "/emails/batch" else [payload]
+        if any(to.endswith("@fail.test") for email in emails for to in email["to"]):
+            return self._reply(422, {"statusCode": 422, "name": "validation_error", "message": "Invalid `to` field"})
+
+        if self.path == "/emails/batch":
+            return self._reply(200, {"data": [{"id": str(uuid.uuid4())} for _ in emails]})
+        return self._reply(200, {"id": str(uuid.uuid4())})
+
+
+def main():
+    global LATENCY
+
+    parser = argparse.ArgumentParser(description="Bulk email benchmark (fake Resend API)")
+    parser.add_argument("--recipients", type=int, default=500)
+    parser.add_argument("--latency-ms", type=float, default=100, help="Latency of each fake API call")
+    args = parser.parse_args()
+    LATENCY = args.latency_ms / 1000
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), FakeResendHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    resend.api_url = f"http://127.0.0.1:{server.server_address[1]}"
+
+    service = EmailService()
+    service.api_key = resend.api_key = "re_fake"
+    service.from_email = "noreply@example.test"
+
+    recipients = [f"user{i}@example.test" for i in range(args.recipients)]
+    # Один неверный адрес: Resend отклоняет всю пачку, но не отправленным должен остаться только он
+    recipients[-1] = "broken@fail.test"
+
+    print(f"📧 {len(recipients)} recipients, fake Resend latency {args.latency_ms:.0f} ms\n")
+
+    started = time.perf_counter()
+    per_recipient_sent = sum(
+        service.send_email(to_email, "Benchmark", "<p>Hello</p>", "Hello") for to_email in recipients
+    )
+    per_recipient_time = time.perf_counter() - started
+    print(f"one call per recipient  {per_recipient_time:8.2f} s   {CALLS['/emails']} API calls, {per_recipient_sent} sent")
+
+    started = time.perf_counter()
+    result = service.send_bulk_emails(recipients, "Benchmark", "<p>Hello</p>", "Hello")
+    batch_time = time.perf_counter() - started
+    print(
+        f"batch API, parallel     {batch_time:8.2f} s   {CALLS['/emails/batch']} API calls, "
+        f"{result['sent']} sent, {result['failed']} failed"
+    )
+
+    failed = set(result["failed_emails"])
+    assert failed == {"broken@fail.test"}, f"expected only the bad address to fail, got {len(failed)}"
+    assert result["sent"] == len(recipients) - 1, "valid recipients of the rejected batch were dropped"
+    assert set(result["email_ids"]) | failed == set(recipients), "recipient results missing"
+    print(f"\nSpeedup: {per_recipient_time / batch_time:.1f}x, per-recipient results tracked ✅")
+
+    server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,122 @@
+#!/usr/bin/env python3
+"""
+Fuzzy name search benchmark (needs PostgreSQL with pg_trgm)
+
+Seeds a scratch schema with N generated Kazakh/Russian full names, builds the
+same GIN trigram index as migrations/014_add_trigram_indexes.sql and compares
+the current `ILIKE '%q%'` filter with app.fuzzy_search.apply_fuzzy_search,
+for exact names and for the same names with a typo. The database is taken
+from the app settings (POSTGRES_*); the scratch schema is dropped afterwards.
+
+Usage:
+    python benchmarks/fuzzy_search.py
+    python benchmarks/fuzzy_search.py --rows 100000 --repeat 20 --similarity 0.4
+"""
+
+import argparse
+import random
+import statistics
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from sqlalchemy import Column, Integer, MetaData, Table, Text, text  # noqa: E402
+from sqlalchemy.orm import Session  # noqa: E402
+
+from app.database import engine  # noqa: E402
+from app.fuzzy_search import DEFAULT_SIMILARITY, apply_fuzzy_search  # noqa: E402
+
+SCHEMA = "bench_fuzzy"
+
+FIRST_NAMES = [
+    "Айдар", "Асель", "Ерлан", "Жанар", "Нурлан", "Айгерим", "Дамир", "Динара", "Ержан", "Мадина",
+    "Арман", "Гульнар", "Бауыржан", "Салтанат", "Тимур", "Алия", "Серик", "Сауле", "Данияр", "Камила",
+    "Иван", "Ольга", "Сергей", "Анна", "Дмитрий", "Елена", "Алексей", "Наталья", "Михаил", "Татьяна",
+]
+SYLLABLES = ["ка", "ра", "жан", "бек", "нур", "сул", "та", "ман", "ба", "тай", "ер", "ас", "қа", "ғи", "ли", "мо", "ро", "зо"]
+SURNAME_SUFFIXES = ["ов", "ова", "ев", "ева", "ұлы", "қызы", "ин", "ина", "баев", "баева"]
+
+QUERIES = ["Нурлан Касымов", "Айгерим Сулейменова", "Дмитрий Морозов", "Бауыржан Жанбеков", "Салтанат Тайманова"]
+
+
+def make_name(rng):
+    surname = "".join(rng.choice(SYLLABLES) for _ in range(rng.randint(2, 3))).capitalize()
+    return f"{rng.choice(FIRST_NAMES)} {surname}{rng.choice(SURNAME_SUFFIXES)}"
+
+
+def typo(name, rng):
+    """One swapped pair of neighbouring letters inside a word"""
+    positions = [i for i in range(1, len(name) - 1) if name[i].isalpha() and name[i + 1].isalpha()]
+    i = rng.choice(positions)
+    return name[:i] + name[i + 1] + name[i] + name[i + 2:]
+
+
+def timed(fn, repeat):
+    samples, result = [], None
+    for _ in range(repeat):
+        started = time.perf_counter()
+        result = fn()
+        samples.append((time.perf_counter() - started) * 1000)
+    return statistics.median(samples), result
+
+
+def main():
+    parser = argparse.ArgumentParser(description="ILIKE vs pg_trgm fuzzy search")
+    parser.add_argument("--rows", type=int, default=100_000)
+    parser.add_argument("--repeat", type=int, default=20)
+    parser.add_argument("--limit", type=int, default=20)
+    parser.add_argument("--similarity", type=float, default=DEFAULT_SIMILARITY)
+    args = parser.parse_args()
+
+    rng = random.Random(42)
+    names = Table("names", MetaData(schema=SCHEMA), Column("id", Integer, primary_key=True), Column("full_name", Text))
+
+    with engine.begin() as conn:
+        conn.execute(text("CREATE EXTENSION IF NOT EXISTS pg_trgm"))
+        conn.execute(text(f"DROP SCHEMA IF EXISTS {SCHEMA} CASCADE"))
+        conn.execute(text(f"CREATE SCHEMA {SCHEMA}"))
+        names.create(conn)
+
+        print(f"🌱 Seeding {args.rows} names...")
+        rows = [{"full_name": make_name(rng)} for _ in range(args.rows - len(QUERIES))]
+        rows += [{"full_name": name} for name in QUERIES]
+        rng.shuffle(rows)
+        conn.execute(names.insert(), rows)
+        conn.execute(text(f"CREATE INDEX ON {SCHEMA}.names USING GIN (full_name gin_trgm_ops)"))
+        conn.execute(text(f"ANALYZE {SCHEMA}.names"))
+
+    try:
+        with Session(engine) as db:
+            def ilike(term):
+                return db.query(names.c.id).filter(names.c.full_name.ilike(f"%{term}%")).limit(args.limit).all()
+
+            def fuzzy(term):
+                query = apply_fuzzy_search(db, db.query(names.c.id, names.c.full_name), [names.c.full_name], term, args.similarity)
+                return query.limit(args.limit).all()
+
+            print(f"\n{'query':<28} {'ILIKE ms':>9} {'hits':>5} {'fuzzy ms':>9} {'hits':>5}  top fuzzy match")
+            totals = {"ilike": [], "fuzzy": []}
+            for name in QUERIES:
+                for term in (name, typo(name, rng)):
+                    ilike_ms, ilike_rows = timed(lambda: ilike(term), args.repeat)
+                    fuzzy_ms, fuzzy_rows = timed(lambda: fuzzy(term), args.repeat)
+                    totals["ilike"].append(ilike_ms)
+                    totals["fuzzy"].append(fuzzy_ms)
+                    top = fuzzy_rows[0].full_name if fuzzy_rows else "-"
+                    print(f"{term:<28} {ilike_ms:9.2f} {len(ilike_rows):5d} {fuzzy_ms:9.2f} {len(fuzzy_rows):5d}  {top}")
+            db.rollback()
+
+        print(
+            f"\nMedian: ILIKE {statistics.median(totals['ilike']):.2f} ms, "
+            f"fuzzy {statistics.median(totals['fuzzy']):.2f} ms "
+            f"({args.rows} rows, similarity {args.similarity})"
+        )
+    finally:
+        with engine.begin() as conn:
+            conn.execute(text(f"DROP SCHEMA IF EXISTS {SCHEMA} CASCADE"))
+
+
+if __name__ == "__main__":
+    main()
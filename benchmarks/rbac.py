@@ -0,0 +1,183 @@
+#!/usr/bin/env python3
+"""
+Per-request authorization cost of the RBAC dependencies
+
+1. Checkers called directly (the admin lookup is not included) for every
+   role × module × permission combination, once with the previous nested-dict
+   implementation and once with the compiled bitmask table; both must give
+   the same decisions.
+2. The real per-request path: a FastAPI route guarded by require_permission,
+   called through the ASGI app (get_current_admin overridden), previous
+   dependency vs. compiled one.
+
+Timings are the median of --repeats interleaved runs.
+
+Usage:
+    python benchmarks/rbac.py
+    python benchmarks/rbac.py --rounds 1000 --requests 5000 --repeats 11
+"""
+
+import argparse
+import asyncio
+import statistics
+import sys
+import time
+from pathlib import Path
+from types import SimpleNamespace
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from fastapi import Depends, FastAPI, HTTPException  # noqa: E402
+
+from app.rbac import Module, Permission, Role, ROLE_PERMISSIONS  # noqa: E402
+from app.oauth2 import get_current_admin  # noqa: E402
+from app.rbac.middleware import require_module_access, require_permission  # noqa: E402
+
+MODULES = [value for name, value in vars(Module).items() if not name.startswith("_")]
+PERMISSIONS = [value for name, value in vars(Permission).items() if not name.startswith("_")]
+
+
+def legacy_permission_checker(module, permission):
+    """Previous implementation: role.value per call, nested dict + set lookup"""
+    def permission_checker(current_admin):
+        admin_role = current_admin.role.value if hasattr(current_admin.role, 'value') else current_admin.role
+        if admin_role not in ROLE_PERMISSIONS or permission not in ROLE_PERMISSIONS[admin_role].get(module, set()):
+            raise HTTPException(status_code=403, detail=f"У вас нет прав для выполнения действия '{permission}' в модуле '{module}'")
+        return current_admin
+    return permission_checker
+
+
+def legacy_require_permission(module, permission):
+    """Previous dependency factory: a new closure on every call"""
+    checker = legacy_permission_checker(module, permission)
+
+    def permission_checker(current_admin=Depends(get_current_admin)):
+        return checker(current_admin)
+    return permission_checker
+
+
+def decide(checker, admin):
+    try:
+        checker(admin)
+        return True
+    except HTTPException:
+        return False
+
+
+def time_checks(cases, rounds):
+    started = time.perf_counter()
+    for _ in range(rounds):
+        for checker, admin in cases:
+            decide(checker, admin)
+    return (time.perf_counter() - started) * 1e9 / (len(cases) * rounds)
+
+
+def compare(title, unit, variants, repeats):
+    """variants: [(label, fn)] where fn() returns the cost of one call; runs are interleaved"""
+    samples = {label: [] for label, _ in variants}
+    for _ in range(repeats):
+        for label, fn in variants:
+            samples[label].append(fn())
+    medians = {label: statistics.median(values) for label, values in samples.items()}
+    print(title)
+    for label, _ in variants:
+        print(f"  {label:34} {medians[label]:10.1f} {unit}")
+    return medians
+
+
+def request_app(dependency, admin):
+    app = FastAPI()
+
+    async def current_admin():
+        return admin
+    app.dependency_overrides[get_current_admin] = current_admin
+
+    @app.get("/places")
+    async def places(current_admin=Depends(dependency)):
+        return {"ok": True}
+    return app
+
+
+async def time_requests(app, requests):
+    scope = {
+        "type": "http", "asgi": {"version": "3.0"}, "http_version": "1.1", "method": "GET",
+        "scheme": "http", "path": "/places", "raw_path": b"/places", "root_path": "",
+        "query_string": b"", "headers": [], "client": ("127.0.0.1", 1), "server": ("test", 80),
+    }
+    statuses = []
+
+    async def receive():
+        return {"type": "http.request", "body": b"", "more_body": False}
+
+    async def send(message):
+        if message["type"] == "http.response.start":
+            statuses.append(message["status"])
+
+    started = time.perf_counter()
+    for _ in range(requests):
+        await app(dict(scope), receive, send)
+    elapsed = time.perf_counter() - started
+    assert set(statuses) == {200}, f"unexpected statuses {set(statuses)}"
+    return elapsed * 1e6 / requests
+
+
+def split(checkers, admins):
+    """(allowed, denied) cases; denials are dominated by building the HTTPException"""
+    cases = [(checker, admin) for checker in checkers for admin in admins]
+    allowed = [case for case in cases if decide(*case)]
+    return allowed, [case for case in cases if case not in allowed]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="RBAC authorization microbenchmark")
+    parser.add_argument("--rounds", type=int, default=200, help="Passes over all combinations per run")
+    parser.add_argument("--requests", type=int, default=2000, help="Requests per run")
+    parser.add_argument("--repeats", type=int, default=7, help="Interleaved runs per variant")
+    args = parser.parse_args()
+
+    # Роли приходят из БД строками, поэтому проверяем и строки, и члены Enum
+    admins = [SimpleNamespace(role=role.value) for role in Role] + [SimpleNamespace(role=role) for role in Role]
+    pairs = [(module, permission) for module in MODULES for permission in PERMISSIONS]
+
+    legacy = [legacy_permission_checker(module, permission) for module, permission in pairs]
+    compiled = [require_permission(module, permission) for module, permission in pairs]
+
+    mismatches = [
+        (admin.role, module, permission)
+        for (module, permission), old, new in zip(pairs, legacy, compiled)
+        for admin in admins
+        if decide(old, admin) != decide(new, admin)
+    ]
+    if mismatches:
+        raise SystemExit(f"❌ Decisions differ: {mismatches[:5]}")
+
+    print(f"🔐 {len(admins)} admins × {len(pairs)} (module, permission) pairs, {args.rounds} rounds\n")
+    legacy_allowed, legacy_denied = split(legacy, admins)
+    compiled_allowed, compiled_denied = split(compiled, admins)
+    module_allowed, _ = split([require_module_access(module) for module in MODULES], admins)
+
+    checks = compare("Checker only:", "ns/check", [
+        ("allowed: nested dict (previous)", lambda: time_checks(legacy_allowed, args.rounds)),
+        ("allowed: compiled bitmask table", lambda: time_checks(compiled_allowed, args.rounds)),
+        ("denied: nested dict (previous)", lambda: time_checks(legacy_denied, args.rounds)),
+        ("denied: compiled bitmask table", lambda: time_checks(compiled_denied, args.rounds)),
+        ("allowed: module access (compiled)", lambda: time_checks(module_allowed, args.rounds)),
+    ], args.repeats)
+
+    admin = SimpleNamespace(role=Role.SUPER_ADMIN.value)
+    legacy_app = request_app(legacy_require_permission(Module.LEISURE, Permission.CREATE), admin)
+    compiled_app = request_app(require_permission(Module.LEISURE, Permission.CREATE), admin)
+    loop = asyncio.new_event_loop()
+    requests = compare("\nRequest through FastAPI (allowed):", "µs/request", [
+        ("previous dependency", lambda: loop.run_until_complete(time_requests(legacy_app, args.requests))),
+        ("compiled dependency", lambda: loop.run_until_complete(time_requests(compiled_app, args.requests))),
+    ], args.repeats)
+    loop.close()
+
+    print(
+        f"\nSpeedup on allowed checks: {checks['allowed: nested dict (previous)'] / checks['allowed: compiled bitmask table']:.2f}x, "
+        f"per request: {requests['previous dependency'] / requests['compiled dependency']:.2f}x, decisions identical ✅"
+    )
+
+if __name__ == "__main__":
+    main()
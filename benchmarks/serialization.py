@@ -0,0 +1,165 @@
+#!/usr/bin/env python3
+"""
+Response serialization benchmark
+
+Times the three ways a payload can be turned into response bytes, for the
+largest public payloads:
+- stock:   FastAPI's serialize_response (validate -> jsonable Python) + json.dumps
+- orjson:  the same pass rendered by AppJSONResponse (the default response class)
+- fast:    app.fast_json fast path (ModelJSON for response models,
+           json_response for hand-built dicts)
+
+Payloads are synthetic objects shaped like the ORM rows the routes return:
+the news list (List[NewsResponse]), the vacancy list (hand-built dicts, as in
+crud.get_vacancies_filtered) and a course tree (CourseDetail). The outputs of
+all three paths are checked to decode to the same JSON.
+
+Usage:
+    python benchmarks/serialization.py
+    python benchmarks/serialization.py --news 2000 --vacancies 1000 --chapters 8 --repeat 30
+"""
+
+import argparse
+import asyncio
+import enum
+import json
+import statistics
+import sys
+import time
+import typing
+from datetime import date, datetime, timedelta
+from pathlib import Path
+from types import SimpleNamespace
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from fastapi.responses import JSONResponse  # noqa: E402
+from fastapi.routing import serialize_response  # noqa: E402
+from fastapi.utils import create_model_field  # noqa: E402
+from pydantic import BaseModel  # noqa: E402
+
+from app import news_schemas, schemas  # noqa: E402
+from app.fast_json import AppJSONResponse, ModelJSON, json_response  # noqa: E402
+
+NOW = datetime(2026, 10, 19, 12, 30, 15, 123456)
+TEXT = "Жастар саясаты және волонтерлік қызмет бойынша жаңалықтар. " * 6
+
+
+def fake(tp, i, list_size):
+    """Attribute object shaped like `tp` (pydantic model, list, scalar)"""
+    origin = typing.get_origin(tp)
+    if origin is typing.Union:
+        return fake(next(arg for arg in typing.get_args(tp) if arg is not type(None)), i, list_size)
+    if origin in (list, typing.List):
+        return [fake(typing.get_args(tp)[0], i * list_size + n, list_size) for n in range(list_size)]
+    if isinstance(tp, type) and issubclass(tp, BaseModel):
+        return SimpleNamespace(**{
+            name: fake(field.annotation, i, list_size) for name, field in tp.model_fields.items()
+        })
+    if isinstance(tp, type) and issubclass(tp, enum.Enum):
+        return next(iter(tp))
+    if tp is bool:
+        return i % 2 == 0
+    if tp is int:
+        return i
+    if tp is float:
+        return i / 7
+    if tp is datetime:
+        return NOW - timedelta(minutes=i)
+    if tp is date:
+        return (NOW - timedelta(days=i)).date()
+    if tp is str:
+        return f"{i} {TEXT}"
+    return None
+
+
+def vacancy_dicts(count):
+    return [
+        {
+            "id": i,
+            "profession_id": i % 50,
+            "city_id": i % 20,
+            "description_kz": TEXT,
+            "description_ru": TEXT,
+            "requirements_kz": TEXT,
+            "requirements_ru": TEXT,
+            "employment_type": "full_time",
+            "work_type": "office",
+            "salary_min": 150000 + i,
+            "salary_max": 300000 + i,
+            "experience_years": i % 5,
+            "company_name": f"ТОО Компания {i}",
+            "contact_email": f"hr{i}@example.kz",
+            "contact_phone": "+77001234567",
+            "deadline": (NOW + timedelta(days=30)).date(),
+            "is_active": True,
+            "created_at": NOW - timedelta(hours=i),
+            "updated_at": NOW,
+            "profession": {"id": i % 50, "name_ru": "Программист", "name_kz": "Бағдарламашы"},
+            "city": {"id": i % 20, "name_ru": "Караганда", "name_kz": "Қарағанды", "region_id": 1},
+            "skills": [{"id": n, "name": f"Навык {n}"} for n in range(5)],
+            "title": f"Вакансия {i}",
+        }
+        for i in range(count)
+    ]
+
+
+def timed(fn, repeat):
+    samples = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        body = fn()
+        samples.append((time.perf_counter() - started) * 1000)
+    return statistics.median(samples), body
+
+
+def stock_path(tp, content, response_class):
+    field = create_model_field("Response", tp) if tp is not None else None
+
+    def run():
+        jsonable = asyncio.run(serialize_response(field=field, response_content=content))
+        return response_class(jsonable).body
+    return run
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Response serialization benchmark")
+    parser.add_argument("--news", type=int, default=1000)
+    parser.add_argument("--vacancies", type=int, default=1000)
+    parser.add_argument("--chapters", type=int, default=6, help="Items per nested list of the course tree (chapters, lessons, tests, answers)")
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    news_type = typing.List[news_schemas.NewsResponse]
+    news = [fake(news_schemas.NewsResponse, i, 1) for i in range(args.news)]
+    vacancies = vacancy_dicts(args.vacancies)
+    course = fake(schemas.CourseDetail, 1, args.chapters)
+
+    news_json = ModelJSON(news_type)
+    course_json = ModelJSON(schemas.CourseDetail)
+    payloads = [
+        ("news list", news_type, news, lambda: news_json.dump(news)),
+        ("vacancies", None, vacancies, lambda: json_response(vacancies).body),
+        ("course detail", schemas.CourseDetail, course, lambda: course_json.dump(course)),
+    ]
+
+    print(f"{'payload':<14} {'size KB':>8} {'stock ms':>9} {'orjson ms':>10} {'fast ms':>8} {'speedup':>8}")
+    for name, tp, content, fast in payloads:
+        stock_ms, stock_body = timed(stock_path(tp, content, JSONResponse), args.repeat)
+        orjson_ms, orjson_body = timed(stock_path(tp, content, AppJSONResponse), args.repeat)
+        fast_ms, fast_body = timed(fast, args.repeat)
+
+        expected = json.loads(stock_body)
+        assert json.loads(orjson_body) == expected, f"{name}: orjson output differs"
+        assert json.loads(fast_body) == expected, f"{name}: fast path output differs"
+
+        print(
+            f"{name:<14} {len(stock_body) / 1024:8.0f} {stock_ms:9.2f} {orjson_ms:10.2f} "
+            f"{fast_ms:8.2f} {stock_ms / fast_ms:7.1f}x"
+        )
+
+    print("\nAll paths produce identical JSON ✅")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,91 @@
+#!/usr/bin/env python3
+"""
+Cold-start benchmark for the API worker
+
+Each run starts a fresh interpreter (like a newly autoscaled worker), imports
+app.main and sends the first request through an in-process ASGI client.
+
+Usage:
+    python benchmarks/startup.py
+    python benchmarks/startup.py --runs 10 --path /api/v2/news/
+    SCHEMA_SYNC_ON_STARTUP=true python benchmarks/startup.py --lifespan
+"""
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+from pathlib import Path
+
+PROJECT_DIR = Path(__file__).resolve().parent.parent
+
+# Runs inside the child interpreter; prints one JSON line
+CHILD_SCRIPT = """
+import json, sys, time
+t0 = time.perf_counter()
+import app.main
+t1 = time.perf_counter()
+
+from starlette.testclient import TestClient
+path, lifespan = sys.argv[1], sys.argv[2] == "1"
+client = TestClient(app.main.app, raise_server_exceptions=False)
+if lifespan:
+    client.__enter__()
+t2 = time.perf_counter()
+response = client.get(path)
+t3 = time.perf_counter()
+if lifespan:
+    client.__exit__(None, None, None)
+
+print(json.dumps({
+    "import_ms": (t1 - t0) * 1000,
+    "lifespan_ms": (t2 - t1) * 1000,
+    "first_request_ms": (t3 - t2) * 1000,
+    "status": response.status_code,
+}))
+"""
+
+
+def run_once(path, lifespan):
+    result = subprocess.run(
+        [sys.executable, "-c", CHILD_SCRIPT, path, "1" if lifespan else "0"],
+        cwd=PROJECT_DIR,
+        capture_output=True,
+        text=True,
+        env=os.environ.copy(),
+    )
+    if result.returncode != 0:
+        print(result.stderr, file=sys.stderr)
+        raise SystemExit(f"❌ Child process failed with code {result.returncode}")
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+
+def summarize(name, values):
+    print(
+        f"{name:18} median {statistics.median(values):8.1f} ms   "
+        f"min {min(values):8.1f} ms   max {max(values):8.1f} ms"
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description="API cold-start benchmark")
+    parser.add_argument("--runs", type=int, default=5, help="Number of fresh interpreters to start")
+    parser.add_argument("--path", default="/", help="Path of the first request")
+    parser.add_argument("--lifespan", action="store_true", help="Run lifespan startup (schedulers, schema sync)")
+    args = parser.parse_args()
+
+    print(f"🚀 {args.runs} cold starts, first request: GET {args.path}\n")
+    results = [run_once(args.path, args.lifespan) for _ in range(args.runs)]
+
+    summarize("import app.main", [r["import_ms"] for r in results])
+    if args.lifespan:
+        summarize("lifespan startup", [r["lifespan_ms"] for r in results])
+    summarize("first request", [r["first_request_ms"] for r in results])
+    summarize("total", [r["import_ms"] + r["lifespan_ms"] + r["first_request_ms"] for r in results])
+    print(f"\nStatus codes: {sorted({r['status'] for r in results})}")
+
+
+if __name__ == "__main__":
+    main()
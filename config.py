@@ -24,6 +24,40 @@ class Settings(BaseSettings):
     RESEND_FROM_EMAIL: str = ""  # Verified sender email (e.g., noreply@yourdomain.com)
     RESEND_FROM_NAME: str = "SARYARQA JASTARY"  # Sender name in emails
 
+    # Run create_all + pending SQL migrations in the app lifespan (local development only).
+    # Off by default: workers start without DDL or schema reflection.
+    SCHEMA_SYNC_ON_STARTUP: bool = False
+
+    # How often volunteer balances are recomputed from the V-coin ledger (0 disables the job)
+    VCOIN_RECONCILE_INTERVAL_MINUTES: int = 60
+
+    # How often the SMS queue worker polls for due messages; new messages wake it immediately (0 disables the worker)
+    SMS_QUEUE_POLL_SECONDS: float = 2.0
+
+    # Expired OTP sweep and OTP rate-limit persistence interval (0 disables the job)
+    OTP_MAINTENANCE_INTERVAL_MINUTES: int = 5
+
+    # OTP send rate limits: codes per phone / per client IP within the window (0 disables the limit).
+    # Raise the IP limit where many users share an address (carrier NAT, office networks).
+    OTP_PHONE_SEND_LIMIT: int = 3
+    OTP_PHONE_SEND_WINDOW_SECONDS: int = 600
+    OTP_IP_SEND_LIMIT: int = 20
+    OTP_IP_SEND_WINDOW_SECONDS: int = 3600
+
+    # OTP guessing: an issued code is retired after this many wrong attempts (0: no cap),
+    # and wrong codes per client IP are limited within the window (0 disables the limit)
+    OTP_MAX_FAILED_ATTEMPTS: int = 5
+    OTP_IP_VERIFY_LIMIT: int = 30
+    OTP_IP_VERIFY_WINDOW_SECONDS: int = 600
+
+    # Warn when one request runs the same SQL statement more than this many times (N+1); 0 disables the warning
+    QUERY_REPEAT_WARNING_THRESHOLD: int = 10
+
+    # GET /metrics is registered only with a bearer token, or when explicitly made public
+    # (e.g. the port is reachable from the Prometheus network only)
+    METRICS_TOKEN: str = ""
+    METRICS_PUBLIC: bool = False
+
     # OTP Bypass Settings (for development/testing)
     otp_bypass_enabled: bool = True  # Enable OTP bypass mode
     otp_bypass_code: str = "950826"  # Master OTP code that always works
@@ -0,0 +1,15 @@
+-- Migration: Add indexes for project form submission analytics
+-- Description: Composite indexes and a GIN index on responses for database-side form analytics
+-- Date: 2026-10-19
+
+-- Status counters and export filters per project
+CREATE INDEX IF NOT EXISTS idx_form_submissions_project_status
+    ON project_form_submissions(project_id, status);
+
+-- Submissions-over-time series per project
+CREATE INDEX IF NOT EXISTS idx_form_submissions_project_submitted
+    ON project_form_submissions(project_id, submitted_at);
+
+-- Key-existence lookups (responses ? field_id) for field value counts
+CREATE INDEX IF NOT EXISTS idx_form_submissions_responses_gin
+    ON project_form_submissions USING GIN (responses);
@@ -0,0 +1,6 @@
+-- Rollback Migration: Remove project form submission analytics indexes
+-- Date: 2026-10-19
+
+DROP INDEX IF EXISTS idx_form_submissions_responses_gin;
+DROP INDEX IF EXISTS idx_form_submissions_project_submitted;
+DROP INDEX IF EXISTS idx_form_submissions_project_status;
@@ -0,0 +1,5 @@
+-- Migration: Add invite_code column to courses table
+-- Description: Invite code for paid courses (previously added by app.main on every startup)
+-- Date: 2026-10-19
+
+ALTER TABLE courses ADD COLUMN IF NOT EXISTS invite_code VARCHAR(100);
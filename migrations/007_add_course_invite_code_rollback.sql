@@ -0,0 +1,4 @@
+-- Rollback Migration: Remove invite_code column from courses table
+-- Date: 2026-10-19
+
+ALTER TABLE courses DROP COLUMN IF EXISTS invite_code;
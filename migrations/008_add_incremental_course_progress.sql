@@ -0,0 +1,34 @@
+-- Migration: Incremental course progress tracking
+-- Description: completed_lessons_count on course_enrollments and a unique (enrollment_id, lesson_id) on course_lesson_progress
+-- Date: 2026-10-19
+
+-- Remove duplicate progress rows, keeping a completed row when there is one
+DELETE FROM course_lesson_progress p
+USING course_lesson_progress d
+WHERE p.enrollment_id = d.enrollment_id
+  AND p.lesson_id = d.lesson_id
+  AND (p.is_completed IS TRUE, p.id) < (d.is_completed IS TRUE, d.id);
+
+DO $$
+BEGIN
+    IF NOT EXISTS (
+        SELECT 1 FROM pg_constraint WHERE conname = 'uq_lesson_progress_enrollment_lesson'
+    ) THEN
+        ALTER TABLE course_lesson_progress
+            ADD CONSTRAINT uq_lesson_progress_enrollment_lesson UNIQUE (enrollment_id, lesson_id);
+    END IF;
+END $$;
+
+-- Denormalized counter of completed lessons
+ALTER TABLE course_enrollments
+ADD COLUMN IF NOT EXISTS completed_lessons_count INTEGER NOT NULL DEFAULT 0;
+
+UPDATE course_enrollments e
+SET completed_lessons_count = c.completed
+FROM (
+    SELECT enrollment_id, COUNT(*) AS completed
+    FROM course_lesson_progress
+    WHERE is_completed = TRUE
+    GROUP BY enrollment_id
+) c
+WHERE c.enrollment_id = e.id;
@@ -0,0 +1,6 @@
+-- Rollback Migration: Incremental course progress tracking
+-- Date: 2026-10-19
+
+ALTER TABLE course_enrollments DROP COLUMN IF EXISTS completed_lessons_count;
+
+ALTER TABLE course_lesson_progress DROP CONSTRAINT IF EXISTS uq_lesson_progress_enrollment_lesson;
@@ -0,0 +1,30 @@
+-- Migration: One test result row per enrollment and test
+-- Description: unique (enrollment_id, test_id) on course_test_results for atomic attempt upserts
+-- Date: 2026-10-19
+
+-- Merge duplicates: keep the latest row, carrying over the total number of attempts
+UPDATE course_test_results r
+SET attempt_count = t.attempts
+FROM (
+    SELECT MAX(id) AS id, SUM(COALESCE(attempt_count, 1)) AS attempts
+    FROM course_test_results
+    GROUP BY enrollment_id, test_id
+    HAVING COUNT(*) > 1
+) t
+WHERE r.id = t.id;
+
+DELETE FROM course_test_results r
+USING course_test_results d
+WHERE r.enrollment_id = d.enrollment_id
+  AND r.test_id = d.test_id
+  AND r.id < d.id;
+
+DO $$
+BEGIN
+    IF NOT EXISTS (
+        SELECT 1 FROM pg_constraint WHERE conname = 'uq_test_result_enrollment_test'
+    ) THEN
+        ALTER TABLE course_test_results
+            ADD CONSTRAINT uq_test_result_enrollment_test UNIQUE (enrollment_id, test_id);
+    END IF;
+END $$;
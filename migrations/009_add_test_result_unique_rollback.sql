@@ -0,0 +1,4 @@
+-- Rollback Migration: One test result row per enrollment and test
+-- Date: 2026-10-19
+
+ALTER TABLE course_test_results DROP CONSTRAINT IF EXISTS uq_test_result_enrollment_test;
@@ -0,0 +1,21 @@
+-- Migration: V-coin ledger
+-- Description: index for per-volunteer ledger sums and opening entries that make SUM(vcoin_transactions.amount) match current balances
+-- Date: 2026-10-19
+
+CREATE INDEX IF NOT EXISTS idx_vcoin_transactions_volunteer_created
+ON vcoin_transactions(volunteer_id, created_at);
+
+-- Balances changed without a transaction (e.g. direct admin edits) get one
+-- opening entry, so the reconciliation job does not reset them
+INSERT INTO vcoin_transactions (volunteer_id, amount, transaction_type, description)
+SELECT b.volunteer_id,
+       COALESCE(b.current_balance, 0) - COALESCE(l.balance, 0),
+       'reconciliation',
+       'Начальный остаток журнала V-coins'
+FROM volunteer_balances b
+LEFT JOIN (
+    SELECT volunteer_id, SUM(amount) AS balance
+    FROM vcoin_transactions
+    GROUP BY volunteer_id
+) l ON l.volunteer_id = b.volunteer_id
+WHERE COALESCE(b.current_balance, 0) <> COALESCE(l.balance, 0);
@@ -0,0 +1,8 @@
+-- Rollback Migration: V-coin ledger
+-- Date: 2026-10-19
+
+DELETE FROM vcoin_transactions
+WHERE transaction_type = 'reconciliation'
+  AND description = 'Начальный остаток журнала V-coins';
+
+DROP INDEX IF EXISTS idx_vcoin_transactions_volunteer_created;
@@ -0,0 +1,22 @@
+-- Migration: outbound SMS queue
+-- Description: sms_messages table used by the SMS queue worker (OTP delivery with retries and delivery status)
+-- Date: 2026-10-19
+
+CREATE TABLE IF NOT EXISTS sms_messages (
+    id SERIAL PRIMARY KEY,
+    phone_number VARCHAR NOT NULL,
+    message TEXT NOT NULL,
+    purpose VARCHAR(30) NOT NULL DEFAULT 'otp',
+    status VARCHAR(20) NOT NULL DEFAULT 'queued',
+    attempts INTEGER NOT NULL DEFAULT 0,
+    next_attempt_at TIMESTAMPTZ NOT NULL DEFAULT now(),
+    provider_message_id VARCHAR,
+    last_error TEXT,
+    created_at TIMESTAMPTZ NOT NULL DEFAULT now(),
+    sent_at TIMESTAMPTZ
+);
+
+-- Only undelivered messages are indexed; the worker claims them by next_attempt_at
+CREATE INDEX IF NOT EXISTS idx_sms_messages_pending
+ON sms_messages(next_attempt_at)
+WHERE status IN ('queued', 'sending');
@@ -0,0 +1,5 @@
+-- Rollback Migration: outbound SMS queue
+-- Date: 2026-10-19
+
+DROP INDEX IF EXISTS idx_sms_messages_pending;
+DROP TABLE IF EXISTS sms_messages;
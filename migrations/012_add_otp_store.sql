@@ -0,0 +1,16 @@
+-- Migration: OTP store
+-- Description: partial index on active OTP codes, expiry index for the sweeper, persisted OTP rate-limit windows
+-- Date: 2026-10-19
+
+CREATE INDEX IF NOT EXISTS idx_otp_codes_active_phone
+ON otp_codes(phone_number, id)
+WHERE is_used = false;
+
+CREATE INDEX IF NOT EXISTS idx_otp_codes_expires_at
+ON otp_codes(expires_at);
+
+CREATE TABLE IF NOT EXISTS otp_rate_limits (
+    key VARCHAR PRIMARY KEY,
+    hits JSON NOT NULL,
+    updated_at TIMESTAMPTZ NOT NULL DEFAULT now()
+);
@@ -0,0 +1,6 @@
+-- Rollback Migration: OTP store
+-- Date: 2026-10-19
+
+DROP TABLE IF EXISTS otp_rate_limits;
+DROP INDEX IF EXISTS idx_otp_codes_expires_at;
+DROP INDEX IF EXISTS idx_otp_codes_active_phone;
@@ -0,0 +1,291 @@
+-- Migration: unified search index
+-- Description: search_documents table (weighted tsvector + GIN) kept in sync by triggers on events, experts, courses, resumes, vacancies, tickets, places and projects
+-- Date: 2026-10-19
+
+CREATE TABLE IF NOT EXISTS search_documents (
+    id BIGSERIAL PRIMARY KEY,
+    entity_type VARCHAR(20) NOT NULL,
+    entity_id INTEGER NOT NULL,
+    language VARCHAR(5) NOT NULL,
+    title TEXT NOT NULL,
+    snippet TEXT,
+    image_url TEXT,
+    published_at TIMESTAMP,
+    document TSVECTOR NOT NULL,
+    updated_at TIMESTAMPTZ NOT NULL DEFAULT now(),
+    CONSTRAINT uq_search_documents_entity_language UNIQUE (entity_type, entity_id, language)
+);
+
+CREATE INDEX IF NOT EXISTS idx_search_documents_document
+ON search_documents USING GIN (document);
+
+-- Weighted document: A — title, B — short attributes, C — long text.
+-- Russian rows get both the 'russian' (stemmed) and 'simple' vectors;
+-- Kazakh has no built-in configuration, so 'simple' only.
+CREATE OR REPLACE FUNCTION search_vector(lang TEXT, a TEXT, b TEXT, c TEXT)
+RETURNS TSVECTOR AS $$
+    SELECT setweight(to_tsvector('simple', COALESCE(a, '')), 'A')
+        || setweight(to_tsvector('simple', COALESCE(b, '')), 'B')
+        || setweight(to_tsvector('simple', COALESCE(c, '')), 'C')
+        || CASE WHEN lang = 'ru' THEN
+               setweight(to_tsvector('russian', COALESCE(a, '')), 'A')
+            || setweight(to_tsvector('russian', COALESCE(b, '')), 'B')
+            || setweight(to_tsvector('russian', COALESCE(c, '')), 'C')
+           ELSE ''::TSVECTOR END
+$$ LANGUAGE sql IMMUTABLE;
+
+CREATE OR REPLACE FUNCTION search_document_upsert(
+    p_entity_type TEXT, p_entity_id INTEGER, p_language TEXT,
+    p_title TEXT, p_attributes TEXT, p_text TEXT,
+    p_image_url TEXT, p_published_at TIMESTAMP
+) RETURNS VOID AS $$
+BEGIN
+    IF COALESCE(p_title, '') = '' THEN
+        DELETE FROM search_documents
+        WHERE entity_type = p_entity_type AND entity_id = p_entity_id AND language = p_language;
+        RETURN;
+    END IF;
+
+    INSERT INTO search_documents (entity_type, entity_id, language, title, snippet, image_url, published_at, document, updated_at)
+    VALUES (
+        p_entity_type, p_entity_id, p_language, p_title, left(p_text, 300), p_image_url, p_published_at,
+        search_vector(p_language, p_title, p_attributes, p_text), now()
+    )
+    ON CONFLICT (entity_type, entity_id, language) DO UPDATE
+    SET title = EXCLUDED.title,
+        snippet = EXCLUDED.snippet,
+        image_url = EXCLUDED.image_url,
+        published_at = EXCLUDED.published_at,
+        document = EXCLUDED.document,
+        updated_at = now();
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE OR REPLACE FUNCTION search_document_delete(p_entity_type TEXT, p_entity_id INTEGER)
+RETURNS VOID AS $$
+    DELETE FROM search_documents WHERE entity_type = p_entity_type AND entity_id = p_entity_id;
+$$ LANGUAGE sql;
+
+-- Entity triggers: only publicly visible rows are indexed
+
+CREATE OR REPLACE FUNCTION search_index_event() RETURNS TRIGGER AS $$
+BEGIN
+    IF TG_OP = 'DELETE' THEN
+        PERFORM search_document_delete('event', OLD.id);
+        RETURN OLD;
+    END IF;
+    IF NEW.moderation_status = 'approved' THEN
+        PERFORM search_document_upsert('event', NEW.id, 'ru', NEW.title, NEW.location, NEW.description, NEW.event_photo, NEW."date");
+    ELSE
+        PERFORM search_document_delete('event', NEW.id);
+    END IF;
+    RETURN NEW;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE OR REPLACE FUNCTION search_index_expert() RETURNS TRIGGER AS $$
+BEGIN
+    IF TG_OP = 'DELETE' THEN
+        PERFORM search_document_delete('expert', OLD.id);
+        RETURN OLD;
+    END IF;
+    PERFORM search_document_upsert(
+        'expert', NEW.id, 'ru', NEW.full_name, concat_ws(' ', NEW.specialization, NEW.city), NULL,
+        NEW.avatar_url, NEW.created_at
+    );
+    RETURN NEW;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE OR REPLACE FUNCTION search_index_course() RETURNS TRIGGER AS $$
+BEGIN
+    IF TG_OP = 'DELETE' THEN
+        PERFORM search_document_delete('course', OLD.id);
+        RETURN OLD;
+    END IF;
+    IF NEW.moderation_status = 'approved' THEN
+        PERFORM search_document_upsert('course', NEW.id, 'ru', NEW.title, NEW.skills, NEW.description, NEW.cover_image, NEW.created_at);
+    ELSE
+        PERFORM search_document_delete('course', NEW.id);
+    END IF;
+    RETURN NEW;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE OR REPLACE FUNCTION search_index_resume() RETURNS TRIGGER AS $$
+BEGIN
+    IF TG_OP = 'DELETE' THEN
+        PERFORM search_document_delete('resume', OLD.id);
+        RETURN OLD;
+    END IF;
+    IF NEW.is_active AND NEW.is_published THEN
+        PERFORM search_document_upsert('resume', NEW.id, 'ru', NEW.full_name, NULL, NEW.about_me, NULL, NEW.created_at);
+    ELSE
+        PERFORM search_document_delete('resume', NEW.id);
+    END IF;
+    RETURN NEW;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE OR REPLACE FUNCTION search_index_vacancy() RETURNS TRIGGER AS $$
+BEGIN
+    IF TG_OP = 'DELETE' THEN
+        PERFORM search_document_delete('vacancy', OLD.id);
+        RETURN OLD;
+    END IF;
+    IF NEW.moderation_status = 'approved' AND COALESCE(NEW.is_active, TRUE) THEN
+        PERFORM search_document_upsert(
+            'vacancy', NEW.id, 'kz', NEW.title_kz, NEW.company_name,
+            concat_ws(' ', NEW.description_kz, NEW.requirements_kz), NULL, NEW.created_at
+        );
+        PERFORM search_document_upsert(
+            'vacancy', NEW.id, 'ru', NEW.title_ru, NEW.company_name,
+            concat_ws(' ', NEW.description_ru, NEW.requirements_ru), NULL, NEW.created_at
+        );
+    ELSE
+        PERFORM search_document_delete('vacancy', NEW.id);
+    END IF;
+    RETURN NEW;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE OR REPLACE FUNCTION search_index_ticket() RETURNS TRIGGER AS $$
+BEGIN
+    IF TG_OP = 'DELETE' THEN
+        PERFORM search_document_delete('ticket', OLD.id);
+        RETURN OLD;
+    END IF;
+    IF NEW.moderation_status = 'approved' THEN
+        PERFORM search_document_upsert('ticket', NEW.id, 'kz', NEW.title, NULL, NEW.description, NEW.main_photo_url, NEW.event_date);
+        PERFORM search_document_upsert('ticket', NEW.id, 'ru', NEW.title_ru, NULL, NEW.description_ru, NEW.main_photo_url, NEW.event_date);
+    ELSE
+        PERFORM search_document_delete('ticket', NEW.id);
+    END IF;
+    RETURN NEW;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE OR REPLACE FUNCTION search_index_place() RETURNS TRIGGER AS $$
+BEGIN
+    IF TG_OP = 'DELETE' THEN
+        PERFORM search_document_delete('place', OLD.id);
+        RETURN OLD;
+    END IF;
+    IF NEW.moderation_status = 'approved' THEN
+        PERFORM search_document_upsert('place', NEW.id, 'kz', NEW.title, NULL, NEW.description, NEW.main_photo_url, NEW.event_date);
+        PERFORM search_document_upsert('place', NEW.id, 'ru', NEW.title_ru, NULL, NEW.description_ru, NEW.main_photo_url, NEW.event_date);
+    ELSE
+        PERFORM search_document_delete('place', NEW.id);
+    END IF;
+    RETURN NEW;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE OR REPLACE FUNCTION search_index_project() RETURNS TRIGGER AS $$
+BEGIN
+    IF TG_OP = 'DELETE' THEN
+        PERFORM search_document_delete('project', OLD.id);
+        RETURN OLD;
+    END IF;
+    IF NEW.moderation_status = 'approved' THEN
+        PERFORM search_document_upsert('project', NEW.id, 'kz', NEW.title, NULL, NEW.description, NEW.photo_url, NEW.start_date);
+        PERFORM search_document_upsert('project', NEW.id, 'ru', NEW.title_ru, NULL, NEW.description_ru, NEW.photo_url, NEW.start_date);
+    ELSE
+        PERFORM search_document_delete('project', NEW.id);
+    END IF;
+    RETURN NEW;
+END;
+$$ LANGUAGE plpgsql;
+
+-- UPDATE OF: only indexed and visibility columns re-index a row; counters
+-- (views_count, ...) and moderation bookkeeping do not
+
+DROP TRIGGER IF EXISTS trg_search_index_event ON events_;
+CREATE TRIGGER trg_search_index_event
+AFTER INSERT OR DELETE OR UPDATE OF title, location, description, event_photo, "date", moderation_status ON events_
+FOR EACH ROW EXECUTE FUNCTION search_index_event();
+
+DROP TRIGGER IF EXISTS trg_search_index_expert ON experts;
+CREATE TRIGGER trg_search_index_expert
+AFTER INSERT OR DELETE OR UPDATE OF full_name, specialization, city, avatar_url, created_at ON experts
+FOR EACH ROW EXECUTE FUNCTION search_index_expert();
+
+DROP TRIGGER IF EXISTS trg_search_index_course ON courses;
+CREATE TRIGGER trg_search_index_course
+AFTER INSERT OR DELETE OR UPDATE OF title, skills, description, cover_image, created_at, moderation_status ON courses
+FOR EACH ROW EXECUTE FUNCTION search_index_course();
+
+DROP TRIGGER IF EXISTS trg_search_index_resume ON resumes_;
+CREATE TRIGGER trg_search_index_resume
+AFTER INSERT OR DELETE OR UPDATE OF full_name, about_me, created_at, is_active, is_published ON resumes_
+FOR EACH ROW EXECUTE FUNCTION search_index_resume();
+
+DROP TRIGGER IF EXISTS trg_search_index_vacancy ON vacancies_new_2025_;
+CREATE TRIGGER trg_search_index_vacancy
+AFTER INSERT OR DELETE OR UPDATE OF title_kz, title_ru, company_name, description_kz, description_ru, requirements_kz, requirements_ru, created_at, moderation_status, is_active ON vacancies_new_2025_
+FOR EACH ROW EXECUTE FUNCTION search_index_vacancy();
+
+DROP TRIGGER IF EXISTS trg_search_index_ticket ON tickets;
+CREATE TRIGGER trg_search_index_ticket
+AFTER INSERT OR DELETE OR UPDATE OF title, title_ru, description, description_ru, main_photo_url, event_date, moderation_status ON tickets
+FOR EACH ROW EXECUTE FUNCTION search_index_ticket();
+
+DROP TRIGGER IF EXISTS trg_search_index_place ON places;
+CREATE TRIGGER trg_search_index_place
+AFTER INSERT OR DELETE OR UPDATE OF title, title_ru, description, description_ru, main_photo_url, event_date, moderation_status ON places
+FOR EACH ROW EXECUTE FUNCTION search_index_place();
+
+DROP TRIGGER IF EXISTS trg_search_index_project ON projects_multi_2;
+CREATE TRIGGER trg_search_index_project
+AFTER INSERT OR DELETE OR UPDATE OF title, title_ru, description, description_ru, photo_url, start_date, moderation_status ON projects_multi_2
+FOR EACH ROW EXECUTE FUNCTION search_index_project();
+
+-- Backfill: one set-based insert of the visible rows (no row locks on the entity tables)
+INSERT INTO search_documents (entity_type, entity_id, language, title, snippet, image_url, published_at, document)
+SELECT entity_type, entity_id, language, title, left(body, 300), image_url, published_at,
+       search_vector(language, title, attributes, body)
+FROM (
+    SELECT 'event'::TEXT, id, 'ru'::TEXT, title::TEXT, location::TEXT, description::TEXT, event_photo::TEXT, "date"::TIMESTAMP
+    FROM events_ WHERE moderation_status = 'approved'
+    UNION ALL
+    SELECT 'expert', id, 'ru', full_name, concat_ws(' ', specialization, city), NULL, avatar_url, created_at::TIMESTAMP
+    FROM experts
+    UNION ALL
+    SELECT 'course', id, 'ru', title, skills, description, cover_image, created_at::TIMESTAMP
+    FROM courses WHERE moderation_status = 'approved'
+    UNION ALL
+    SELECT 'resume', id, 'ru', full_name, NULL, about_me, NULL, created_at::TIMESTAMP
+    FROM resumes_ WHERE is_active AND is_published
+    UNION ALL
+    SELECT 'vacancy', id, 'kz', title_kz, company_name, concat_ws(' ', description_kz, requirements_kz), NULL, created_at::TIMESTAMP
+    FROM vacancies_new_2025_ WHERE moderation_status = 'approved' AND COALESCE(is_active, TRUE)
+    UNION ALL
+    SELECT 'vacancy', id, 'ru', title_ru, company_name, concat_ws(' ', description_ru, requirements_ru), NULL, created_at::TIMESTAMP
+    FROM vacancies_new_2025_ WHERE moderation_status = 'approved' AND COALESCE(is_active, TRUE)
+    UNION ALL
+    SELECT 'ticket', id, 'kz', title, NULL, description, main_photo_url, event_date::TIMESTAMP
+    FROM tickets WHERE moderation_status = 'approved'
+    UNION ALL
+    SELECT 'ticket', id, 'ru', title_ru, NULL, description_ru, main_photo_url, event_date::TIMESTAMP
+    FROM tickets WHERE moderation_status = 'approved'
+    UNION ALL
+    SELECT 'place', id, 'kz', title, NULL, description, main_photo_url, event_date::TIMESTAMP
+    FROM places WHERE moderation_status = 'approved'
+    UNION ALL
+    SELECT 'place', id, 'ru', title_ru, NULL, description_ru, main_photo_url, event_date::TIMESTAMP
+    FROM places WHERE moderation_status = 'approved'
+    UNION ALL
+    SELECT 'project', id, 'kz', title, NULL, description, photo_url, start_date::TIMESTAMP
+    FROM projects_multi_2 WHERE moderation_status = 'approved'
+    UNION ALL
+    SELECT 'project', id, 'ru', title_ru, NULL, description_ru, photo_url, start_date::TIMESTAMP
+    FROM projects_multi_2 WHERE moderation_status = 'approved'
+) AS source (entity_type, entity_id, language, title, attributes, body, image_url, published_at)
+WHERE COALESCE(title, '') <> ''
+ON CONFLICT (entity_type, entity_id, language) DO UPDATE
+SET title = EXCLUDED.title,
+    snippet = EXCLUDED.snippet,
+    image_url = EXCLUDED.image_url,
+    published_at = EXCLUDED.published_at,
+    document = EXCLUDED.document,
+    updated_at = now();
@@ -0,0 +1,25 @@
+-- Rollback Migration: unified search index
+-- Date: 2026-10-19
+
+DROP TRIGGER IF EXISTS trg_search_index_event ON events_;
+DROP TRIGGER IF EXISTS trg_search_index_expert ON experts;
+DROP TRIGGER IF EXISTS trg_search_index_course ON courses;
+DROP TRIGGER IF EXISTS trg_search_index_resume ON resumes_;
+DROP TRIGGER IF EXISTS trg_search_index_vacancy ON vacancies_new_2025_;
+DROP TRIGGER IF EXISTS trg_search_index_ticket ON tickets;
+DROP TRIGGER IF EXISTS trg_search_index_place ON places;
+DROP TRIGGER IF EXISTS trg_search_index_project ON projects_multi_2;
+
+DROP FUNCTION IF EXISTS search_index_event();
+DROP FUNCTION IF EXISTS search_index_expert();
+DROP FUNCTION IF EXISTS search_index_course();
+DROP FUNCTION IF EXISTS search_index_resume();
+DROP FUNCTION IF EXISTS search_index_vacancy();
+DROP FUNCTION IF EXISTS search_index_ticket();
+DROP FUNCTION IF EXISTS search_index_place();
+DROP FUNCTION IF EXISTS search_index_project();
+DROP FUNCTION IF EXISTS search_document_delete(TEXT, INTEGER);
+DROP FUNCTION IF EXISTS search_document_upsert(TEXT, INTEGER, TEXT, TEXT, TEXT, TEXT, TEXT, TIMESTAMP);
+DROP FUNCTION IF EXISTS search_vector(TEXT, TEXT, TEXT, TEXT);
+
+DROP TABLE IF EXISTS search_documents;
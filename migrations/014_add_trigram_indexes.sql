@@ -0,0 +1,23 @@
+-- Migration: trigram indexes for fuzzy name search
+-- Description: pg_trgm GIN indexes on expert/resume names and ticket/place titles (fuzzy=true on the search endpoints)
+-- Date: 2026-10-19
+
+CREATE EXTENSION IF NOT EXISTS pg_trgm;
+
+CREATE INDEX IF NOT EXISTS idx_experts_full_name_trgm
+    ON experts USING GIN (full_name gin_trgm_ops);
+
+CREATE INDEX IF NOT EXISTS idx_resumes_full_name_trgm
+    ON resumes_ USING GIN (full_name gin_trgm_ops);
+
+CREATE INDEX IF NOT EXISTS idx_tickets_title_trgm
+    ON tickets USING GIN (title gin_trgm_ops);
+
+CREATE INDEX IF NOT EXISTS idx_tickets_title_ru_trgm
+    ON tickets USING GIN (title_ru gin_trgm_ops);
+
+CREATE INDEX IF NOT EXISTS idx_places_title_trgm
+    ON places USING GIN (title gin_trgm_ops);
+
+CREATE INDEX IF NOT EXISTS idx_places_title_ru_trgm
+    ON places USING GIN (title_ru gin_trgm_ops);
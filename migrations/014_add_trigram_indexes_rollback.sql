@@ -0,0 +1,11 @@
+-- Rollback Migration: trigram indexes for fuzzy name search
+-- Date: 2026-10-19
+
+DROP INDEX IF EXISTS idx_places_title_ru_trgm;
+DROP INDEX IF EXISTS idx_places_title_trgm;
+DROP INDEX IF EXISTS idx_tickets_title_ru_trgm;
+DROP INDEX IF EXISTS idx_tickets_title_trgm;
+DROP INDEX IF EXISTS idx_resumes_full_name_trgm;
+DROP INDEX IF EXISTS idx_experts_full_name_trgm;
+
+-- Расширение pg_trgm не удаляется: на него могут опираться другие объекты
@@ -0,0 +1,9 @@
+-- Migration: OTP failed attempts
+-- Description: failed_attempts on otp_codes; a code is retired after OTP_MAX_FAILED_ATTEMPTS wrong entries
+-- Date: 2026-10-19
+
+ALTER TABLE otp_codes
+ADD COLUMN IF NOT EXISTS failed_attempts INTEGER NOT NULL DEFAULT 0;
+
+-- Окна попыток проверки по номеру больше не используются
+DELETE FROM otp_rate_limits WHERE key LIKE 'verify:%';
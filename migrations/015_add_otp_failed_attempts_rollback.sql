@@ -0,0 +1,4 @@
+-- Rollback Migration: OTP failed attempts
+-- Date: 2026-10-19
+
+ALTER TABLE otp_codes DROP COLUMN IF EXISTS failed_attempts;
@@ -4,6 +4,7 @@ Database Migration Runner for Tabys
 Runs SQL migrations against the PostgreSQL database
 """
 
+import importlib
 import os
 import sys
 import psycopg2
@@ -33,6 +34,100 @@ except ImportError:
     }
 
 
+# Modules that declare SQLAlchemy models on app.database.Base.
+# create_all() only knows about tables whose models have been imported.
+MODEL_MODULES = [
+    "app.models",
+    "app.project_models",
+    "app.news_models",
+    "app.analytics_models",
+    "app.telegram_otp_models",
+    "app.broadcast_models",
+    "app.moderation_notification_models",
+    "app.notification_models",
+    "app.user_telegram_models",
+    "app.user_interest_models",
+    "app.tech_task_models",
+    "app.leisure_models",
+    "app.resume_models",
+    "app.v_models",
+]
+
+
+# Migrations written before the runner was used on deploy: their schema is
+# already declared by the models (create_all), several of them are not
+# idempotent (CREATE TYPE / CREATE TABLE without IF NOT EXISTS) and some repeat
+# each other (001_add_telegram_broadcasts / 004_add_broadcast_tables).
+# They are applied best-effort: a failure is reported but does not stop the
+# migration run, and on a fresh database they are recorded as a baseline.
+LEGACY_MIGRATIONS = {
+    "001_add_admin_id_columns",
+    "001_add_news_view_count",
+    "001_add_role_enum",
+    "001_add_telegram_broadcasts",
+    "002_assign_initial_roles",
+    "003_add_admin_approval_status",
+    "004_add_broadcast_tables",
+    "005_add_admin_email",
+    "006_add_form_submission_indexes",
+    "007_add_course_invite_code",
+    "add_moderation_fields",
+    "add_news_category",
+    "add_news_multilang",
+    "add_news_scheduling_columns",
+}
+
+
+def is_fresh_database():
+    """True if none of the model tables exist yet (the schema will come from create_all)"""
+    from sqlalchemy import inspect
+    from app.database import engine, Base
+
+    for module_name in MODEL_MODULES:
+        importlib.import_module(module_name)
+
+    try:
+        existing = set(inspect(engine).get_table_names())
+    except Exception as e:
+        print(f"⚠️  Could not inspect the schema: {e}")
+        return False
+    return not existing.intersection(Base.metadata.tables)
+
+
+def create_model_tables():
+    """
+    Create tables for all models that do not exist yet (Base.metadata.create_all).
+    This used to run on every import of app.main; it now runs only here.
+    """
+    try:
+        from app.database import engine, Base
+
+        for module_name in MODEL_MODULES:
+            importlib.import_module(module_name)
+
+        Base.metadata.create_all(bind=engine)
+        print(f"✅ Model tables ready ({len(Base.metadata.tables)} tables)")
+        return True
+    except Exception as e:
+        print(f"❌ Failed to create model tables: {e}")
+        return False
+
+
+def sync_schema():
+    """Create missing model tables and apply pending SQL migrations"""
+    baseline_legacy = is_fresh_database()
+    if not create_model_tables():
+        return False
+
+    runner = MigrationRunner()
+    if not runner.connect():
+        return False
+    try:
+        return runner.create_migrations_table() and runner.run_pending_migrations(baseline_legacy)
+    finally:
+        runner.disconnect()
+
+
 class MigrationRunner:
     def __init__(self):
         self.migrations_dir = Path(__file__).parent
@@ -134,13 +229,7 @@ class MigrationRunner:
                 )
 
             # Record migration in database
-            self.cursor.execute(
-                """
-                INSERT INTO migrations (migration_name, description)
-                VALUES (%s, %s)
-                """,
-                (migration_name, description)
-            )
+            self.record_migration(migration_name, description)
 
             # Commit the transaction
             self.conn.commit()
@@ -152,6 +241,35 @@ class MigrationRunner:
             print(f"❌ Failed to apply migration '{migration_name}': {e}")
             return False
 
+    def record_migration(self, migration_name, description):
+        """Mark a migration as applied (the caller commits)"""
+        self.cursor.execute(
+            """
+            INSERT INTO migrations (migration_name, description)
+            VALUES (%s, %s)
+            """,
+            (migration_name, description)
+        )
+
+    def baseline_migration(self, migration_name):
+        """Record a legacy migration as applied without running it"""
+        try:
+            self.record_migration(migration_name, "Baseline: schema created from models")
+            self.conn.commit()
+            print(f"📌 Migration '{migration_name}' recorded as baseline")
+            return True
+        except psycopg2.Error as e:
+            self.conn.rollback()
+            print(f"❌ Failed to record baseline for '{migration_name}': {e}")
+            return False
+
+    def migration_files(self):
+        """Migration files in order, without rollback scripts (*_rollback.sql, ROLLBACK.sql)"""
+        return sorted(
+            f for f in self.migrations_dir.glob("*.sql")
+            if not f.stem.lower().endswith("rollback")
+        )
+
     def rollback_migration(self, migration_name):
         """Rollback a migration"""
         rollback_file = self.migrations_dir / f"{migration_name}_rollback.sql"
@@ -192,11 +310,7 @@ class MigrationRunner:
         """List all available migrations and their status"""
         print("\n📋 Available Migrations:\n")
 
-        # Get all migration files (excluding rollback files)
-        migration_files = sorted(
-            [f for f in self.migrations_dir.glob("*.sql")
-             if not f.name.endswith('_rollback.sql')]
-        )
+        migration_files = self.migration_files()
 
         if not migration_files:
             print("No migration files found.")
@@ -219,15 +333,16 @@ class MigrationRunner:
         except psycopg2.Error as e:
             print(f"❌ Error listing migrations: {e}")
 
-    def run_pending_migrations(self):
-        """Run all pending migrations"""
+    def run_pending_migrations(self, baseline_legacy=False):
+        """
+        Run all pending migrations.
+        A failed legacy migration is recorded as baseline when the schema was
+        just created from the models (baseline_legacy), otherwise it is
+        reported and left pending; neither stops the run.
+        """
         print("\n🔍 Checking for pending migrations...")
 
-        # Get all migration files (excluding rollback files)
-        migration_files = sorted(
-            [f for f in self.migrations_dir.glob("*.sql")
-             if not f.name.endswith('_rollback.sql')]
-        )
+        migration_files = self.migration_files()
 
         if not migration_files:
             print("No migration files found.")
@@ -235,10 +350,19 @@ class MigrationRunner:
 
         pending_count = 0
         for migration_file in migration_files:
-            if not self.is_migration_applied(migration_file.stem):
-                if not self.apply_migration(migration_file):
-                    return False
+            migration_name = migration_file.stem
+            if self.is_migration_applied(migration_name):
+                continue
+            if self.apply_migration(migration_file):
                 pending_count += 1
+                continue
+            if migration_name not in LEGACY_MIGRATIONS:
+                return False
+            if baseline_legacy:
+                if not self.baseline_migration(migration_name):
+                    return False
+            else:
+                print(f"⚠️  Legacy migration '{migration_name}' left pending, check it manually")
 
         if pending_count == 0:
             print("\n✅ No pending migrations. Database is up to date!")
@@ -255,7 +379,7 @@ def main():
     parser = argparse.ArgumentParser(description='Database Migration Runner')
     parser.add_argument(
         'command',
-        choices=['migrate', 'rollback', 'list', 'status'],
+        choices=['migrate', 'create-tables', 'rollback', 'list', 'status'],
         help='Command to execute'
     )
     parser.add_argument(
@@ -265,6 +389,16 @@ def main():
 
     args = parser.parse_args()
 
+    # Model tables first: SQL migrations may alter tables created here
+    baseline_legacy = False
+    if args.command in ['migrate', 'create-tables']:
+        baseline_legacy = is_fresh_database()
+        if not create_model_tables():
+            sys.exit(1)
+        if args.command == 'create-tables':
+            print("\n🎉 Done!")
+            sys.exit(0)
+
     runner = MigrationRunner()
 
     # Connect to database
@@ -280,7 +414,7 @@ def main():
     success = True
 
     if args.command == 'migrate':
-        success = runner.run_pending_migrations()
+        success = runner.run_pending_migrations(baseline_legacy)
 
     elif args.command == 'rollback':
         if not args.migration: